@@ -7,6 +7,17 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SYNC_INTERVAL = 3600  # Sync every hour
     SCRAPER_SERVICE_URL = 'http://scraping-service:5001'
+    # Adaptive recrawl: product pages re-scraped where prices change most often, within a fixed budget
+    RECRAWL_INTERVAL = int(os.getenv('RECRAWL_INTERVAL', 600))  # Seconds between scheduling rounds
+    RECRAWL_BUDGET = int(os.getenv('RECRAWL_BUDGET', 200))  # Product pages scraped per round
+    RECRAWL_MIN_AGE = int(os.getenv('RECRAWL_MIN_AGE', 1800))  # Never re-scrape a product sooner
+    RECRAWL_MAX_AGE = int(os.getenv('RECRAWL_MAX_AGE', 7 * 86400))  # Always re-scrape a product after this
+    RECRAWL_HISTORY_DAYS = int(os.getenv('RECRAWL_HISTORY_DAYS', 90))  # Price history the change rates are learned from
+    RECRAWL_PRIOR_DAYS = float(os.getenv('RECRAWL_PRIOR_DAYS', 7))  # Weight of the category rate in a product's rate
+    RECRAWL_DEFAULT_RATE = 1 / 86400  # Price changes per second assumed before anything is observed
+    # The scraping service's per-host RATE_LIMIT_RPM and BULK_SCRAPE_TIMEOUT, which cap one retailer's share of a round
+    RECRAWL_SCRAPE_RPM = float(os.getenv('RECRAWL_SCRAPE_RPM', 20))
+    RECRAWL_BULK_TIMEOUT = float(os.getenv('RECRAWL_BULK_TIMEOUT', 240))
     RETAILERS = {
         'sainsbury': 'http://localhost:5001/browse/sainsbury/freshgroceries',
         'aldi': 'http://localhost:5001/browse/aldi/freshgroceries',
@@ -44,6 +44,12 @@ CREATE TABLE price_history (
     scraped_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Last scrape of each product's price, changed or not
+CREATE TABLE price_checks (
+    product_id UUID PRIMARY KEY REFERENCES products(product_id),
+    checked_at TIMESTAMPTZ NOT NULL
+);
+
 -- For price predictions
 CREATE TABLE price_predictions (
     prediction_id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
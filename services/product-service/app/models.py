@@ -44,4 +44,11 @@ class PriceHistory(db.Model):
     offer_description = db.Column(db.String(255))
     valid_from = db.Column(db.DateTime(timezone=True), nullable=False)
     valid_to = db.Column(db.DateTime(timezone=True))
-    scraped_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    scraped_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
+
+class PriceCheck(db.Model):
+    """When a product's price was last scraped, changed or not; price_history only records changes."""
+    __tablename__ = 'price_checks'
+
+    product_id = db.Column(UUID(as_uuid=True), db.ForeignKey('products.product_id'), primary_key=True)
+    checked_at = db.Column(db.DateTime(timezone=True), nullable=False)
@@ -31,7 +31,9 @@ def sync_products():
     retry_strategy = Retry(
         total=3,
         backoff_factor=2,
-        status_forcelist=[500, 502, 503, 504]
+        # A 503 means the retailer's circuit is open, so retrying cannot help; a 429 means its
+        # browsers or queue are busy, and is retried after the Retry-After the service sends
+        status_forcelist=[429, 500, 502, 504]
     )
     adapter = HTTPAdapter(max_retries=retry_strategy)
     http = requests.Session()
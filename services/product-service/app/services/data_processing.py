@@ -80,7 +80,7 @@ class PriceService:
 
     @staticmethod
     def process_scraped_product(data, retailer_name):  
-        from app.models import Retailer, Product, PriceHistory  
+        from app.models import Retailer, Product, PriceHistory, PriceCheck
 
         if 'name' not in data or not data['name']:
             raise ValueError("Product name is required")
@@ -100,6 +100,7 @@ class PriceService:
 
         size_info = PriceService.normalize_size(data.get('size'))
         unit_price = PriceService.normalize_unit_price(data.get('unit_price'))
+        previous_price = product.current_price if product else None
 
         if not product:
             product = Product(
@@ -127,8 +128,11 @@ class PriceService:
         db.session.commit()
 
         # Record price history if changed
-        if not product.price_history or product.current_price != data['price']:
+        if previous_price is None or float(previous_price) != float(data['price']) \
+                or product.price_history.first() is None:
             PriceService.add_price_history(product.product_id, data, unit_price)
+        db.session.merge(PriceCheck(product_id=product.product_id, checked_at=datetime.utcnow()))
+        db.session.commit()
 
         return product
 
@@ -149,8 +153,7 @@ class PriceService:
             valid_from=datetime.utcnow(),
             valid_to=None, 
         )
-        db.session.add(history)
-        db.session.commit()
+        db.session.add(history)  # Committed by the caller, with the rest of its batch
 
     @staticmethod
     def detect_category(product_name):
@@ -0,0 +1,224 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urldefrag
+import requests
+from apscheduler.schedulers.background import BackgroundScheduler
+from flask import current_app
+
+from app.extensions import db
+from app.models import PriceCheck, PriceHistory, Product, Retailer
+from app.services.data_processing import PriceService
+
+
+class ChangeStats(NamedTuple):
+    """Price changes seen for one product and the seconds of history they were seen over."""
+    changes: int
+    exposure: float
+    last_seen: float
+
+
+class RecrawlCandidate(NamedTuple):
+    product_id: object
+    retailer: str
+    url: str
+    rate: float  # Estimated price changes per second
+    probability: float  # Chance the price has changed since it was last seen
+
+
+def _epoch(moment: datetime) -> float:
+    """Seconds since the epoch; naive datetimes are UTC, as stored by SQLite and datetime.utcnow."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class RecrawlScheduler:
+    """Re-scrapes product pages where a price change is most likely, within a fixed budget per round.
+
+    Each product's price-change rate is learned from its ``price_history``
+    and shrunk towards the rate of its category, so a product with little
+    history behaves like its category and a well-observed one like itself.
+    Treating changes as a Poisson process, the chance a product has changed
+    since it was last seen is ``1 - exp(-rate * age)``; every round scrapes
+    the ``budget`` products with the highest chance through the scraping
+    service's ``/scrape/bulk``. A product is never re-scraped within
+    ``min_age`` and always once ``max_age`` has passed. One retailer gets no
+    more of a round than its rate limit lets one bulk request scrape, so the
+    rest of the budget goes to the others. Scrapes that found the price
+    unchanged are kept in ``price_checks``, as they count as observed time.
+    """
+
+    def __init__(self, db, budget: Optional[int] = None, min_age: Optional[float] = None,
+                 max_age: Optional[float] = None):
+        self.db = db
+        self.scheduler = BackgroundScheduler()
+        self.budget = budget
+        self.min_age = min_age
+        self.max_age = max_age
+        self.http = requests.Session()
+
+    def _setting(self, value, name):
+        return value if value is not None else current_app.config[name]
+
+    def last_checked(self) -> Dict[object, float]:
+        """When each product's price was last scraped, changed or not."""
+        return {product_id: _epoch(checked_at)
+                for product_id, checked_at in db.session.query(PriceCheck.product_id, PriceCheck.checked_at)}
+
+    def _mark_checked(self, product_id, now: datetime):
+        db.session.merge(PriceCheck(product_id=product_id, checked_at=now))
+
+    def change_stats(self, now: Optional[datetime] = None,
+                     checked: Optional[Dict[object, float]] = None) -> Dict[object, ChangeStats]:
+        """Count each product's price changes over the recent price history."""
+        now = now or datetime.utcnow()
+        checked = self.last_checked() if checked is None else checked
+        since = now - timedelta(days=current_app.config['RECRAWL_HISTORY_DAYS'])
+        rows = db.session.query(PriceHistory.product_id, PriceHistory.price, PriceHistory.scraped_at)\
+            .filter(PriceHistory.scraped_at >= since)\
+            .order_by(PriceHistory.product_id, PriceHistory.scraped_at)
+
+        observed = {}  # product_id -> [changes, first seen, last seen, last price]
+        for product_id, price, scraped_at in rows:
+            seen = _epoch(scraped_at)
+            entry = observed.get(product_id)
+            if entry is None:
+                observed[product_id] = [0, seen, seen, price]
+            else:
+                entry[0] += price != entry[3]
+                entry[2], entry[3] = seen, price
+
+        stats = {}
+        for product_id, (changes, first, last, _) in observed.items():
+            last = max(last, checked.get(product_id, 0))
+            stats[product_id] = ChangeStats(changes, last - first, last)
+        return stats
+
+    def change_rates(self, products: List, stats: Dict[object, ChangeStats]) -> Dict[object, float]:
+        """Price changes per second for each product, pooled with its category's and the overall rate."""
+        prior = current_app.config['RECRAWL_PRIOR_DAYS'] * 86400
+        default_rate = current_app.config['RECRAWL_DEFAULT_RATE']
+
+        totals = defaultdict(lambda: [0, 0.0])
+        for product in products:
+            observed = stats.get(product.product_id)
+            if observed is not None:
+                for key in (product.category, None):
+                    totals[key][0] += observed.changes
+                    totals[key][1] += observed.exposure
+
+        def pooled(changes, exposure, rate):
+            # Gamma-Poisson estimate: the prior counts as ``prior`` seconds observed at ``rate``
+            return (changes + prior * rate) / (exposure + prior)
+
+        overall = pooled(*totals[None], default_rate)
+        categories = {key: pooled(changes, exposure, overall)
+                      for key, (changes, exposure) in totals.items() if key is not None}
+        rates = {}
+        for product in products:
+            category_rate = categories.get(product.category, overall)
+            observed = stats.get(product.product_id)
+            rates[product.product_id] = (pooled(observed.changes, observed.exposure, category_rate)
+                                         if observed else category_rate)
+        return rates
+
+    def plan(self, now: Optional[datetime] = None) -> List[RecrawlCandidate]:
+        """The products to re-scrape this round, most likely changed first."""
+        now = now or datetime.utcnow()
+        budget = self._setting(self.budget, 'RECRAWL_BUDGET')
+        min_age = self._setting(self.min_age, 'RECRAWL_MIN_AGE')
+        max_age = self._setting(self.max_age, 'RECRAWL_MAX_AGE')
+        # As many pages as the scraping service lets one retailer's bulk request scrape in time
+        per_retailer = int(current_app.config['RECRAWL_BULK_TIMEOUT'] * current_app.config['RECRAWL_SCRAPE_RPM']
+                           / 60)
+
+        products = db.session.query(Product.product_id, Product.category, Product.product_url,
+                                    Retailer.name.label('retailer'))\
+            .join(Retailer, Product.retailer_id == Retailer.retailer_id).all()
+        checked = self.last_checked()
+        stats = self.change_stats(now, checked)
+        rates = self.change_rates(products, stats)
+
+        candidates = []
+        for product in products:
+            observed = stats.get(product.product_id)
+            last_seen = observed.last_seen if observed else checked.get(product.product_id)
+            age = _epoch(now) - last_seen if last_seen is not None else math.inf
+            if age < min_age:
+                continue
+            rate = rates[product.product_id]
+            probability = 1.0 if age >= max_age else 1 - math.exp(-rate * age)
+            candidates.append(RecrawlCandidate(product.product_id, product.retailer, product.product_url,
+                                               rate, probability))
+        candidates.sort(key=lambda candidate: candidate.probability, reverse=True)
+        chosen, shares = [], defaultdict(int)
+        for candidate in candidates:
+            if len(chosen) >= budget:
+                break
+            if shares[candidate.retailer] < per_retailer:
+                shares[candidate.retailer] += 1
+                chosen.append(candidate)
+        return chosen
+
+    def recrawl(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Scrape this round's products and record the prices that changed."""
+        now = now or datetime.utcnow()
+        by_retailer = defaultdict(list)
+        for candidate in self.plan(now):
+            by_retailer[candidate.retailer].append(candidate)
+
+        summary = {'requested': 0, 'scraped': 0, 'changed': 0, 'failed': 0}
+        for retailer_name, candidates in by_retailer.items():
+            by_url = {urldefrag(candidate.url)[0]: candidate for candidate in candidates}
+            summary['requested'] += len(candidates)
+            try:
+                response = self.http.post(
+                    f"{current_app.config['SCRAPER_SERVICE_URL']}/scrape/bulk",
+                    json={'urls': list(by_url), 'store': retailer_name},
+                    timeout=current_app.config['RECRAWL_BULK_TIMEOUT'] + 60,  # The service answers by its own timeout
+                )
+                response.raise_for_status()
+            except requests.RequestException as e:
+                current_app.logger.error(f"Recrawl failed for {retailer_name}: {str(e)}")
+                summary['failed'] += len(candidates)
+                continue
+
+            for result in response.json()['results']:
+                candidate = by_url.get(result['url'])
+                if candidate is None:
+                    continue
+                if result['status'] == 'not_found':
+                    self._mark_checked(candidate.product_id, now)  # Gone; it waits max_age before the next try
+                    continue
+                scraped = result.get('product') or {}
+                if result['status'] != 'ok' or scraped.get('price') is None:
+                    summary['failed'] += 1
+                    continue
+                summary['scraped'] += 1
+                summary['changed'] += self._record_price(candidate, scraped, now)
+            db.session.commit()
+        current_app.logger.info(f"Recrawl round: {summary}")
+        return summary
+
+    def _record_price(self, candidate: RecrawlCandidate, scraped: dict, now: datetime) -> bool:
+        self._mark_checked(candidate.product_id, now)
+        product = db.session.get(Product, candidate.product_id)
+        if product is None or float(product.current_price) == float(scraped['price']):
+            return False
+        product.current_price = scraped['price']
+        PriceService.add_price_history(product.product_id, scraped)
+        return True
+
+    def start_scheduler(self, app):
+        def recrawl_job():
+            with app.app_context():
+                self.recrawl()
+
+        self.scheduler.add_job(
+            func=recrawl_job,
+            trigger='interval',
+            seconds=app.config['RECRAWL_INTERVAL']
+        )
+        self.scheduler.start()
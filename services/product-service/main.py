@@ -5,6 +5,7 @@ from app import create_app
 from app.extensions import db
 from app.config import Config
 from app.services.data_processing import PriceService
+from app.services.recrawl_scheduler import RecrawlScheduler
 
 
 def initialize_database(app):
@@ -13,6 +14,8 @@ def initialize_database(app):
         retries = 5
         while retries > 0:
             try:
+                # Creates only the tables missing, so a database set up by an older init.sql
+                # gains the newer ones, such as price_checks
                 db.create_all()
                 # from app.database.db_setup import initialize_retailers
                 # initialize_retailers(db)
@@ -34,6 +37,8 @@ if __name__ == '__main__':
     # Start services
     price_service = PriceService(db)
     price_service.start_scheduler(app)
+    recrawl_scheduler = RecrawlScheduler(db)
+    recrawl_scheduler.start_scheduler(app)
     
     app.run(
         host=os.getenv('HOST', '0.0.0.0'),
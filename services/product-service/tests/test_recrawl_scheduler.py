@@ -0,0 +1,120 @@
+# tests/test_recrawl_scheduler.py
+import pytest
+from unittest.mock import patch
+from datetime import datetime, timedelta
+from app.config import Config
+from sqlalchemy import inspect
+from app.models import Product, Retailer, PriceCheck, PriceHistory
+from app.extensions import db
+from app.services.data_processing import PriceService
+from app.services.recrawl_scheduler import RecrawlScheduler
+from main import initialize_database
+
+NOW = datetime.utcnow()
+
+
+@pytest.fixture
+def recrawl_config(app):
+    app.config.update({name: getattr(Config, name) for name in dir(Config) if name.startswith('RECRAWL_')})
+    app.config['SCRAPER_SERVICE_URL'] = 'http://scraping-service:5001'
+    return app.config
+
+
+def _product(retailer, name, category, prices):
+    """A product seen once a day for the last ``len(prices)`` days, at these prices."""
+    product = Product(name=name, current_price=prices[-1], product_url=f'http://test.com/{name}',
+                      category=category, retailer=retailer)
+    db.session.add(product)
+    db.session.commit()
+    for days_ago, price in zip(range(len(prices), 0, -1), prices):
+        seen = NOW - timedelta(days=days_ago)
+        db.session.add(PriceHistory(product_id=product.product_id, price=price, valid_from=seen, scraped_at=seen))
+    db.session.commit()
+    return product
+
+
+@pytest.fixture
+def products(recrawl_config):
+    retailer = Retailer(name='aldi', base_url='http://test.com')
+    db.session.add(retailer)
+    return {
+        'volatile': _product(retailer, 'strawberries', 'fruit', [2.00, 2.50, 2.00, 2.50, 2.00, 2.50, 2.00, 2.50]),
+        'stable': _product(retailer, 'milk', 'dairy', [1.10] * 8),
+        'new_fruit': _product(retailer, 'blueberries', 'fruit', [3.00]),
+        'new_dairy': _product(retailer, 'butter', 'dairy', [2.20]),
+    }
+
+
+def test_budget_goes_to_the_products_most_likely_to_have_changed(products):
+    scheduler = RecrawlScheduler(db, budget=3, min_age=0)
+
+    plan = scheduler.plan(NOW)
+
+    assert [c.product_id for c in plan] == [products[name].product_id
+                                            for name in ('volatile', 'new_fruit', 'new_dairy')]
+    rates = {c.product_id: c.rate for c in RecrawlScheduler(db, budget=10, min_age=0).plan(NOW)}
+    assert rates[products['volatile'].product_id] > rates[products['stable'].product_id]
+    # Products without history of their own take their category's rate
+    assert rates[products['new_fruit'].product_id] > rates[products['new_dairy'].product_id]
+
+
+def test_stale_products_are_always_recrawled_and_fresh_ones_never(products):
+    scheduler = RecrawlScheduler(db, budget=10, min_age=2 * 86400, max_age=5 * 86400)
+
+    assert scheduler.plan(NOW) == []  # Every product was seen a day ago
+    plan = {c.product_id: c.probability for c in scheduler.plan(NOW + timedelta(days=5))}
+    assert plan[products['stable'].product_id] == 1.0
+
+
+def test_recrawl_scrapes_in_bulk_and_records_changed_prices(products):
+    scheduler = RecrawlScheduler(db, budget=2, min_age=3600)
+    volatile, new_fruit = products['volatile'], products['new_fruit']
+    bulk_response = {'results': [
+        {'url': volatile.product_url, 'status': 'ok', 'product': {'url': volatile.product_url, 'price': 2.00}},
+        {'url': new_fruit.product_url, 'status': 'ok', 'product': {'url': new_fruit.product_url, 'price': 3.00}},
+    ]}
+
+    with patch('requests.Session.post') as mock_post:
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.json.return_value = bulk_response
+        summary = scheduler.recrawl(NOW)
+
+    mock_post.assert_called_once_with(
+        'http://scraping-service:5001/scrape/bulk',
+        json={'urls': [volatile.product_url, new_fruit.product_url], 'store': 'aldi'},
+        timeout=Config.RECRAWL_BULK_TIMEOUT + 60,
+    )
+    assert summary == {'requested': 2, 'scraped': 2, 'changed': 1, 'failed': 0}
+    assert float(db.session.get(Product, volatile.product_id).current_price) == 2.00
+    assert volatile.price_history.count() == 9 and new_fruit.price_history.count() == 1
+    # Both were just checked, so the next round moves on to the others, even after a restart
+    assert {c.product_id for c in RecrawlScheduler(db, budget=2, min_age=3600).plan(NOW)} == {
+        products['stable'].product_id, products['new_dairy'].product_id}
+
+
+def test_one_retailer_gets_no_more_than_one_bulk_request_can_scrape(products, recrawl_config):
+    recrawl_config.update({'RECRAWL_SCRAPE_RPM': 20, 'RECRAWL_BULK_TIMEOUT': 9})  # 3 pages per request
+    tesco = Retailer(name='tesco', base_url='http://tesco.com')
+    db.session.add(tesco)
+    tesco_product = _product(tesco, 'cream', 'dairy', [1.50])
+
+    plan = RecrawlScheduler(db, budget=4, min_age=0).plan(NOW)
+
+    assert len(plan) == 4 and sum(c.retailer == 'aldi' for c in plan) == 3
+    assert tesco_product.product_id in {c.product_id for c in plan}
+
+
+def test_synced_price_changes_are_recorded(app, sample_product_data):
+    product = PriceService.process_scraped_product(sample_product_data, 'aldi')
+    PriceService.process_scraped_product(sample_product_data, 'aldi')
+    PriceService.process_scraped_product({**sample_product_data, 'price': 2.49}, 'aldi')
+
+    assert [float(h.price) for h in product.price_history.order_by(PriceHistory.valid_from)] == [1.99, 2.49]
+
+
+def test_startup_adds_price_checks_to_a_database_that_predates_it(app):
+    PriceCheck.__table__.drop(db.engine)
+
+    initialize_database(app)
+
+    assert 'price_checks' in inspect(db.engine).get_table_names()
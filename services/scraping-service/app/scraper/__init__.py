@@ -6,6 +6,7 @@ from ..scraper.controller.iceland import IcelandScraper
 from ..scraper.controller.sainsbury import SainsburyScraper
 from ..scraper.controller.morrison import MorrisonScraper
 from .utils import RateLimiter, UserAgentRotator
+from .driver_pool import DriverPool, get_driver_pool
 
 __all__ = [
     'BaseScraper',
@@ -16,5 +17,7 @@ __all__ = [
     'TescoScraper',
     'AldiScraper',
     'RateLimiter',
-    'UserAgentRotator'
+    'UserAgentRotator',
+    'DriverPool',
+    'get_driver_pool'
 ]
\ No newline at end of file
@@ -1,20 +1,44 @@
+import asyncio
 import random
 import requests
 from bs4 import BeautifulSoup
 from abc import ABC, abstractmethod
 from typing import Dict, List, Any, Optional
 from datetime import datetime
-from .utils import RateLimiter, UserAgentRotator, logger
+from urllib.parse import urlparse
+from .utils import RateLimiter, UserAgentRotator, get_rate_limiter, logger
+from .fetcher import fetcher
+from .parsing import parse_html
+from .throttle import SoftBanError, get_throttle, looks_blocked
+import httpx
 import time
 
+
+class PageFetchError(Exception):
+    """Raised when a page cannot be fetched; ``status_code`` is set for HTTP errors."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class IncompleteScrape(Exception):
+    """Raised at the end of a listing scrape whose products were yielded but some of its pages could not be read."""
+
+
 class BaseScraper(ABC):
     """Abstract base class for scrapers."""
+
+    # SoupStrainer limiting parsing to the elements a scraper reads, see parsing.parse_html
+    strainer = None
+    # Text a good page always contains; a page without it is treated as a soft ban
+    content_marker = "product"
     
     def __init__(self,  proxies=None, 
         rate_limiter: Optional[RateLimiter] = None, 
         user_agent_rotator: Optional[UserAgentRotator] = None):
 
-        self.rate_limiter = rate_limiter or RateLimiter()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
         self.user_agent_rotator = user_agent_rotator or UserAgentRotator()
         self.session = requests.Session()
         self.base_url = "https://www.tesco.com"
@@ -38,8 +62,8 @@ class BaseScraper(ABC):
             
         }
     
-    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
-        """More robust page fetching with retries and better headers"""
+    def get_page_headers(self) -> Dict[str, str]:
+        """Get browser-like navigation headers for fetching a listing page."""
         headers = self.get_headers()
         headers.update({
             'Accept-Encoding': 'gzip, deflate, br',
@@ -49,14 +73,33 @@ class BaseScraper(ABC):
             'Sec-Fetch-Mode': 'navigate',
             'Sec-Fetch-Site': 'same-origin',
         })
+        return headers
 
-        for attempt in range(3):  # Retry up to 3 times
+    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
+        """More robust page fetching with retries and better headers"""
+        try:
+            html = self.fetch_html(url)
+        except PageFetchError:
+            return None
+        return parse_html(html, self.strainer)
+
+    def fetch_html(self, url: str, probe: bool = False) -> str:
+        """Fetch a page's HTML, retrying soft bans and transient errors.
+
+        Raises PageFetchError once the last attempt fails; a 404 or 410 is
+        not retried. A ``probe`` makes a single attempt and leaves the host's
+        throttle alone, for fetches expected to fail now and then, like auto
+        mode trying HTTP before the browser.
+        """
+        headers = self.get_page_headers()
+        throttle = get_throttle(url)
+        attempts = 1 if probe else 3
+        error = None
+
+        for attempt in range(attempts):  # Retry up to 3 times
             try:
-                self.rate_limiter.wait()
-                
-                # Add random delay between 1-3 seconds
-                time.sleep(random.uniform(1, 3))
-                
+                self.rate_limiter.wait(urlparse(url).netloc, requests_per_minute=throttle.rate)
+
                 response = self.session.get(
                     url,
                     headers=headers,
@@ -67,24 +110,119 @@ class BaseScraper(ABC):
                 
                 # Check for soft bans (403, 429)
                 if response.status_code in [403, 429]:
-                    logger.warning(f"Blocked detected, waiting longer...")
-                    time.sleep(random.uniform(10, 20))
+                    error = PageFetchError(f"HTTP {response.status_code}", response.status_code)
+                    if probe:
+                        break
+                    backoff = throttle.record_ban(f"HTTP {response.status_code}")
+                    logger.warning(f"Blocked detected, backing off {backoff:.1f}s...")
+                    time.sleep(backoff)
                     continue
-                    
+
+                # Gone for good, retrying will not help
+                if response.status_code in [404, 410]:
+                    raise PageFetchError(f"HTTP {response.status_code}", response.status_code)
+
                 response.raise_for_status()
                 
+                if looks_blocked(response.text):
+                    raise SoftBanError("Captcha or block page served")
+
                 # Verify we got actual product content
-                if "product" not in response.text.lower():
-                    raise ValueError("Page doesn't contain product data")
+                if self.content_marker and self.content_marker not in response.text.lower():
+                    raise SoftBanError("Page doesn't contain product data")
+
+                if not probe:
+                    throttle.record_success()
                     
-                return BeautifulSoup(response.text, 'lxml')
+                return response.text
                 
+            except PageFetchError:
+                raise
+            except Exception as e:
+                if isinstance(e, SoftBanError) and not probe:
+                    throttle.record_ban(str(e))
+                error = e
+                logger.warning(f"Attempt {attempt+1} failed: {str(e)}")
+                if attempt < attempts - 1:
+                    time.sleep(random.uniform(5, 10))
+
+        logger.error(f"Failed to fetch {url} after {attempt+1} attempts")
+        if isinstance(error, PageFetchError):
+            raise error
+        status_code = error.response.status_code if isinstance(error, requests.HTTPError) else None
+        raise PageFetchError(str(error), status_code) from error
+
+    async def fetch_html_async(self, url: str) -> str:
+        """Fetch a page's HTML on the shared async client without blocking the event loop.
+
+        Same retry, soft-ban and content checks as fetch_html, with every wait
+        done through asyncio.sleep. Raises PageFetchError once the last
+        attempt fails; a 404 or 410 is not retried.
+        """
+        headers = self.get_page_headers()
+        throttle = get_throttle(url)
+        client = fetcher.client(self.current_proxy)
+        error = None
+
+        for attempt in range(3):  # Retry up to 3 times
+            try:
+                await self.rate_limiter.acquire(urlparse(url).netloc, requests_per_minute=throttle.rate)
+
+                async with fetcher.host_slot(url):
+                    response = await client.get(url, headers=headers)
+
+                # Check for soft bans (403, 429)
+                if response.status_code in [403, 429]:
+                    error = PageFetchError(f"HTTP {response.status_code}", response.status_code)
+                    backoff = throttle.record_ban(f"HTTP {response.status_code}")
+                    logger.warning(f"Blocked detected, backing off {backoff:.1f}s...")
+                    await asyncio.sleep(backoff)
+                    continue
+
+                # Gone for good, retrying will not help
+                if response.status_code in [404, 410]:
+                    raise PageFetchError(f"HTTP {response.status_code}", response.status_code)
+
+                response.raise_for_status()
+
+                if looks_blocked(response.text):
+                    raise SoftBanError("Captcha or block page served")
+
+                # Verify we got actual product content
+                if self.content_marker and self.content_marker not in response.text.lower():
+                    raise SoftBanError("Page doesn't contain product data")
+
+                throttle.record_success()
+
+                return response.text
+
+            except PageFetchError:
+                raise
             except Exception as e:
+                if isinstance(e, SoftBanError):
+                    throttle.record_ban(str(e))
+                error = e
                 logger.warning(f"Attempt {attempt+1} failed: {str(e)}")
-                if attempt == 2:  # Last attempt
-                    logger.error(f"Failed to fetch {url} after 3 attempts")
-                    return None
-                time.sleep(random.uniform(5, 10))
+                if attempt < 2:
+                    await asyncio.sleep(random.uniform(5, 10))
+
+        logger.error(f"Failed to fetch {url} after 3 attempts")
+        if isinstance(error, PageFetchError):
+            raise error
+        status_code = error.response.status_code if isinstance(error, httpx.HTTPStatusError) else None
+        raise PageFetchError(str(error), status_code) from error
+
+    async def fetch_page_async(self, url: str) -> Optional[BeautifulSoup]:
+        """Fetch and parse a page without blocking the event loop; None when it cannot be fetched."""
+        try:
+            html = await self.fetch_html_async(url)
+        except PageFetchError:
+            return None
+        return parse_html(html, self.strainer)
+
+    async def fetch_many(self, urls: List[str]) -> List[Optional[BeautifulSoup]]:
+        """Fetch several pages concurrently; results are in the same order as ``urls``."""
+        return await asyncio.gather(*(self.fetch_page_async(url) for url in urls))
     # @abstractmethod
     # def scrape_product(self, url: str) -> Dict[str, Any]:
     #     """Scrape product details from a specific URL."""
@@ -0,0 +1,158 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+from .config import Config
+from .utils import logger
+
+# Circuit states
+CIRCUIT_CLOSED = "closed"  # Scrapes run and their outcomes are counted
+CIRCUIT_OPEN = "open"  # Scrapes are refused until the next probe is due
+CIRCUIT_HALF_OPEN = "half_open"  # A few probe scrapes decide whether to close or open again
+
+
+class CircuitOpen(Exception):
+    """Raised instead of scraping a retailer whose circuit is open."""
+
+    def __init__(self, retailer: str, retry_after: int):
+        super().__init__(f"{retailer} is failing, scrapes are paused for {retry_after}s")
+        self.retailer = retailer
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Stops scraping a retailer that keeps failing, so it cannot tie up browsers and workers.
+
+    While closed, the outcome of every scrape is kept for ``window``
+    seconds; once at least ``min_calls`` of them are in the window and
+    ``failure_rate`` of them failed, the circuit opens. Open, every scrape
+    is refused with CircuitOpen until ``open_for`` has passed, after which
+    it is half-open and lets ``probes`` scrapes through at a time. A probe
+    that succeeds closes the circuit; one that fails opens it again for
+    twice as long, up to ``max_open_for``.
+    """
+
+    def __init__(self, name: str, window: float = Config.BREAKER_WINDOW,
+                 min_calls: int = Config.BREAKER_MIN_CALLS,
+                 failure_rate: float = Config.BREAKER_FAILURE_RATE,
+                 open_for: float = Config.BREAKER_OPEN_SECONDS,
+                 max_open_for: float = Config.BREAKER_MAX_OPEN_SECONDS,
+                 probes: int = Config.BREAKER_PROBES):
+        self.name = name
+        self.window = window
+        self.min_calls = max(1, min_calls)
+        self.failure_rate = failure_rate
+        self.open_for = open_for
+        self.max_open_for = max_open_for
+        self.probes = max(1, probes)
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (finished at, succeeded)
+        self._state = CIRCUIT_CLOSED
+        self._opened_at = 0.0
+        self._backoff = open_for
+        self._probing = 0
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == CIRCUIT_OPEN and now - self._opened_at >= self._backoff:
+            self._state = CIRCUIT_HALF_OPEN
+        return self._state
+
+    def _retry_after(self, now: float) -> int:
+        if self._state == CIRCUIT_OPEN:
+            return max(1, math.ceil(self._opened_at + self._backoff - now))
+        return max(1, math.ceil(self._backoff))  # Half-open: until the probes in flight have decided
+
+    def check(self):
+        """Raise CircuitOpen if a scrape would be refused now, without claiming a probe."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == CIRCUIT_OPEN or (state == CIRCUIT_HALF_OPEN and self._probing >= self.probes):
+                self.rejected += 1
+                raise CircuitOpen(self.name, self._retry_after(now))
+
+    def acquire(self) -> bool:
+        """Admit a scrape, returning whether it is a probe; raises CircuitOpen when it is refused."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == CIRCUIT_CLOSED:
+                return False
+            if state == CIRCUIT_HALF_OPEN and self._probing < self.probes:
+                self._probing += 1
+                return True
+            self.rejected += 1
+            raise CircuitOpen(self.name, self._retry_after(now))
+
+    def record(self, succeeded: Optional[bool], probe: bool = False):
+        """Count an admitted scrape's outcome; None for one that ended through no fault of the retailer."""
+        with self._lock:
+            now = time.monotonic()
+            if probe:
+                self._probing -= 1
+            if succeeded is None:
+                return
+            if probe:
+                if succeeded:
+                    logger.info(f"{self.name} circuit closed after a successful probe")
+                    self._state, self._backoff = CIRCUIT_CLOSED, self.open_for
+                    self._outcomes.clear()
+                else:
+                    self._open(now, min(self._backoff * 2, self.max_open_for))
+                return
+            if self._state != CIRCUIT_CLOSED:
+                return  # Admitted before the circuit opened; the probes decide now
+            self._outcomes.append((now, succeeded))
+            while self._outcomes and self._outcomes[0][0] < now - self.window:
+                self._outcomes.popleft()
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._open(now, self.open_for)
+
+    def _open(self, now: float, backoff: float):
+        logger.warning(f"{self.name} circuit opened for {backoff:.0f}s")
+        self._state, self._opened_at, self._backoff = CIRCUIT_OPEN, now, backoff
+        self._outcomes.clear()
+        self.opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                "state": state,
+                "calls": len(self._outcomes),
+                "failures": failures,
+                "retry_after": self._retry_after(now) if state != CIRCUIT_CLOSED else None,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(store_name: str) -> CircuitBreaker:
+    """Return the shared circuit breaker for a retailer, creating it on first use."""
+    store_key = store_name.lower().replace(" ", "")
+    with _breakers_lock:
+        breaker = _breakers.get(store_key)
+        if breaker is None:
+            breaker = _breakers[store_key] = CircuitBreaker(store_key)
+        return breaker
+
+
+def circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.stats() for name, breaker in breakers.items()}
@@ -0,0 +1,224 @@
+from typing import Callable, Dict, Generator, Iterator, List, Any, Optional
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from .base import PageFetchError
+from .breaker import CIRCUIT_OPEN, CircuitOpen, get_circuit_breaker
+from .factory import ScraperFactory
+from .driver_pool import DriverPoolExhausted, get_driver_pool
+from .executor import ScrapeCancelled
+from .fetch_backends import (
+    BACKEND_AUTO, BACKEND_BROWSER, BACKEND_HTTP, NO_BROWSER, BrowserRequired, HttpListingScraper,
+    browser_required, last_fetch_backend, record_fetch_backend, remember_browser_required
+)
+from .frontier import CatalogueCrawl
+from .readiness import wait_until_ready
+from .specs import SPECS, products_from_tiles
+from .throttle import get_throttle, record_browser_failure, wait_for_slot
+from .utils import logger
+
+
+class Listing(list):
+    """A browse scrape's products, with the fetch backend that read them."""
+
+    backend: Optional[str] = None
+
+
+def browse_groceries(store_name: str) -> Listing:
+    """Scrape a retailer's groceries listing with its configured fetch backend."""
+    listing = Listing()
+
+    def collect():
+        listing.backend = yield from iter_groceries(store_name)
+
+    listing.extend(collect())
+    return listing
+
+
+def iter_groceries(store_name: str) -> Generator[Dict[str, Any], None, str]:
+    """Yield a retailer's grocery products with its configured fetch backend, returning the backend used.
+
+    Over HTTP no browser is involved. In auto mode a listing that cannot be
+    read over HTTP falls back to the browser, which happens before any
+    product has been yielded; the retailer then goes straight to the browser
+    for FETCH_AUTO_RECHECK seconds. The retailer's circuit breaker is told
+    how the scrape went, and refuses it with CircuitOpen while open; a
+    scrape that ends with no products counts as failed.
+    """
+    store_key = store_name.lower().replace(" ", "")
+    breaker = get_circuit_breaker(store_key)
+    probe = breaker.acquire()
+    produced, succeeded = 0, None
+    try:
+        groceries = _iter_groceries(store_key)
+        while True:
+            try:
+                product = next(groceries)
+            except StopIteration as done:  # Carries the backend _iter_groceries used
+                backend = done.value
+                break
+            produced += 1
+            yield product
+        succeeded = produced > 0
+        return backend
+    except (ScrapeCancelled, DriverPoolExhausted):
+        raise  # Nothing to do with the retailer
+    except Exception:
+        succeeded = False
+        raise
+    finally:
+        if succeeded is None and produced:
+            succeeded = True  # Closed early by a reader that had enough
+        breaker.record(succeeded, probe)
+
+
+def _iter_groceries(store_key: str) -> Generator[Dict[str, Any], None, str]:
+    backend = ScraperFactory.get_fetch_backend(store_key)
+    fell_back = False
+    if backend == BACKEND_HTTP or (backend == BACKEND_AUTO and not browser_required(store_key)):
+        controller = ScraperFactory.get_scraper(store_key, driver=NO_BROWSER)
+        # Auto mode's HTTP attempt is a probe: one try, and a block page does not slow the host down
+        scraper = HttpListingScraper(controller, SPECS[store_key], store_key=store_key, probe=backend == BACKEND_AUTO)
+        try:
+            yield from scraper.iter_groceries()
+            record_fetch_backend(store_key, BACKEND_HTTP)
+            return BACKEND_HTTP
+        except BrowserRequired as e:
+            if backend == BACKEND_HTTP:
+                raise
+            logger.info(f"Falling back to the browser for {store_key}: {e}")
+            remember_browser_required(store_key)
+            fell_back = True
+
+    yield from _iter_browser_groceries(store_key)
+    record_fetch_backend(store_key, BACKEND_BROWSER, fell_back=fell_back)
+    return BACKEND_BROWSER
+
+
+def _iter_browser_groceries(store_key: str) -> Iterator[Dict[str, Any]]:
+    """Yield a retailer's grocery products while holding a pooled driver.
+
+    Scrapers that provide an ``iter_<store>_groceries`` generator stream
+    products as pages are parsed; the others yield their finished list.
+    """
+    pool = get_driver_pool(store_key)
+
+    with pool.driver() as lease:
+        kwargs = {"driver": lease.driver}
+        if getattr(ScraperFactory.get_scraper_class(store_key), "parallel_pagination", False):
+            kwargs["driver_pool"] = pool  # Lets the scraper borrow spare browsers for later pages
+        scraper = ScraperFactory.get_scraper(store_key, **kwargs)
+        try:
+            iterate = getattr(scraper, f"iter_{store_key}_groceries", None)
+            if iterate is not None:
+                yield from iterate()
+            else:
+                yield from getattr(scraper, f"{store_key}_groceries")()
+        finally:
+            lease.pages = scraper.pages_loaded
+            lease.broken = getattr(scraper, "driver_broken", False)
+
+
+def iter_catalogue(store_name: str, crawl: CatalogueCrawl) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the new products of each page of a retailer's catalogue crawl.
+
+    Pages are fetched over HTTP unless the retailer is browser-only, or is
+    on auto and its last listing scrape needed the browser. A resumed crawl
+    keeps the backend it started with, which this process may not know
+    after a restart. Either way pages are parsed with the retailer's
+    ExtractionSpec and tile builder. The retailer's circuit breaker admits
+    the crawl like a listing scrape and stops it with CircuitOpen if the
+    circuit opens part-way; a crawl that fetched pages but found no new
+    products counts as failed.
+    """
+    store_key = store_name.lower().replace(" ", "")
+    breaker = get_circuit_breaker(store_key)
+    probe = breaker.acquire()
+    pages, produced, succeeded = crawl.pages, 0, None
+    try:
+        for products in _iter_catalogue(store_key, crawl, breaker):
+            produced += len(products)
+            yield products
+        if crawl.pages > pages:
+            succeeded = produced > 0
+    except (ScrapeCancelled, DriverPoolExhausted, CircuitOpen):
+        raise  # Nothing this crawl learnt about the retailer
+    except Exception:
+        succeeded = False
+        raise
+    finally:
+        if succeeded is None and produced:
+            succeeded = True  # Closed early by a reader that had enough
+        breaker.record(succeeded, probe)
+
+
+def _iter_catalogue(store_key: str, crawl: CatalogueCrawl, breaker) -> Iterator[List[Dict[str, Any]]]:
+    spec = SPECS[store_key]
+    controller = ScraperFactory.get_scraper(store_key, driver=NO_BROWSER)
+
+    def build(tree) -> List[Dict[str, Any]]:
+        return products_from_tiles(spec.extract_tree(tree)["tiles"], controller._product_from_fields, spec.store)
+
+    if crawl.backend is None:
+        backend = ScraperFactory.get_fetch_backend(store_key)
+        if backend == BACKEND_AUTO:
+            needs_browser = browser_required(store_key) or last_fetch_backend(store_key) == BACKEND_BROWSER
+            backend = BACKEND_BROWSER if needs_browser else BACKEND_HTTP
+        crawl.backend = backend  # Checkpointed with the frontier
+
+    def guarded(fetch: Callable[[str], str]) -> Callable[[str], str]:
+        def fetch_page(url: str) -> str:
+            if breaker.state == CIRCUIT_OPEN:
+                breaker.check()  # Raises CircuitOpen, with how long to wait
+            return fetch(url)
+        return fetch_page
+
+    if crawl.backend == BACKEND_BROWSER:
+        pages = _BrowserPages(store_key)
+        try:
+            yield from crawl.iter_pages(guarded(pages.fetch), build)
+        finally:
+            pages.close()
+    else:
+        fetch = HttpListingScraper(controller, spec, store_key=store_key).fetch_html
+        yield from crawl.iter_pages(guarded(fetch), build)
+
+
+class _BrowserPages:
+    """Loads crawl pages in a pooled browser, handing it back every ``max_pages`` pages so the pool can recycle it."""
+
+    def __init__(self, store_key: str):
+        self.store_key = store_key
+        self.pool = get_driver_pool(store_key)
+        self.tile = SPECS[store_key].tile
+        self.timeout = ScraperFactory.get_scraper_class(store_key).timeout
+        self._driver = None
+        self._pages = 0
+
+    def fetch(self, url: str) -> str:
+        if self._driver is None:
+            self._driver, self._pages = self.pool.checkout(), 0
+        driver = self._driver
+        try:
+            wait_for_slot(url)
+            driver.get(url)
+            self._pages += 1
+            try:
+                wait_until_ready(driver, self.tile, self.timeout, store=self.store_key)
+            except TimeoutException:
+                pass  # Category hubs have no product tiles, only links
+            html = driver.page_source
+        except TimeoutException as e:
+            record_browser_failure(driver, url, e)
+            raise PageFetchError(f"Timed out loading {url}") from e
+        except WebDriverException as e:
+            record_browser_failure(driver, url, e)
+            self.close(discard=True)
+            raise
+        get_throttle(url).record_success()
+        if self.pool.max_pages and self._pages >= self.pool.max_pages:
+            self.close()
+        return html
+
+    def close(self, discard: bool = False):
+        driver, self._driver = self._driver, None
+        if driver is not None:
+            self.pool.checkin(driver, pages=max(1, self._pages), discard=discard)
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Tuple
+from .config import Config
+
+# Kinds of entry in a retailer's change feed
+CHANGE_ADDED = "added"
+CHANGE_CHANGED = "changed"
+CHANGE_REMOVED = "removed"
+
+# Fields whose change puts a product in the feed: its price, offer and rating
+TRACKED_FIELDS = ("price", "discount_price", "unit_price", "badges", "rating")
+
+
+class CursorExpired(Exception):
+    """The cursor predates the retained change log; the consumer must resync from scratch."""
+
+
+def product_key(product: Dict[str, Any]) -> Optional[str]:
+    """Identify a product within its retailer, by external id or failing that its URL."""
+    key = product.get("external_id") or product.get("url")
+    return str(key) if key else None
+
+
+def content_hash(product: Dict[str, Any]) -> str:
+    tracked = {field: product.get(field) for field in TRACKED_FIELDS}
+    return hashlib.sha1(json.dumps(tracked, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ChangeLog:
+    """Per-retailer product hashes and the feed of changes between scrapes.
+
+    Each scrape is diffed against the hashes of the previous one, and only
+    products that were added, removed or changed in a tracked field get a
+    feed entry. Scrapes can miss products, e.g. when a listing page fails,
+    so a product is only logged as removed once it has been missing from
+    ``remove_after`` scrapes in a row. Entries are numbered by one global
+    sequence, which is also the cursor handed to consumers.
+    """
+
+    def __init__(self, path: str = Config.CHANGES_DB, retention: float = Config.CHANGES_RETENTION,
+                 remove_after: int = Config.CHANGES_REMOVE_AFTER):
+        self.path = path
+        self.retention = retention
+        self.remove_after = max(1, remove_after)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS product_state ("
+                "retailer TEXT NOT NULL, product_key TEXT NOT NULL, hash TEXT NOT NULL, "
+                "product TEXT NOT NULL, missed INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (retailer, product_key))"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(product_state)")}
+            if "missed" not in columns:  # Logs created before removals waited for repeated misses
+                conn.execute("ALTER TABLE product_state ADD COLUMN missed INTEGER NOT NULL DEFAULT 0")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS product_changes ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, retailer TEXT NOT NULL, "
+                "product_key TEXT NOT NULL, change TEXT NOT NULL, product TEXT NOT NULL, "
+                "changed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS product_changes_retailer ON product_changes (retailer, seq)"
+            )
+            # Highest sequence number pruned per retailer, below which cursors have expired
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS change_horizon (retailer TEXT PRIMARY KEY, seq INTEGER NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def record(self, retailer: str, products: List[Dict[str, Any]]) -> int:
+        """Diff a scrape against the last one, returning the number of changes logged."""
+        current = {}
+        for product in products:
+            key = product_key(product)
+            if key is not None:
+                current[key] = product
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            previous = {key: (digest, missed) for key, digest, missed in conn.execute(
+                "SELECT product_key, hash, missed FROM product_state WHERE retailer = ?", (retailer,)
+            )}
+            changes, state, seen_again = [], [], []
+            for key, product in current.items():
+                digest = content_hash(product)
+                if key in previous and previous[key][0] == digest:
+                    if previous[key][1]:
+                        seen_again.append((retailer, key))
+                    continue
+                change = CHANGE_CHANGED if key in previous else CHANGE_ADDED
+                changes.append((retailer, key, change, json.dumps(product), now))
+                state.append((retailer, key, digest, json.dumps(product)))
+            missing = [key for key, (_, missed) in previous.items()
+                       if key not in current and missed + 1 < self.remove_after]
+            removed = [key for key, (_, missed) in previous.items()
+                       if key not in current and missed + 1 >= self.remove_after]
+            for key in removed:
+                last_seen = conn.execute(
+                    "SELECT product FROM product_state WHERE retailer = ? AND product_key = ?", (retailer, key)
+                ).fetchone()[0]
+                changes.append((retailer, key, CHANGE_REMOVED, last_seen, now))
+
+            conn.executemany(
+                "INSERT INTO product_changes (retailer, product_key, change, product, changed_at) "
+                "VALUES (?, ?, ?, ?, ?)", changes
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO product_state (retailer, product_key, hash, product) VALUES (?, ?, ?, ?)",
+                state
+            )
+            conn.executemany(
+                "UPDATE product_state SET missed = 0 WHERE retailer = ? AND product_key = ?", seen_again
+            )
+            conn.executemany(
+                "UPDATE product_state SET missed = missed + 1 WHERE retailer = ? AND product_key = ?",
+                [(retailer, key) for key in missing]
+            )
+            conn.executemany(
+                "DELETE FROM product_state WHERE retailer = ? AND product_key = ?",
+                [(retailer, key) for key in removed]
+            )
+            self._prune(conn, retailer, now - self.retention)
+        return len(changes)
+
+    @staticmethod
+    def _prune(conn, retailer: str, before: float):
+        row = conn.execute(
+            "SELECT MAX(seq) FROM product_changes WHERE retailer = ? AND changed_at < ?", (retailer, before)
+        ).fetchone()
+        if row[0] is None:
+            return
+        conn.execute("DELETE FROM product_changes WHERE retailer = ? AND seq <= ?", (retailer, row[0]))
+        conn.execute("INSERT OR REPLACE INTO change_horizon (retailer, seq) VALUES (?, ?)", (retailer, row[0]))
+
+    def changes(self, retailer: str, since: Optional[int] = None, limit: int = Config.CHANGES_PAGE_SIZE,
+                after: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """Return ``(changes, cursor, more)`` for a retailer.
+
+        Without ``since`` the current products are returned as added, in key
+        order, giving a consumer its starting state; ``after`` is the last
+        key of the previous page of it. ``cursor`` is passed back as
+        ``since`` to read on from there, and ``more`` says whether a further
+        page is already waiting. Raises CursorExpired when entries after
+        ``since`` have been pruned.
+        """
+        with closing(self._connect()) as conn, conn:
+            # One read transaction, so the cursor and the rows read with it come from the same state
+            conn.execute("BEGIN")
+            latest = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM product_changes").fetchone()[0]
+            horizon = conn.execute(
+                "SELECT seq FROM change_horizon WHERE retailer = ?", (retailer,)
+            ).fetchone()
+            if since is None:
+                rows = conn.execute(
+                    "SELECT product_key, product FROM product_state WHERE retailer = ? AND product_key > ? "
+                    "ORDER BY product_key LIMIT ?", (retailer, after or "", limit + 1)
+                ).fetchall()
+                return [
+                    {"change": CHANGE_ADDED, "key": key, "product": json.loads(product)} for key, product in rows[:limit]
+                ], latest, len(rows) > limit
+            if horizon is not None and since < horizon[0]:
+                raise CursorExpired(f"Changes for {retailer} before {horizon[0]} are no longer kept")
+            rows = conn.execute(
+                "SELECT seq, product_key, change, product, changed_at FROM product_changes "
+                "WHERE retailer = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (retailer, since, limit + 1)
+            ).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        changes = [
+            {"change": change, "key": key, "product": json.loads(product), "changed_at": changed_at}
+            for _, key, change, product, changed_at in rows
+        ]
+        # A full page ends at its last entry; otherwise the consumer is caught up to the latest sequence
+        cursor = rows[-1][0] if more else max([latest, since] + [row[0] for row in rows[-1:]])
+        return changes, cursor, more
+
@@ -0,0 +1,215 @@
+import os
+
+
+def _parse_host_limits(value):
+    """Parse "host=rpm,host=rpm" into a dict of per-host request rates."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        host, _, rpm = item.partition('=')
+        limits[host.strip()] = float(rpm)
+    return limits
+
+
+def _parse_list(value):
+    """Parse "a,b,c" into a list, dropping blanks."""
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def _allowed_domains(retailer, base_url, domain):
+    """Hosts a retailer's browser may load from, overridable by <RETAILER>_RESOURCE_ALLOW_DOMAINS.
+
+    The host of the configured base URL is always allowed, so a retailer
+    pointed at mock_retailer keeps loading its pages.
+    """
+    domains = _parse_list(os.getenv(f'{retailer.upper()}_RESOURCE_ALLOW_DOMAINS', domain))
+    host = base_url.split('://', 1)[-1].split('/', 1)[0].split(':', 1)[0]
+    if not any(host == d or host.endswith('.' + d) for d in domains):
+        domains.append(host)
+    return domains
+
+
+def _retailer_urls(retailer, base_url, groceries_path):
+    """Return (base_url, groceries_url), overridable by <RETAILER>_BASE_URL and <RETAILER>_GROCERIES_URL."""
+    base_url = os.getenv(f'{retailer.upper()}_BASE_URL', base_url).rstrip('/')
+    return base_url, os.getenv(f'{retailer.upper()}_GROCERIES_URL', base_url + groceries_path)
+
+
+#Centralize all scraping service settings
+class Config:
+    """config file"""
+    # Retailers served by the scraping service
+    RETAILERS = ['tesco', 'aldi', 'iceland', 'sainsbury', 'morrison']
+
+    # Retailer sites; point these at mock_retailer to load-test the pipeline locally
+    RETAILER_URLS = {
+        'tesco': _retailer_urls('tesco', 'https://www.tesco.com', '/groceries/en-GB/shop/fresh-food/all'),
+        'aldi': _retailer_urls('aldi', 'https://groceries.aldi.co.uk', '/en-GB/fresh-food'),
+        'iceland': _retailer_urls('iceland', 'https://www.iceland.co.uk', '/fresh'),
+        'sainsbury': _retailer_urls('sainsbury', 'https://www.sainsburys.co.uk',
+                                    '/shop/gb/groceries/new---trending/aldi-price-match'),
+        'morrison': _retailer_urls('morrison', 'https://groceries.morrisons.com', '/categories'),
+    }
+
+    # WebDriver pooling
+    DRIVER_POOL_SIZE = int(os.getenv('DRIVER_POOL_SIZE', 1))
+    DRIVER_POOL_SIZES = {
+        'tesco': int(os.getenv('TESCO_DRIVER_POOL_SIZE', DRIVER_POOL_SIZE)),
+        'aldi': int(os.getenv('ALDI_DRIVER_POOL_SIZE', DRIVER_POOL_SIZE)),
+        'iceland': int(os.getenv('ICELAND_DRIVER_POOL_SIZE', DRIVER_POOL_SIZE)),
+        'sainsbury': int(os.getenv('SAINSBURY_DRIVER_POOL_SIZE', DRIVER_POOL_SIZE)),
+        'morrison': int(os.getenv('MORRISON_DRIVER_POOL_SIZE', DRIVER_POOL_SIZE)),
+    }
+    DRIVER_POOL_PREWARM = os.getenv('DRIVER_POOL_PREWARM', 'true').lower() == 'true'
+    DRIVER_CHECKOUT_TIMEOUT = float(os.getenv('DRIVER_CHECKOUT_TIMEOUT', 120))
+    # Retry-After of the 429 answered when every browser stayed busy: roughly one scrape's worth of waiting
+    DRIVER_POOL_RETRY_AFTER = int(os.getenv('DRIVER_POOL_RETRY_AFTER', 30))
+    DRIVER_MAX_PAGES = int(os.getenv('DRIVER_MAX_PAGES', 50))   # Recycle after N pages
+    DRIVER_MAX_RSS_MB = int(os.getenv('DRIVER_MAX_RSS_MB', 1500))  # Recycle above this browser RSS
+    DRIVER_HEADLESS = os.getenv('DRIVER_HEADLESS', 'true').lower() == 'true'
+
+    # Async HTTP fetching
+    FETCH_MAX_CONNECTIONS = int(os.getenv('FETCH_MAX_CONNECTIONS', 100))
+    FETCH_MAX_PER_HOST = int(os.getenv('FETCH_MAX_PER_HOST', 4))  # Concurrent requests per retailer host
+    FETCH_TIMEOUT = float(os.getenv('FETCH_TIMEOUT', 30))
+    FETCH_HTTP2 = os.getenv('FETCH_HTTP2', 'true').lower() == 'true'
+
+    # Storage for state that must survive restarts
+    DATA_DIR = os.getenv('SCRAPER_DATA_DIR', 'data')
+
+    # Persistent browser profiles: cookies, consent state, local storage and disk cache carried across browsers
+    BROWSER_PROFILES = os.getenv('BROWSER_PROFILES', 'true').lower() == 'true'
+    PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(DATA_DIR, 'profiles'))
+    PROFILE_MAX_AGE = float(os.getenv('PROFILE_MAX_AGE', 7 * 86400))  # Older snapshots are dropped and browsers start cold
+    PROFILE_CACHE_MB = int(os.getenv('PROFILE_CACHE_MB', 200))
+
+    # Per-host rate limiting (token bucket)
+    RATE_LIMIT_RPM = float(os.getenv('RATE_LIMIT_RPM', 20))
+    RATE_LIMIT_BURST = float(os.getenv('RATE_LIMIT_BURST', 3))
+    RATE_LIMIT_HOSTS = _parse_host_limits(os.getenv('RATE_LIMIT_HOSTS', ''))  # e.g. "www.tesco.com=10"
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')  # 'memory' or 'sqlite' to share across workers
+    RATE_LIMIT_DB = os.getenv('RATE_LIMIT_DB', os.path.join(DATA_DIR, 'rate_limits.db'))
+
+    # Adaptive (AIMD) throttling per retailer host
+    THROTTLE_MIN_RPM = float(os.getenv('THROTTLE_MIN_RPM', 2))
+    THROTTLE_MAX_RPM = float(os.getenv('THROTTLE_MAX_RPM', 60))
+    THROTTLE_INCREASE_RPM = float(os.getenv('THROTTLE_INCREASE_RPM', 0.5))  # Added per successful page
+    THROTTLE_DECREASE_FACTOR = float(os.getenv('THROTTLE_DECREASE_FACTOR', 0.5))  # Applied per soft ban
+    THROTTLE_COOLDOWN = float(os.getenv('THROTTLE_COOLDOWN', 10))  # Seconds between two rate cuts
+
+    # Listing fetch backend per retailer ('http', 'browser' or 'auto'); unset keeps the one declared in ScraperFactory
+    FETCH_BACKENDS = {
+        'tesco': os.getenv('TESCO_FETCH_BACKEND'),
+        'aldi': os.getenv('ALDI_FETCH_BACKEND'),
+        'iceland': os.getenv('ICELAND_FETCH_BACKEND'),
+        'sainsbury': os.getenv('SAINSBURY_FETCH_BACKEND'),
+        'morrison': os.getenv('MORRISON_FETCH_BACKEND'),
+    }
+    FETCH_AUTO_RECHECK = float(os.getenv('FETCH_AUTO_RECHECK', 3600))  # Seconds 'auto' uses the browser before trying HTTP again
+    HTTP_SCRAPE_CONCURRENCY = int(os.getenv('HTTP_SCRAPE_CONCURRENCY', 8))  # Retailers fetched over HTTP need no browser
+
+    # Scrape executor: blocking scrapes run on a dedicated thread pool
+    SCRAPE_MAX_WORKERS = int(os.getenv('SCRAPE_MAX_WORKERS', 8))
+    SCRAPE_CONCURRENCY = {  # Concurrent scrapes per retailer: its driver pool size, or HTTP_SCRAPE_CONCURRENCY over HTTP
+        'tesco': int(os.getenv('TESCO_SCRAPE_CONCURRENCY', HTTP_SCRAPE_CONCURRENCY
+                               if FETCH_BACKENDS['tesco'] == 'http' else DRIVER_POOL_SIZES['tesco'])),
+        'aldi': int(os.getenv('ALDI_SCRAPE_CONCURRENCY', HTTP_SCRAPE_CONCURRENCY
+                              if FETCH_BACKENDS['aldi'] == 'http' else DRIVER_POOL_SIZES['aldi'])),
+        'iceland': int(os.getenv('ICELAND_SCRAPE_CONCURRENCY', HTTP_SCRAPE_CONCURRENCY
+                                 if FETCH_BACKENDS['iceland'] == 'http' else DRIVER_POOL_SIZES['iceland'])),
+        'sainsbury': int(os.getenv('SAINSBURY_SCRAPE_CONCURRENCY', HTTP_SCRAPE_CONCURRENCY
+                                   if FETCH_BACKENDS['sainsbury'] == 'http' else DRIVER_POOL_SIZES['sainsbury'])),
+        'morrison': int(os.getenv('MORRISON_SCRAPE_CONCURRENCY', HTTP_SCRAPE_CONCURRENCY
+                                  if FETCH_BACKENDS['morrison'] == 'http' else DRIVER_POOL_SIZES['morrison'])),
+    }
+    SCRAPE_MAX_QUEUE = int(os.getenv('SCRAPE_MAX_QUEUE', 4))  # Running + waiting scrapes per retailer before 429
+    SCRAPE_STREAM_BUFFER = int(os.getenv('SCRAPE_STREAM_BUFFER', 100))  # Products buffered ahead of a slow stream reader
+
+    # Circuit breaker per retailer: once too many of its scrapes fail, the next ones are refused with 503 until a probe succeeds
+    BREAKER_WINDOW = float(os.getenv('BREAKER_WINDOW', 1800))  # Seconds of scrape outcomes the failure rate is taken over
+    BREAKER_MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', 3))  # Outcomes in the window before it can open
+    BREAKER_FAILURE_RATE = float(os.getenv('BREAKER_FAILURE_RATE', 0.5))
+    BREAKER_OPEN_SECONDS = float(os.getenv('BREAKER_OPEN_SECONDS', 60))  # Before the first probe, doubled after each failed one
+    BREAKER_MAX_OPEN_SECONDS = float(os.getenv('BREAKER_MAX_OPEN_SECONDS', 1800))
+    BREAKER_PROBES = int(os.getenv('BREAKER_PROBES', 1))  # Scrapes let through at once while half-open
+
+    # Multi-retailer browse (/browse/all): seconds each retailer gets before it is reported as timed out
+    BROWSE_TIMEOUT = float(os.getenv('BROWSE_TIMEOUT', 300))
+    BROWSE_TIMEOUTS = {
+        'tesco': float(os.getenv('TESCO_BROWSE_TIMEOUT', BROWSE_TIMEOUT)),
+        'aldi': float(os.getenv('ALDI_BROWSE_TIMEOUT', BROWSE_TIMEOUT)),
+        'iceland': float(os.getenv('ICELAND_BROWSE_TIMEOUT', BROWSE_TIMEOUT)),
+        'sainsbury': float(os.getenv('SAINSBURY_BROWSE_TIMEOUT', BROWSE_TIMEOUT)),
+        'morrison': float(os.getenv('MORRISON_BROWSE_TIMEOUT', BROWSE_TIMEOUT)),
+    }
+
+    # Browse snapshots: served as is within the TTL, then served stale while a background scrape refreshes them
+    SNAPSHOT_DB = os.getenv('SNAPSHOT_DB', os.path.join(DATA_DIR, 'snapshots.db'))
+    SNAPSHOT_TTL = float(os.getenv('SNAPSHOT_TTL', 900))
+    SNAPSHOT_MAX_STALE = float(os.getenv('SNAPSHOT_MAX_STALE', 86400))  # Seconds past the TTL a snapshot may still be served
+
+    # Change feed (/browse/{retailer}/changes): products added, removed or repriced between snapshots
+    CHANGES_DB = os.getenv('CHANGES_DB', os.path.join(DATA_DIR, 'changes.db'))
+    CHANGES_RETENTION = float(os.getenv('CHANGES_RETENTION', 7 * 86400))  # Seconds a change stays readable
+    CHANGES_PAGE_SIZE = int(os.getenv('CHANGES_PAGE_SIZE', 1000))
+    CHANGES_REMOVE_AFTER = int(os.getenv('CHANGES_REMOVE_AFTER', 3))  # Scrapes in a row a product must be missing from to be removed
+
+    # Product pages fetched per POST /scrape/bulk request
+    BULK_SCRAPE_MAX_URLS = int(os.getenv('BULK_SCRAPE_MAX_URLS', 5000))
+    BULK_SCRAPE_WORKERS = int(os.getenv('BULK_SCRAPE_WORKERS', 3))  # Pages of one request fetched at a time
+    BULK_SCRAPE_TIMEOUT = float(os.getenv('BULK_SCRAPE_TIMEOUT', 240))  # Seconds a request may take at the current rate
+
+    # Background scrape jobs
+    JOBS_DB = os.getenv('JOBS_DB', os.path.join(DATA_DIR, 'jobs.db'))
+    JOB_RETRY_DELAY = float(os.getenv('JOB_RETRY_DELAY', 5))  # Seconds a job waits when its retailer queue is full
+
+    # Catalogue crawl ("catalogue" jobs): category and pagination links followed from the seeds, checkpointed to disk
+    FRONTIER_DB = os.getenv('FRONTIER_DB', os.path.join(DATA_DIR, 'frontiers.db'))
+    CRAWL_MAX_PAGES = int(os.getenv('CRAWL_MAX_PAGES', 5000))
+    CRAWL_MAX_DEPTH = int(os.getenv('CRAWL_MAX_DEPTH', 4))  # Category links followed away from a seed
+    CRAWL_CHECKPOINT_PAGES = int(os.getenv('CRAWL_CHECKPOINT_PAGES', 10))  # Pages crawled between two checkpoints
+    CRAWL_MAX_RETRIES = int(os.getenv('CRAWL_MAX_RETRIES', 3))  # Resumes from the checkpoint after a crawl error
+    CRAWL_SEEN_CAPACITY = int(os.getenv('CRAWL_SEEN_CAPACITY', 200000))  # URLs or products per Bloom filter
+    CRAWL_SEEN_ERROR_RATE = float(os.getenv('CRAWL_SEEN_ERROR_RATE', 0.0001))  # Chance an unseen one is taken as seen
+    CRAWL_SEEDS = {  # Where a crawl starts; unset starts from the home page and the groceries listing
+        'tesco': _parse_list(os.getenv('TESCO_CRAWL_SEEDS', '')),
+        'aldi': _parse_list(os.getenv('ALDI_CRAWL_SEEDS', '')),
+        'iceland': _parse_list(os.getenv('ICELAND_CRAWL_SEEDS', '')),
+        'sainsbury': _parse_list(os.getenv('SAINSBURY_CRAWL_SEEDS', '')),
+        'morrison': _parse_list(os.getenv('MORRISON_CRAWL_SEEDS', '')),
+    }
+
+    # Browser page readiness: scroll until the tile count stops growing, then wait for the page to go quiet
+    READY_QUIET_MS = float(os.getenv('READY_QUIET_MS', 500))  # No DOM changes or requests for this long
+    READY_SETTLE_MAX = float(os.getenv('READY_SETTLE_MAX', 3))  # Seconds without new tiles before a busy page is taken
+    READY_POLL = float(os.getenv('READY_POLL', 0.1))
+    READY_MAX_SCROLLS = int(os.getenv('READY_MAX_SCROLLS', 20))
+
+    # Browser resource blocking: a PAC profile sends third-party hosts and unwanted resource kinds to a local sink.
+    # Off by default; run 'audit' against a retailer and check its pages still render before setting 'block'.
+    RESOURCE_BLOCKING = os.getenv('RESOURCE_BLOCKING', 'off')  # 'block', 'audit' (load everything, count what would be blocked) or 'off'
+    RESOURCE_ALLOW_DOMAINS = {  # Subdomains included
+        'tesco': _allowed_domains('tesco', RETAILER_URLS['tesco'][0], 'tesco.com'),
+        'aldi': _allowed_domains('aldi', RETAILER_URLS['aldi'][0], 'aldi.co.uk'),
+        'iceland': _allowed_domains('iceland', RETAILER_URLS['iceland'][0], 'iceland.co.uk'),
+        'sainsbury': _allowed_domains('sainsbury', RETAILER_URLS['sainsbury'][0], 'sainsburys.co.uk'),
+        'morrison': _allowed_domains('morrison', RETAILER_URLS['morrison'][0], 'morrisons.com'),
+    }
+    RESOURCE_ALLOW_TYPE = os.getenv('RESOURCE_ALLOW_TYPES', '')  # Out of image, font, stylesheet and media
+    RESOURCE_ALLOW_TYPES = {
+        'tesco': _parse_list(os.getenv('TESCO_RESOURCE_ALLOW_TYPES', RESOURCE_ALLOW_TYPE)),
+        'aldi': _parse_list(os.getenv('ALDI_RESOURCE_ALLOW_TYPES', RESOURCE_ALLOW_TYPE)),
+        'iceland': _parse_list(os.getenv('ICELAND_RESOURCE_ALLOW_TYPES', RESOURCE_ALLOW_TYPE)),
+        'sainsbury': _parse_list(os.getenv('SAINSBURY_RESOURCE_ALLOW_TYPES', RESOURCE_ALLOW_TYPE)),
+        'morrison': _parse_list(os.getenv('MORRISON_RESOURCE_ALLOW_TYPES', RESOURCE_ALLOW_TYPE)),
+    }
+
+    # Tesco listing pages harvested before giving up on reaching the last one
+    TESCO_MAX_PAGES = int(os.getenv('TESCO_MAX_PAGES', 200))
+
+    # Aldi listing pages crawled in parallel on spare pooled browsers
+    ALDI_PAGE_WORKERS = int(os.getenv('ALDI_PAGE_WORKERS', 4))
+    BROWSER_TABS = int(os.getenv('BROWSER_TABS', 4))  # Pages each of those browsers loads at once, one per tab
+
+    # Product extraction: 'browser' reads tiles in one execute_script call, 'soup' parses page_source
+    EXTRACTION_MODE = os.getenv('EXTRACTION_MODE', 'browser')
+    PARSER_BACKEND = os.getenv('PARSER_BACKEND', 'lxml')  # 'lxml' parses only product tiles, 'html.parser' the full page
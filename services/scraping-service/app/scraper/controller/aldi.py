@@ -1,33 +1,50 @@
 
 
+import contextvars
 import logging
-from typing import Dict, List, Any, Optional
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
 from datetime import datetime
-from urllib.parse import urljoin
+from urllib.parse import parse_qs, urlencode, urljoin, urlparse, urlunparse
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.firefox.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from ..base import PageFetchError
 from ..extractors import ProductExtractor
-import time
+from ..config import Config
+from ..driver_pool import DriverPoolExhausted
+from ..executor import raise_if_cancelled, scrape_cancelled
 from tenacity import retry, stop_after_attempt, wait_fixed
 from ...scraper.utils import logger
+from ...scraper.readiness import wait_until_ready
+from ...scraper.profiles import apply_browser_profile, retire_browser_profile
+from ...scraper.resource_blocking import apply_resource_blocking
+from ...scraper.throttle import get_throttle, record_browser_failure, record_browser_page, wait_for_slot
+from ...scraper.specs import ALDI_SPEC, extract_live_products
+from ...scraper.parsing import parse_page_fields, parse_tiles
+from ...scraper.tabs import WAIT, TabScheduler
 
 class AldiScraper:
     """Optimized Aldi scraper with accurate selectors"""
     
-    base_url = "https://groceries.aldi.co.uk"
-    groceries_url = f"{base_url}/en-GB/fresh-food"
+    base_url, groceries_url = Config.RETAILER_URLS['aldi']
     timeout = 30  # Optimal timeout balance
 
-    def __init__(self, headless=True):
+    # Listing pages can be crawled on spare browsers from the driver pool
+    parallel_pagination = True
+
+    def __init__(self, headless=True, driver=None, driver_pool=None):
         self.logger = logging.getLogger(__name__)
-        self.driver = self._init_firefox(headless)
+        # A driver borrowed from a DriverPool is returned to it, not quit
+        self._owns_driver = driver is None
+        self.driver = driver if driver is not None else self._init_firefox(headless)
+        self.driver_pool = driver_pool
+        self.pages_loaded = 0
+        self.driver_broken = False  # Set when self.driver failed, so its pool discards it
         
     def _init_firefox(self, headless):
         """Initialize Firefox with optimized settings"""
@@ -38,7 +55,8 @@ class AldiScraper:
         # Essential Firefox preferences
         options.set_preference("dom.webdriver.enabled", False)
         options.set_preference("useAutomationExtension", False)
-        options.set_preference("permissions.default.image", 2)  # Disable images
+        apply_resource_blocking(options, "aldi")  # Images, fonts, CSS and third-party hosts
+        apply_browser_profile(options, "aldi")  # Warm cookies, consent state and cache
         options.set_preference("general.useragent.override", 
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
         
@@ -55,42 +73,39 @@ class AldiScraper:
     def fetch_page(self, url):
         """Reliable page fetching with proper waiting"""
         try:
+            wait_for_slot(url)
             self.driver.get(url)
-             # Scroll to load lazy-loaded images
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            # Wait for critical elements to load
-            WebDriverWait(self.driver, self.timeout).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.product-teaser-item")))
-            time.sleep(1)  # Small stabilization delay
+            self.pages_loaded += 1
+            # Scroll until the tiles stop growing, then wait for the page to settle
+            wait_until_ready(self.driver, "div.product-teaser-item", self.timeout, store="aldi")
+            get_throttle(url).record_success()
             return BeautifulSoup(self.driver.page_source, "html.parser")
         except Exception as e:
             self.logger.warning(f"Page load failed: {str(e)}")
+            record_browser_failure(self.driver, url, e)
             raise
 
-    def get_next_page(self):
-        """Handle pagination for different page structures"""
+    def get_next_page(self, page_info: Dict[str, Any]) -> bool:
+        """Load the page after the current one using the pagination read from it"""
         try:
-            soup = BeautifulSoup(self.driver.page_source, "html.parser")
-
-            # Find the currently active page (e.g., <span> for page 4)
-            current_page = soup.select_one("span.base-pagination__count--active")
+            # The currently active page (e.g., <span data-test="current-page4">)
+            current_page = page_info.get("current_page")
             if not current_page:
                 return False  # No more pages
 
             try:
-                current_page_number = int(current_page["data-test"].replace("current-page", ""))
-            except (KeyError, ValueError):
+                current_page_number = int(current_page.replace("current-page", ""))
+            except ValueError:
                 return False  # If parsing fails, assume no more pages
 
-            next_page_number = current_page_number + 1
-
             # Check if next page exists as an <a> tag
-            next_page = soup.select_one(f'a[data-test="page-{next_page_number}"]')
+            next_page_url = self._page_links(page_info).get(current_page_number + 1)
 
-            if next_page:
-                next_page_url = urljoin(self.base_url, next_page["href"])
+            if next_page_url:
+                wait_for_slot(next_page_url)
                 self.driver.get(next_page_url)
-                time.sleep(2)
+                self.pages_loaded += 1
+                self._wait_for_tiles(self.driver)
                 return True
             
             return False  # Stop if no next page link found
@@ -101,58 +116,235 @@ class AldiScraper:
 
     def aldi_groceries(self) -> List[Dict[str, Any]]:
         """Scrape all Aldi groceries across multiple pages"""
+        return list(self.iter_aldi_groceries())
+
+    def iter_aldi_groceries(self) -> Iterator[Dict[str, Any]]:
+        """Yield Aldi groceries page by page as each page is parsed"""
+        wait_for_slot(self.groceries_url)
         self.driver.get(self.groceries_url)
-        all_products = []
-
-        while True:
-            soup = BeautifulSoup(self.driver.page_source, "html.parser")
-            product_elements = soup.select("div.product-teaser-item")
-
-            for product_element in product_elements:
-                try:
-                    product_link = ProductExtractor.extract_product_link(
-                        product_element, self.base_url, "a.product-tile__link"
-                    )
-                    if product_link:
-                        product = {
-                            "store": "Aldi",
-                            "url": product_link,
-                            "name": ProductExtractor.extract_title(
-                                product_element, "div.product-tile__name p"
-                            ),
-                            "brand": ProductExtractor.extract_manufacturer(
-                                product_element, "div.product-tile__brandname p"
-                            ),
-                            "price": ProductExtractor.extract_price(
-                                product_element, "span.base-price__regular span"
-                            ),
-                            "size": ProductExtractor.extract_size(
-                                product_element, "div.product-tile__unit-of-measurement p"
-                            ),
-                            "image_url": ProductExtractor.extract_image_url(
-                                product_element, "img.base-image"
-                            ),
-                            "provide_rating": False,
-                            "external_id": ProductExtractor.extract_external_id(product_link),
-                            "timestamp": datetime.now().isoformat()
-                        }
-                        all_products.append({k: v for k, v in product.items() if v is not None})
-
-                except Exception as e:
-                    logger.error(f"Error extracting product: {e}")
-
-            if not self.get_next_page():
-                break  # Stop if no next page
-
-        return all_products
+        self.pages_loaded += 1
+        self._wait_for_tiles(self.driver)
+
+        raise_if_cancelled()
+        page_products, page_info = self._read_page(self.driver)
+        yield from page_products
+
+        # With the page count known, later pages can be spread across spare browsers
+        page_count, page_url = self._page_plan(page_info)
+        if self.driver_pool is not None and page_count > 1 and page_url is not None:
+            yield from self._iter_pages_parallel(range(2, page_count + 1), page_url)
+            return
+
+        while self.get_next_page(page_info):
+            raise_if_cancelled()  # Stop between pages once the client has gone
+            page_products, page_info = self._read_page(self.driver)
+            yield from page_products  # Hand the page over before loading the next one
+
+    def _wait_for_tiles(self, driver):
+        """Wait until the page loaded in ``driver`` has settled, or its deadline passes"""
+        try:
+            wait_until_ready(driver, "div.product-teaser-item", self.timeout, store="aldi")
+        except TimeoutException:
+            pass  # An empty or blocked page is reported to the throttle by _read_page
+
+    def _read_page(self, driver) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Extract the products and pagination links of the page loaded in ``driver``"""
+        url = driver.current_url
+        live = extract_live_products(driver, ALDI_SPEC, self._product_from_fields)
+        if live is not None:
+            record_browser_page(url, None, True)
+            return live["products"], live["page"]
+
+        page_source = driver.page_source
+        soup = parse_tiles(page_source, ALDI_SPEC)
+        product_elements = soup.select("div.product-teaser-item")
+        record_browser_page(url, page_source, bool(product_elements))
+        page_info = ALDI_SPEC.extract_page_fields(parse_page_fields(page_source, ALDI_SPEC))
+        return self._extract_products(product_elements), page_info
+
+    def _product_from_fields(self, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build a product from the raw tile fields read by ALDI_SPEC"""
+        product_link = ProductExtractor.absolute_url(fields["link"], self.base_url)
+        if not product_link:
+            return None
+        return {
+            "store": "Aldi",
+            "url": product_link,
+            "name": ProductExtractor.clean_text(fields["name"]),
+            "brand": ProductExtractor.clean_text(fields["brand"]),
+            "price": ProductExtractor.parse_price(fields["price"]),
+            "size": ProductExtractor.clean_text(fields["size"]),
+            "image_url": ProductExtractor.pick_image_url(
+                fields["image_src"], fields["image_srcset"], fields["image_data_src"]
+            ),
+            "provide_rating": False,
+            "external_id": ProductExtractor.extract_external_id(product_link),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def _products_from_soup(self, soup) -> List[Dict[str, Any]]:
+        """Extract products from parsed HTML with ProductExtractor"""
+        return self._extract_products(soup.select("div.product-teaser-item"))
+
+    def _extract_products(self, product_elements) -> List[Dict[str, Any]]:
+        """Build product dicts from one page's product tiles"""
+        page_products = []
+        for product_element in product_elements:
+            try:
+                product_link = ProductExtractor.extract_product_link(
+                    product_element, self.base_url, "a.product-tile__link"
+                )
+                if product_link:
+                    product = {
+                        "store": "Aldi",
+                        "url": product_link,
+                        "name": ProductExtractor.extract_title(
+                            product_element, "div.product-tile__name p"
+                        ),
+                        "brand": ProductExtractor.extract_manufacturer(
+                            product_element, "div.product-tile__brandname p"
+                        ),
+                        "price": ProductExtractor.extract_price(
+                            product_element, "span.base-price__regular span"
+                        ),
+                        "size": ProductExtractor.extract_size(
+                            product_element, "div.product-tile__unit-of-measurement p"
+                        ),
+                        "image_url": ProductExtractor.extract_image_url(
+                            product_element, "img.base-image"
+                        ),
+                        "provide_rating": False,
+                        "external_id": ProductExtractor.extract_external_id(product_link),
+                        "timestamp": datetime.now().isoformat()
+                    }
+                    page_products.append({k: v for k, v in product.items() if v is not None})
+
+            except Exception as e:
+                logger.error(f"Error extracting product: {e}")
+        return page_products
+
+    def _page_links(self, page_info: Dict[str, Any]) -> Dict[int, str]:
+        """Map page numbers to absolute URLs from the pagination links"""
+        page_links = {}
+        for number, href in zip(page_info.get("page_numbers") or [], page_info.get("page_hrefs") or []):
+            number = (number or "").replace("page-", "")
+            if number.isdigit() and href:
+                page_links[int(number)] = urljoin(self.base_url, href)
+        return page_links
+
+    def _page_plan(self, page_info: Dict[str, Any]) -> Tuple[int, Optional[Callable[[int], str]]]:
+        """Read the total page count and a page-number URL builder from the first page"""
+        page_links = self._page_links(page_info)
+        if not page_links:
+            return 1, None
+
+        # Find the query parameter carrying the page number, e.g. ?page=3
+        number, sample_url = max(page_links.items())
+        parts = urlparse(sample_url)
+        query = parse_qs(parts.query)
+        page_param = next((key for key, values in query.items() if values == [str(number)]), None)
+        if page_param is None:
+            return number, None
+
+        def page_url(page: int) -> str:
+            query[page_param] = [str(page)]
+            return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+        return number, page_url
+
+    def _iter_pages_parallel(self, pages, page_url: Callable[[int], str]) -> Iterator[Dict[str, Any]]:
+        """Crawl ``pages`` on this driver plus spare pooled ones, yielding pages in order"""
+        drivers = [self.driver]
+        for _ in range(min(Config.ALDI_PAGE_WORKERS, len(pages)) - 1):
+            try:
+                drivers.append(self.driver_pool.checkout(timeout=0))
+            except DriverPoolExhausted:
+                break
+        logger.info(f"Crawling {len(pages)} Aldi pages with {len(drivers)} browsers of up to {Config.BROWSER_TABS} tabs")
+
+        todo = deque(pages)
+        results: Dict[int, List[Dict[str, Any]]] = {}
+        stored = set()  # Pages whose products have been stored, whether or not yielded yet
+        done = threading.Condition()
+        stop = threading.Event()
+        loaded = {id(driver): 0 for driver in drivers}
+        broken = set()
+
+        def take():
+            while not stop.is_set() and not scrape_cancelled():
+                with done:
+                    if todo:
+                        page = todo.popleft()
+                    elif len(stored) < len(pages):
+                        page = WAIT  # Still loading elsewhere; a failing browser may hand pages back
+                    else:
+                        return
+                yield page
+
+        def work(driver):
+            # Each browser keeps up to BROWSER_TABS pages loading at once
+            tabs = TabScheduler(driver, ALDI_SPEC.tile, self.timeout, store="aldi")
+            handling = None  # A finished page whose products are not stored yet
+            try:
+                for page, products, error in tabs.run(take(), page_url, lambda tab: self._read_page(tab)[0]):
+                    handling = page
+                    loaded[id(driver)] += 1
+                    if isinstance(error, TimeoutException):
+                        products, _ = self._read_page(driver)  # Reports the empty or blocked page to the throttle
+                    elif error is not None:
+                        logger.error(f"Failed to load Aldi page {page}: {error}")
+                        products = []
+                    with done:
+                        results[page] = products
+                        stored.add(page)
+                        handling = None
+                        done.notify_all()
+                    if stop.is_set():
+                        return
+            except Exception as e:
+                # Hand the unfinished pages to another browser and retire this one
+                with done:
+                    unfinished = tabs.pending + ([handling] if handling is not None else [])
+                    logger.error(f"Aldi browser failed on pages {unfinished}: {e}")
+                    broken.add(id(driver))
+                    todo.extendleft(reversed(unfinished))
+                    done.notify_all()
+
+        workers = []
+        for driver in drivers:
+            # Copy the context so workers see the scrape's cancellation flag
+            worker = threading.Thread(target=contextvars.copy_context().run, args=(work, driver), daemon=True)
+            worker.start()
+            workers.append(worker)
+
+        try:
+            for page in pages:
+                with done:
+                    while page not in results:
+                        raise_if_cancelled()
+                        if not any(worker.is_alive() for worker in workers) and page not in results:
+                            missing = [p for p in pages if p not in stored]
+                            raise PageFetchError(f"Aldi pages {missing} were not loaded: every browser failed")
+                        done.wait(1)
+                    page_products = results.pop(page)
+                yield from page_products
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+            self.pages_loaded += loaded[id(self.driver)]
+            self.driver_broken = self.driver_broken or id(self.driver) in broken
+            for driver in drivers[1:]:
+                self.driver_pool.checkin(driver, pages=max(1, loaded[id(driver)]), discard=id(driver) in broken)
 
     def close(self):
         """Ensure proper resource cleanup"""
-        if hasattr(self, 'driver'):
+        if hasattr(self, 'driver') and self._owns_driver:
             try:
                 self.driver.quit()
             except Exception as e:
                 self.logger.error(f"Error closing driver: {str(e)}")
+            retire_browser_profile(self.driver)
 
     def __enter__(self):
         """Support context manager protocol"""
@@ -6,25 +6,30 @@ from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.firefox.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException
 from ..extractors import ProductExtractor
-import time
 from tenacity import retry, stop_after_attempt, wait_fixed
+from ...scraper.config import Config
 from ...scraper.utils import logger
+from ...scraper.readiness import wait_until_ready
+from ...scraper.profiles import apply_browser_profile, retire_browser_profile
+from ...scraper.resource_blocking import apply_resource_blocking
+from ...scraper.throttle import get_throttle, record_browser_failure, wait_for_slot
+from ...scraper.specs import MORRISON_SPEC, extract_live_products
+from ...scraper.parsing import parse_tiles
 
 class MorrisonScraper:
     """Optimized Morrisons scraper with accurate selectors"""
     
-    base_url = "https://groceries.morrisons.com"
-    groceries_url = f"{base_url}/categories"
+    base_url, groceries_url = Config.RETAILER_URLS['morrison']
     timeout = 30  # Optimal timeout balance
 
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, driver=None):
         self.logger = logging.getLogger(__name__)
-        self.driver = self._init_firefox(headless)
+        # A driver borrowed from a DriverPool is returned to it, not quit
+        self._owns_driver = driver is None
+        self.driver = driver if driver is not None else self._init_firefox(headless)
+        self.pages_loaded = 0
         
     def _init_firefox(self, headless):
         """Initialize Firefox with optimized settings"""
@@ -35,7 +40,8 @@ class MorrisonScraper:
         # Essential Firefox preferences
         options.set_preference("dom.webdriver.enabled", False)
         options.set_preference("useAutomationExtension", False)
-        options.set_preference("permissions.default.image", 2)  # Disable images
+        apply_resource_blocking(options, "morrison")  # Images, fonts, CSS and third-party hosts
+        apply_browser_profile(options, "morrison")  # Warm cookies, consent state and cache
         options.set_preference("general.useragent.override", 
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
         
@@ -49,31 +55,67 @@ class MorrisonScraper:
             raise
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(3))
-    def fetch_page(self, url):
-        """Reliable page fetching with proper waiting"""
+    def load_page(self, url):
+        """Reliable page loading with proper waiting"""
         try:
+            wait_for_slot(url)
             self.driver.get(url)
-            # Scroll to load lazy-loaded images
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/3)")
-            time.sleep(1)
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2)")
-            time.sleep(1)
-            
-            # Wait for critical elements to load
-            WebDriverWait(self.driver, self.timeout).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-test^='fop-wrapper']")))
-            time.sleep(1)  # Small stabilization delay
-            return BeautifulSoup(self.driver.page_source, "html.parser")
+            self.pages_loaded += 1
+            # Scroll until the tiles stop growing, then wait for the page to settle
+            wait_until_ready(self.driver, "div[data-test^='fop-wrapper']", self.timeout, store="morrison")
+            get_throttle(url).record_success()
         except Exception as e:
             self.logger.warning(f"Page load failed: {str(e)}")
+            record_browser_failure(self.driver, url, e)
             raise
 
+    def fetch_page(self, url):
+        """Load a page and parse its HTML"""
+        self.load_page(url)
+        return BeautifulSoup(self.driver.page_source, "html.parser")
+
     def morrison_groceries(self) -> List[Dict[str, Any]]:
         """Browse Morrisons groceries with updated selectors"""
-        soup = self.fetch_page(self.groceries_url)
+        self.load_page(self.groceries_url)
+        live = extract_live_products(self.driver, MORRISON_SPEC, self._product_from_fields)
+        if live is not None:
+            return live["products"]
+
+        soup = parse_tiles(self.driver.page_source, MORRISON_SPEC)
         if not soup:
             return []
-            
+        return self._products_from_soup(soup)
+
+    def _product_from_fields(self, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build a product from the raw tile fields read by MORRISON_SPEC"""
+        product_link = ProductExtractor.absolute_url(fields["link"], self.base_url)
+        if not product_link:
+            return None
+        rating = None
+        if fields["rating_html"]:
+            rating = self._extract_morrisons_rating(
+                BeautifulSoup(fields["rating_html"], "html.parser"), "div[data-test='rating-badge']"
+            )
+        return {
+            "store": "Morrisons",
+            "url": product_link,
+            "name": ProductExtractor.clean_text(fields["name"]),
+            "brand": "Morrisons",  # Most products are Morrisons brand
+            "price": ProductExtractor.parse_price(fields["price"]),
+            "discount_price": ProductExtractor.clean_text(fields["offer"]),
+            "size": ProductExtractor.clean_text(fields["size"]),
+            "unit_price": ProductExtractor.clean_text(fields["unit_price"]),
+            "image_url": ProductExtractor.pick_image_url(
+                fields["image_src"], fields["image_srcset"], fields["image_data_src"]
+            ),
+            "rating": rating,
+            "external_id": ProductExtractor.extract_external_id(product_link),
+            "provide_rating": False,
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def _products_from_soup(self, soup) -> List[Dict[str, Any]]:
+        """Extract products from parsed HTML with ProductExtractor"""
         products = []
         
         # Updated selector for product elements
@@ -171,11 +213,12 @@ class MorrisonScraper:
 
     def close(self):
         """Ensure proper resource cleanup"""
-        if hasattr(self, 'driver'):
+        if hasattr(self, 'driver') and self._owns_driver:
             try:
                 self.driver.quit()
             except Exception as e:
                 self.logger.error(f"Error closing driver: {str(e)}")
+            retire_browser_profile(self.driver)
 
     def __enter__(self):
         """Support context manager protocol"""
@@ -5,25 +5,30 @@ from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.firefox.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException
 from ..extractors import ProductExtractor
-import time
 from tenacity import retry, stop_after_attempt, wait_fixed
+from ...scraper.config import Config
 from ...scraper.utils import logger
+from ...scraper.readiness import wait_until_ready
+from ...scraper.profiles import apply_browser_profile, retire_browser_profile
+from ...scraper.resource_blocking import apply_resource_blocking
+from ...scraper.throttle import get_throttle, record_browser_failure, wait_for_slot
+from ...scraper.specs import SAINSBURY_SPEC, extract_live_products
+from ...scraper.parsing import parse_tiles
 
 class SainsburyScraper:
     """Scraper for Sainsbury grocery products."""
 
-    base_url = "https://www.sainsburys.co.uk"
-    groceries_url =  f"{base_url}/shop/gb/groceries/new---trending/aldi-price-match"
+    base_url, groceries_url = Config.RETAILER_URLS['sainsbury']
     timeout = 30  # Optimal timeout balance
        
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, driver=None):
         self.logger = logging.getLogger(__name__)
-        self.driver = self._init_firefox(headless)
+        # A driver borrowed from a DriverPool is returned to it, not quit
+        self._owns_driver = driver is None
+        self.driver = driver if driver is not None else self._init_firefox(headless)
+        self.pages_loaded = 0
         
     def _init_firefox(self, headless):
         """Initialize Firefox with optimized settings"""
@@ -34,7 +39,8 @@ class SainsburyScraper:
         # Essential Firefox preferences
         options.set_preference("dom.webdriver.enabled", False)
         options.set_preference("useAutomationExtension", False)
-        options.set_preference("permissions.default.image", 2)  # Disable images
+        apply_resource_blocking(options, "sainsbury")  # Images, fonts, CSS and third-party hosts
+        apply_browser_profile(options, "sainsbury")  # Warm cookies, consent state and cache
         options.set_preference("general.useragent.override", 
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
         
@@ -48,29 +54,68 @@ class SainsburyScraper:
             raise
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(3))
-    def fetch_page(self, url):
-        """Reliable page fetching with proper waiting"""
+    def load_page(self, url):
+        """Reliable page loading with proper waiting"""
         try:
+            wait_for_slot(url)
             self.driver.get(url)
-            # Scroll to load lazy-loaded images
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            # Wait for critical elements to load
-            WebDriverWait(self.driver, self.timeout).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "li.gridItem")))
-            time.sleep(1)  # Small stabilization delay
-            return BeautifulSoup(self.driver.page_source, "html.parser")
+            self.pages_loaded += 1
+            # Scroll until the tiles stop growing, then wait for the page to settle
+            wait_until_ready(self.driver, "li.gridItem", self.timeout, store="sainsbury")
+            get_throttle(url).record_success()
         except Exception as e:
             self.logger.warning(f"Page load failed: {str(e)}")
+            record_browser_failure(self.driver, url, e)
             raise
 
+    def fetch_page(self, url):
+        """Load a page and parse its HTML"""
+        self.load_page(url)
+        return BeautifulSoup(self.driver.page_source, "html.parser")
+
     
 
     def sainsbury_groceries(self) -> List[Dict[str, Any]]:
         """Browse the Sainsbury groceries for featured products."""
-        soup = self.fetch_page(self.groceries_url)
+        self.load_page(self.groceries_url)
+        live = extract_live_products(self.driver, SAINSBURY_SPEC, self._product_from_fields)
+        if live is not None:
+            return live["products"]
+
+        soup = parse_tiles(self.driver.page_source, SAINSBURY_SPEC)
         if not soup:
             return []
+        return self._products_from_soup(soup)
+
+    def _product_from_fields(self, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build a product from the raw tile fields read by SAINSBURY_SPEC"""
+        product_link = ProductExtractor.absolute_url(fields["link"], self.base_url)
+        if not product_link:
+            return None
+
+        image_url = ProductExtractor.pick_image_url(
+            fields["image_src"], fields["image_srcset"], fields["image_data_src"]
+        )
+        product = {
+            "store": "Sainsbury",
+            "url": product_link,
+            "name": ProductExtractor.clean_text(fields["name"]),
+            "price": ProductExtractor.parse_price(fields["price"]),
+            "size": ProductExtractor.parse_size(fields["name"]),
+            "unit_price": ProductExtractor.clean_text(fields["price_per_measure"]),
+            "image_url": image_url,
+            "rating": ProductExtractor.parse_rating(fields["rating"]),
+            "provide_rating": True,
+            "external_id": ProductExtractor.extract_external_id(product_link),
+            "timestamp": datetime.now().isoformat()
+        }
+        badges = [badge for badge in fields["badges"] if badge is not None]
+        if badges:
+            product["badges"] = ", ".join(badges)
+        return product
 
+    def _products_from_soup(self, soup) -> List[Dict[str, Any]]:
+        """Extract products from parsed HTML with ProductExtractor"""
         products = []
 
         # Sainsbury's product container
@@ -101,8 +146,8 @@ class SainsburyScraper:
                         "price": ProductExtractor.extract_price(
                             product_element, "p.pricePerUnit"  
                         ),
-                        "size": ProductExtractor.extract_size(
-                            product_element, "p.pricePerMeasure"  
+                        "size": ProductExtractor.parse_size(
+                            ProductExtractor.extract_title(product_element, "h3 a")
                         ),
                         "unit_price": ProductExtractor.extract_discounted_price(
                         product_element, "p.pricePerMeasure"  
@@ -112,17 +157,17 @@ class SainsburyScraper:
                             product_element, "div.reviews img", attr="alt"  
                         ),
                          "provide_rating": True,
-                         "external_id": ProductExtractor.extract_external_id(image_url),
+                         "external_id": ProductExtractor.extract_external_id(product_link),
                         "timestamp": datetime.now().isoformat()
                     }
-                     # Add badges information if present
-                badges = []
-                badge_elements = product_element.select("div.badges img")
-                for badge in badge_elements:
-                    if badge.has_attr('alt'):
-                        badges.append(badge['alt'])
-                if badges:
-                    product["badges"] = ", ".join(badges)
+                    # Add badges information if present
+                    badges = []
+                    badge_elements = product_element.select("div.badges img")
+                    for badge in badge_elements:
+                        if badge.has_attr('alt'):
+                            badges.append(badge['alt'])
+                    if badges:
+                        product["badges"] = ", ".join(badges)
 
                     # Remove None values
                     products.append({k: v for k, v in product.items() if v is not None})
@@ -134,11 +179,12 @@ class SainsburyScraper:
     
     def close(self):
         """Ensure proper resource cleanup"""
-        if hasattr(self, 'driver'):
+        if hasattr(self, 'driver') and self._owns_driver:
             try:
                 self.driver.quit()
             except Exception as e:
                 self.logger.error(f"Error closing driver: {str(e)}")
+            retire_browser_profile(self.driver)
 
     def __enter__(self):
         """Support context manager protocol"""
@@ -1,31 +1,39 @@
 
 import logging
 import re
-from typing import Dict, List, Any, Optional
+from typing import Dict, Generator, Iterator, List, Any, Optional, Set, Tuple
+from urllib.parse import urljoin
 from datetime import datetime
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from selenium.webdriver.firefox.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException
 from ..extractors import ProductExtractor
-import time
 from tenacity import retry, stop_after_attempt, wait_fixed
+from ...scraper.base import IncompleteScrape
+from ...scraper.config import Config
+from ...scraper.executor import raise_if_cancelled
 from ...scraper.utils import logger
+from ...scraper.readiness import wait_until_ready
+from ...scraper.profiles import apply_browser_profile, retire_browser_profile
+from ...scraper.resource_blocking import apply_resource_blocking
+from ...scraper.throttle import get_throttle, record_browser_failure, wait_for_slot
+from ...scraper.specs import TESCO_SPEC, products_from_tiles
+from ...scraper.parsing import parse_page_fields, parse_tiles
 
 
 class TescoScraper:
     """Scraper for Tesco grocery products."""
-    base_url = "https://www.tesco.com"
-    groceries_url =  f"{base_url}/groceries/en-GB/shop/fresh-food/all"
+    base_url, groceries_url = Config.RETAILER_URLS['tesco']
     timeout = 45  # Optimal timeout balance
     
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, driver=None):
         self.logger = logging.getLogger(__name__)
-        self.driver = self._init_firefox(headless)
+        # A driver borrowed from a DriverPool is returned to it, not quit
+        self._owns_driver = driver is None
+        self.driver = driver if driver is not None else self._init_firefox(headless)
+        self.pages_loaded = 0
         
     def _init_firefox(self, headless):
         """Initialize Firefox with optimized settings"""
@@ -36,7 +44,8 @@ class TescoScraper:
         # Essential Firefox preferences
         options.set_preference("dom.webdriver.enabled", False)
         options.set_preference("useAutomationExtension", False)
-        options.set_preference("permissions.default.image", 2)  # Disable images
+        apply_resource_blocking(options, "tesco")  # Images, fonts, CSS and third-party hosts
+        apply_browser_profile(options, "tesco")  # Warm cookies, consent state and cache
         options.set_preference("dom.disable_beforeunload", True)
         options.set_preference("browser.tabs.remote.autostart", False)
         options.set_preference("network.http.connection-timeout", 30)
@@ -53,41 +62,126 @@ class TescoScraper:
             raise
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(3))
-    def fetch_page(self, url):
-        """Reliable page fetching with proper waiting"""
+    def load_page(self, url, scroll=True):
+        """Reliable page loading with proper waiting"""
         try:
+            wait_for_slot(url)
             self.driver.get(url)
-
-            # More robust waiting strategy
-            self.driver.implicitly_wait(10)
-
-            for i in range(1, 4):
-                self.driver.execute_script(f"window.scrollTo(0, document.body.scrollHeight * {i/4});")
-                time.sleep(1.5)  # Slightly longer stabilization delay
-
-            time.sleep(2)
-            
-            # Wait for critical elements to load
-            WebDriverWait(self.driver, self.timeout).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "li[data-testid]")))
-            time.sleep(1)  # Small stabilization delay
-            return BeautifulSoup(self.driver.page_source, "html.parser")
+            self.pages_loaded += 1
+            # Scroll until the tiles stop growing (or just wait for the first ones), then for the page to settle
+            wait_until_ready(self.driver, "li[data-testid]", self.timeout, scroll=scroll, store="tesco")
+            get_throttle(url).record_success()
         except Exception as e:
             self.logger.warning(f"Page load failed: {str(e)}")
+            record_browser_failure(self.driver, url, e)
             raise
 
+    def fetch_page(self, url):
+        """Load a page and parse its HTML"""
+        self.load_page(url)
+        return BeautifulSoup(self.driver.page_source, "html.parser")
+
 
 
     def tesco_groceries(self) -> List[Dict[str, Any]]:
-        """Browse Tesco groceries with accurate selectors and data extraction."""
-        soup = self.fetch_page(self.groceries_url)
-        if not soup:
-            return []
+        """Harvest the whole Tesco groceries listing."""
+        return list(self.iter_tesco_groceries())
+
+    def iter_tesco_groceries(self) -> Iterator[Dict[str, Any]]:
+        """Yield every product of the groceries listing as its tiles appear.
+
+        Each page is scrolled until it stops growing, then its next page link
+        is followed. Tiles are read in the browser batch by batch as they
+        load and handed over straight away; a seen-set of product URLs drops
+        tiles repeated across batches and pages, and a page with nothing new
+        ends the harvest. A later page that cannot be loaded, or reaching
+        TESCO_MAX_PAGES, raises IncompleteScrape after the products so far.
+        """
+        seen: Set[str] = set()
+        url = self.groceries_url
+        for number in range(1, Config.TESCO_MAX_PAGES + 1):
+            if number == 1:
+                self.load_page(url, scroll=False)
+            else:
+                raise_if_cancelled()  # Stop between pages once the client has gone
+                try:
+                    self.load_page(url, scroll=False)
+                except Exception as e:
+                    logger.error(f"Failed to load Tesco page {number}, ending the harvest: {e}")
+                    raise IncompleteScrape(f"Tesco page {number} could not be loaded: {e}") from e
+            new, next_page = yield from self._harvest_page(seen)
+            if not new or not next_page:
+                return
+            url = urljoin(url, next_page)
+        logger.warning(f"Tesco harvest stopped at TESCO_MAX_PAGES ({Config.TESCO_MAX_PAGES})")
+        raise IncompleteScrape(f"Tesco listing has more than TESCO_MAX_PAGES ({Config.TESCO_MAX_PAGES}) pages")
+
+    def _harvest_page(self, seen: Set[str]) -> Generator[Dict[str, Any], None, Tuple[int, Optional[str]]]:
+        """Yield the loaded page's unseen products while scrolling it, returning their count and the next page link.
+
+        Falls back to scrolling the page out and parsing page_source when
+        in-browser extraction is off or fails.
+        """
+        new = 0
+        if Config.EXTRACTION_MODE == "browser":
+            try:
+                for scrolls in range(Config.READY_MAX_SCROLLS + 1):
+                    result = TESCO_SPEC.extract_new_live(self.driver, scroll=scrolls < Config.READY_MAX_SCROLLS)
+                    if not result["tiles"]:
+                        break  # Nothing appeared after the last scroll
+                    batch = self._unseen(
+                        products_from_tiles(result["tiles"], self._product_from_fields, TESCO_SPEC.store), seen
+                    )
+                    new += len(batch)
+                    yield from batch
+                    wait_until_ready(self.driver, TESCO_SPEC.tile, self.timeout, scroll=False)
+                return new, result["page"].get("next_page")
+            except Exception as e:
+                logger.warning(f"In-browser harvest failed for Tesco, falling back to page_source: {e}")
+
+        wait_until_ready(self.driver, TESCO_SPEC.tile, self.timeout)
+        page_source = self.driver.page_source
+        soup = parse_tiles(page_source, TESCO_SPEC)
+        batch = self._unseen(self._products_from_soup(soup) if soup else [], seen)
+        yield from batch
+        page = TESCO_SPEC.extract_page_fields(parse_page_fields(page_source, TESCO_SPEC))
+        return new + len(batch), page.get("next_page")
 
+    @staticmethod
+    def _unseen(products: List[Dict[str, Any]], seen: Set[str]) -> List[Dict[str, Any]]:
+        """Keep the products whose URL is not in ``seen``, adding theirs to it"""
+        fresh = []
+        for product in products:
+            if product["url"] not in seen:
+                seen.add(product["url"])
+                fresh.append(product)
+        return fresh
+
+    def _product_from_fields(self, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Build a product from the raw tile fields read by TESCO_SPEC"""
+        # Some li with data-testid are not products
+        if not fields["link"]:
+            return None
+        if fields["title_label"]:
+            title = fields["title_label"].strip()
+        else:
+            title = fields["title_text"].strip() if fields["title_text"] else None
+        return {
+            "store": "Tesco",
+            "url": self.base_url + fields["link"],
+            "name": title,
+            "discount_price": ProductExtractor.clean_text(fields["clubcard_price"]),
+            "price": ProductExtractor.clean_text(fields["price"]),
+            "image_url": fields["image_src"],
+            "timestamp": datetime.now().isoformat()
+        }
+
+    def _products_from_soup(self, soup) -> List[Dict[str, Any]]:
+        """Extract products from parsed HTML"""
         products = []
         product_elements = soup.select("li[data-testid]")  # This matches the HTML structure better
 
-        for product_element in product_elements[:20]:  # Limit to first 20
+        for product_element in product_elements:
             try:
                 # First check if it's a product element (some li with data-testid might not be products)
                 if not product_element.select_one("a[href^='/groceries/en-GB/products/']"):
@@ -97,7 +191,7 @@ class TescoScraper:
                 full_url = self.base_url + product_link.get("href") if product_link else None
                 
                 # Get title using improved selector
-                title = extract_title(product_element, "h3 a[aria-label]")
+                title = self._extract_title(product_element, "h3 a[aria-label]")
                 
                 # More specific price selectors
                 regular_price = product_element.select_one("p.styled__PriceText-sc-v0qv7n-1")
@@ -126,29 +220,30 @@ class TescoScraper:
             except Exception as e:
                 logger.error(f"Error extracting Tesco product: {e}", exc_info=True)
 
-        def extract_title(element, selector="h3 a span"):
-            """Extract product title using the provided selector."""
-            try:
-                title_tag = element.select_one(selector)
-                if title_tag and title_tag.get('aria-label'):
-                    return title_tag.get('aria-label').strip()
-                elif title_tag and title_tag.get_text():
-                    return title_tag.get_text().strip()
-                return None
-            except Exception as e:
-                logger.error(f"Error extracting title: {e}")
-                return None        
-
         return products
+
+    def _extract_title(self, element, selector="h3 a span"):
+        """Extract product title using the provided selector."""
+        try:
+            title_tag = element.select_one(selector)
+            if title_tag and title_tag.get('aria-label'):
+                return title_tag.get('aria-label').strip()
+            elif title_tag and title_tag.get_text():
+                return title_tag.get_text().strip()
+            return None
+        except Exception as e:
+            logger.error(f"Error extracting title: {e}")
+            return None
             
     
     def close(self):
         """Ensure proper resource cleanup"""
-        if hasattr(self, 'driver'):
+        if hasattr(self, 'driver') and self._owns_driver:
             try:
                 self.driver.quit()
             except Exception as e:
                 self.logger.error(f"Error closing driver: {str(e)}")
+            retire_browser_profile(self.driver)
 
     def __enter__(self):
         """Support context manager protocol"""
@@ -199,7 +294,7 @@ class TescoScraper:
 #             logger.warning("No products found - page structure may have changed")
 #             return []
         
-#         for product_element in product_elements[:20]:  # Limit to first 20
+#         for product_element in product_elements:
 #             try:
 #                 product_link = ProductExtractor.extract_product_link(
 #                     product_element, 
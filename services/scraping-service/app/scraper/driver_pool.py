@@ -0,0 +1,280 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+from selenium.common.exceptions import WebDriverException
+from .config import Config
+from .profiles import retire_browser_profile
+from .utils import logger
+
+
+class DriverPoolExhausted(Exception):
+    """Raised when no driver could be checked out before the timeout."""
+
+
+class PooledDriver:
+    """Book-keeping for a WebDriver owned by a pool."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.time()
+        self.last_used = self.created_at
+
+
+class DriverPool:
+    """Bounded, pre-warmed pool of WebDrivers for a single retailer.
+
+    Drivers are checked out for the duration of a scrape and checked back in
+    afterwards. A driver is health-checked before every checkout and recycled
+    once it has served ``max_pages`` pages or its browser grows past
+    ``max_rss_mb``.
+    """
+
+    def __init__(self, name: str, driver_factory: Callable, size: int = 1,
+                 max_pages: int = Config.DRIVER_MAX_PAGES,
+                 max_rss_mb: int = Config.DRIVER_MAX_RSS_MB):
+        self.name = name
+        self.driver_factory = driver_factory
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._idle = deque()
+        self._leased: Dict[int, PooledDriver] = {}
+        self._live = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.recycled = 0
+
+    def prewarm(self):
+        """Start browsers until the pool is full."""
+        while True:
+            with self._cond:
+                if self._closed or self._live >= self.size:
+                    return
+                self._live += 1
+            try:
+                entry = PooledDriver(self.driver_factory())
+            except Exception as e:
+                with self._cond:
+                    self._live -= 1
+                    self._cond.notify()
+                logger.error(f"Failed to pre-warm {self.name} driver: {e}")
+                return
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def checkout(self, timeout: Optional[float] = Config.DRIVER_CHECKOUT_TIMEOUT):
+        """Borrow a healthy driver, starting a new one if the pool has room."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            entry = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError(f"Driver pool '{self.name}' is closed")
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._live < self.size:
+                        self._live += 1
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise DriverPoolExhausted(
+                            f"No {self.name} driver available after {timeout}s")
+                    self._cond.wait(remaining)
+
+            if entry is None:
+                try:
+                    entry = PooledDriver(self.driver_factory())
+                except Exception:
+                    with self._cond:
+                        self._live -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(entry):
+                self._discard(entry, keep_profile=False)
+                continue
+
+            entry.last_used = time.time()
+            with self._cond:
+                self._leased[id(entry.driver)] = entry
+            return entry.driver
+
+    def checkin(self, driver, pages: int = 1, discard: bool = False):
+        """Return a driver to the pool, recycling it when it is worn out."""
+        with self._cond:
+            entry = self._leased.pop(id(driver), None)
+        if entry is None:
+            logger.warning(f"Driver returned to '{self.name}' pool was not leased from it")
+            return
+
+        entry.pages += pages
+        if discard or self._closed or self._needs_recycle(entry):
+            self._discard(entry, keep_profile=not discard)
+            return
+
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = Config.DRIVER_CHECKOUT_TIMEOUT):
+        """Context manager that checks a driver out and back in.
+
+        Yields a lease whose ``pages`` counter the caller can bump so the pool
+        knows how much work the driver did, and whose ``broken`` flag makes the
+        pool discard the driver.
+        """
+        driver = self.checkout(timeout)
+        lease = DriverLease(driver)
+        broken = False
+        try:
+            yield lease
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.checkin(driver, pages=max(1, lease.pages), discard=broken or lease.broken)
+
+    def close(self):
+        """Quit every idle driver; leased drivers are quit on checkin."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for entry in idle:
+            self._discard(entry)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "size": self.size,
+                "live": self._live,
+                "idle": len(self._idle),
+                "leased": len(self._leased),
+                "recycled": self.recycled,
+            }
+
+    def _is_healthy(self, entry: PooledDriver) -> bool:
+        try:
+            entry.driver.current_url
+            return bool(entry.driver.window_handles)
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy {self.name} driver: {e}")
+            return False
+
+    def _needs_recycle(self, entry: PooledDriver) -> bool:
+        if self.max_pages and entry.pages >= self.max_pages:
+            return True
+        rss = browser_rss_mb(entry.driver)
+        return bool(self.max_rss_mb and rss and rss >= self.max_rss_mb)
+
+    def _discard(self, entry: PooledDriver, keep_profile: bool = True):
+        """Quit a driver; a healthy one leaves its browser profile behind for the next (see profiles)."""
+        try:
+            entry.driver.quit()
+        except Exception as e:
+            logger.error(f"Error closing {self.name} driver: {str(e)}")
+        retire_browser_profile(entry.driver, keep=keep_profile)
+        with self._cond:
+            self._live -= 1
+            self.recycled += 1
+            self._cond.notify()
+
+
+class DriverLease:
+    """A checked-out driver plus the number of pages loaded with it."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.broken = False
+
+
+def browser_rss_mb(driver) -> Optional[float]:
+    """Resident memory of the Firefox process tree behind a driver, in MB.
+
+    Reads /proc, so it only reports on Linux; returns None elsewhere.
+    """
+    try:
+        root_pid = int(driver.capabilities.get("moz:processID"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if not os.path.isdir("/proc"):
+        return None
+
+    children: Dict[int, list] = {}
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            children.setdefault(ppid, []).append(int(pid))
+        except (OSError, IndexError, ValueError):
+            continue
+
+    total_kb, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return round(total_kb / 1024, 1) if total_kb else None
+
+
+_pools: Dict[str, DriverPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_driver_pool(store_name: str) -> DriverPool:
+    """Return the shared driver pool for a retailer, creating it on first use."""
+    from .factory import ScraperFactory
+
+    store_key = store_name.lower().replace(" ", "")
+    with _pools_lock:
+        pool = _pools.get(store_key)
+        if pool is None:
+            scraper_class = ScraperFactory.get_scraper_class(store_key)
+            pool = DriverPool(
+                store_key,
+                lambda: scraper_class(headless=Config.DRIVER_HEADLESS).driver,
+                size=Config.DRIVER_POOL_SIZES.get(store_key, Config.DRIVER_POOL_SIZE),
+            )
+            _pools[store_key] = pool
+        return pool
+
+
+def prewarm_driver_pools():
+    """Start the configured number of browsers for every retailer that may need one."""
+    from .factory import ScraperFactory
+    from .fetch_backends import BACKEND_HTTP
+
+    for store_name in ScraperFactory.get_available_stores():
+        if ScraperFactory.get_fetch_backend(store_name) != BACKEND_HTTP:
+            get_driver_pool(store_name).prewarm()
+
+
+def close_driver_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def driver_pool_stats() -> Dict[str, Dict[str, int]]:
+    with _pools_lock:
+        return {name: pool.stats() for name, pool in _pools.items()}
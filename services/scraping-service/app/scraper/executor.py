@@ -0,0 +1,223 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+from .config import Config
+from .utils import logger
+
+
+class ScrapeQueueFull(Exception):
+    """Raised when a retailer already has as many scrapes queued as allowed."""
+
+    def __init__(self, retailer: str, retry_after: int):
+        super().__init__(f"Too many {retailer} scrapes in progress, retry later")
+        self.retailer = retailer
+        self.retry_after = retry_after
+
+
+class ScrapeCancelled(Exception):
+    """Raised when a scrape is abandoned because its client went away."""
+
+
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "scrape_cancel_event", default=None
+)
+
+
+def scrape_cancelled() -> bool:
+    """Whether the scrape running in this thread has been cancelled.
+
+    Long scrapes call this between pages so a disconnected client stops the
+    work at the next page boundary.
+    """
+    event = _cancel_event.get()
+    return bool(event and event.is_set())
+
+
+def raise_if_cancelled():
+    if scrape_cancelled():
+        raise ScrapeCancelled("Scrape cancelled")
+
+
+class ScrapeExecutor:
+    """Runs blocking Selenium/BeautifulSoup scrapes off the event loop.
+
+    Work goes to a dedicated thread pool. Each retailer has a concurrency
+    limit (how many of its scrapes run at once) and a queue depth limit (how
+    many may be running or waiting); past that, callers get ScrapeQueueFull
+    so the route can answer 429 instead of piling up requests.
+    """
+
+    def __init__(self, max_workers: int = Config.SCRAPE_MAX_WORKERS,
+                 concurrency: Optional[Dict[str, int]] = None,
+                 max_queue: int = Config.SCRAPE_MAX_QUEUE,
+                 disconnect_poll: float = 0.5):
+        self.max_workers = max_workers
+        self.concurrency = concurrency if concurrency is not None else dict(Config.SCRAPE_CONCURRENCY)
+        self.max_queue = max_queue
+        self.disconnect_poll = disconnect_poll
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scrape")
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self._pending: Dict[str, int] = {}
+        self._running: Dict[str, int] = {}
+        self._loop = None
+
+    def _slot(self, retailer: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._slots = {}
+            self._loop = loop
+        slot = self._slots.get(retailer)
+        if slot is None:
+            slot = self._slots[retailer] = asyncio.Semaphore(self.concurrency.get(retailer, 1))
+        return slot
+
+    def check_capacity(self, retailer: str):
+        """Raise ScrapeQueueFull if another scrape for ``retailer`` would be refused."""
+        if self._pending.get(retailer, 0) >= self.max_queue:
+            # Roughly one scrape's worth of waiting per queued request
+            raise ScrapeQueueFull(retailer, retry_after=30 * self.max_queue)
+
+    def _admit(self, retailer: str):
+        self.check_capacity(retailer)
+        self._pending[retailer] = self._pending.get(retailer, 0) + 1
+
+    def _release(self, retailer: str):
+        self._pending[retailer] -= 1
+
+    async def run(self, retailer: str, fn: Callable[..., Any], *args, request=None) -> Any:
+        """Run ``fn(*args)`` on the scrape pool and return its result.
+
+        When ``request`` is given, the client connection is watched and the
+        scrape is cancelled if it disconnects.
+        """
+        self._admit(retailer)
+        try:
+            task = asyncio.ensure_future(self._execute(retailer, fn, args))
+            if request is None:
+                return await task
+            return await self._watch(task, request)
+        finally:
+            self._release(retailer)
+
+    async def stream(self, retailer: str, fn: Callable[..., Iterable[Any]], *args,
+                     request=None, buffer: int = Config.SCRAPE_STREAM_BUFFER) -> AsyncIterator[Any]:
+        """Run the generator ``fn(*args)`` on the scrape pool, yielding items as they are produced.
+
+        The worker thread hands items over through a bounded queue, so a slow
+        consumer pauses the scrape instead of buffering it. Closing the
+        iterator early, or the client disconnecting, cancels the scrape.
+        """
+        self._admit(retailer)
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+
+        def produce():
+            for item in fn(*args):
+                raise_if_cancelled()
+                put = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+                while True:
+                    try:
+                        put.result(timeout=self.disconnect_poll)
+                        break
+                    except concurrent.futures.TimeoutError:
+                        if scrape_cancelled():
+                            put.cancel()
+                            raise ScrapeCancelled("Scrape cancelled")
+
+        task = asyncio.ensure_future(self._execute(retailer, produce, ()))
+        getter = None
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait(
+                    {getter, task}, timeout=self.disconnect_poll, return_when=asyncio.FIRST_COMPLETED
+                )
+                if getter in done:
+                    yield getter.result()
+                    continue
+                getter.cancel()
+                if task in done:
+                    while not queue.empty():
+                        yield queue.get_nowait()
+                    task.result()  # Surface the scrape's error, if any
+                    return
+                if request is not None and await request.is_disconnected():
+                    logger.info(f"Client disconnected, cancelling scrape for {request.url.path}")
+                    raise ScrapeCancelled("Client disconnected")
+        finally:
+            if getter is not None:
+                getter.cancel()
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, ScrapeCancelled):
+                    pass
+            self._release(retailer)
+
+    async def _execute(self, retailer: str, fn: Callable[..., Any], args) -> Any:
+        loop = asyncio.get_running_loop()
+        slot = self._slot(retailer)
+        await slot.acquire()
+        self._running[retailer] = self._running.get(retailer, 0) + 1
+
+        cancel_event = threading.Event()
+        token = _cancel_event.set(cancel_event)
+        context = contextvars.copy_context()
+        _cancel_event.reset(token)
+
+        def finished(_):
+            # Free the slot only once the thread is really done with its browser
+            try:
+                loop.call_soon_threadsafe(self._finish, retailer, slot)
+            except RuntimeError:
+                pass  # The loop closed before the scrape finished; its slots went with it
+
+        future = self._pool.submit(context.run, fn, *args)
+        future.add_done_callback(finished)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A running thread cannot be interrupted; ask it to stop at the next checkpoint
+            cancel_event.set()
+            future.cancel()
+            raise
+
+    def _finish(self, retailer: str, slot: asyncio.Semaphore):
+        self._running[retailer] -= 1
+        slot.release()
+
+    async def _watch(self, task: asyncio.Future, request) -> Any:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=self.disconnect_poll)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                logger.info(f"Client disconnected, cancelling scrape for {request.url.path}")
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                raise ScrapeCancelled("Client disconnected")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        retailers = set(self._pending) | set(self.concurrency)
+        return {
+            retailer: {
+                "concurrency": self.concurrency.get(retailer, 1),
+                "running": self._running.get(retailer, 0),
+                "queued": max(0, self._pending.get(retailer, 0) - self._running.get(retailer, 0)),
+                "max_queue": self.max_queue,
+            }
+            for retailer in sorted(retailers)
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+scrape_executor = ScrapeExecutor()
@@ -40,20 +40,32 @@ class ProductExtractor:
         """Extract product price using the provided selector. Converts pence to pounds when needed."""
         price_tag = soup.select_one(selector)
         if price_tag:
-            price_text = price_tag.text.strip().lower()
-            # Check if it's in pence (e.g., '52p')
-            is_pence = 'p' in price_text
+            return ProductExtractor.parse_price(price_tag.text)
+        return None
 
-            # Remove non-numeric characters except '.' (e.g., £, p, whitespace)
-            price_clean = ''.join(filter(lambda x: x.isdigit() or x == '.', price_text))
+    @staticmethod
+    def parse_price(price_text: Optional[str]) -> Optional[float]:
+        """Parse a price such as '£1.25' or '52p' into pounds."""
+        if price_text is None:
+            return None
+        price_text = price_text.strip().lower()
+        # Check if it's in pence (e.g., '52p')
+        is_pence = 'p' in price_text
 
-            try:
-                price = float(price_clean)
-                # Convert pence to pounds
-                return round(price / 100, 2) if is_pence else round(price, 2)
-            except ValueError:
-                return None
-        return None
+        # Remove non-numeric characters except '.' (e.g., £, p, whitespace)
+        price_clean = ''.join(filter(lambda x: x.isdigit() or x == '.', price_text))
+
+        try:
+            price = float(price_clean)
+            # Convert pence to pounds
+            return round(price / 100, 2) if is_pence else round(price, 2)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def clean_text(text: Optional[str]) -> Optional[str]:
+        """Strip text pulled from a tag, keeping None for a missing tag."""
+        return text.strip() if text is not None else None
 
     
     @staticmethod
@@ -67,11 +79,18 @@ class ProductExtractor:
         """Extract size from product name."""
         name_tag = soup.select_one(selector)
         if name_tag:
-            name_text = name_tag.text.strip()
-            # Look for size patterns like "600g" or "2 Litres"
-            size_match = re.search(r'(\d+\s*(g|kg|ml|l|litre|litres))', name_text, re.IGNORECASE)
-            if size_match:
-                return size_match.group(1)
+            return ProductExtractor.parse_size(name_tag.text)
+        return None
+
+    @staticmethod
+    def parse_size(name_text: Optional[str]) -> Optional[str]:
+        """Find a size such as "600g" or "2 Litres" in a product name."""
+        if name_text is None:
+            return None
+        # Longest units first, so "2 Litres" is not cut short to "2 L"
+        size_match = re.search(r'(\d+\s*(kg|g|ml|litres|litre|l))\b', name_text.strip(), re.IGNORECASE)
+        if size_match:
+            return size_match.group(1)
         return None
     
     # @staticmethod
@@ -99,29 +118,32 @@ class ProductExtractor:
     @staticmethod
     def extract_image_url(soup: BeautifulSoup, selector: str = 'img[src]') -> Optional[str]:
         """Extract product image URL with better handling of lazy loading."""
-        # First try the direct img src
         img_tag = soup.select_one(selector)
-        if img_tag and img_tag.has_attr('src'):
-            src = img_tag['src']
-            if src and not src.startswith('data:'):  # Skip placeholder images
-                return src
-        
-        # Then try the picture > source srcset
         source_tag = soup.select_one('picture source[srcset]')
-        if source_tag:
-            srcset = source_tag['srcset']
-            if srcset:
-                # Get the first URL from srcset (highest resolution usually first)
-                first_url = srcset.split(',')[0].strip().split(' ')[0]
-                if first_url and not first_url.startswith('data:'):
-                    return first_url
-        
-        # Finally, check for lazy-loaded images (data-src attributes)
         lazy_img = soup.select_one('img[data-src]')
-        if lazy_img and lazy_img.has_attr('data-src'):
-            return lazy_img['data-src']
-        
-        return None
+        return ProductExtractor.pick_image_url(
+            img_tag.get('src') if img_tag else None,
+            source_tag.get('srcset') if source_tag else None,
+            lazy_img.get('data-src') if lazy_img else None,
+        )
+
+    @staticmethod
+    def pick_image_url(src: Optional[str], srcset: Optional[str] = None,
+                       data_src: Optional[str] = None) -> Optional[str]:
+        """Choose an image URL from an img src, a picture srcset or a lazy-load data-src."""
+        # First try the direct img src
+        if src and not src.startswith('data:'):  # Skip placeholder images
+            return src
+
+        # Then try the picture > source srcset
+        if srcset:
+            # Get the first URL from srcset (highest resolution usually first)
+            first_url = srcset.split(',')[0].strip().split(' ')[0]
+            if first_url and not first_url.startswith('data:'):
+                return first_url
+
+        # Finally, check for lazy-loaded images (data-src attributes)
+        return data_src
 
     
     @staticmethod
@@ -135,16 +157,22 @@ class ProductExtractor:
         """Extract the product rating from the image alt attribute."""
         rating_element = soup.select_one(selector)
         if rating_element and rating_element.has_attr(attr):
-            try:
-                rating_text = rating_element[attr]
-                # Handle both "4.4548" and "4_5" formats
-                if '_' in rating_text:  # Like "4_5" meaning 4.5
-                    parts = rating_text.split('_')
-                    return float(f"{parts[0]}.{parts[1]}")
-                return float(rating_text)
-            except (ValueError, IndexError):
-                return None
+            return ProductExtractor.parse_rating(rating_element[attr])
         return None
+
+    @staticmethod
+    def parse_rating(rating_text: Optional[str]) -> Optional[float]:
+        """Parse a rating written as "4.4548" or "4_5" (meaning 4.5)."""
+        if rating_text is None:
+            return None
+        try:
+            # Handle both "4.4548" and "4_5" formats
+            if '_' in rating_text:  # Like "4_5" meaning 4.5
+                parts = rating_text.split('_')
+                return float(f"{parts[0]}.{parts[1]}")
+            return float(rating_text)
+        except (ValueError, IndexError):
+            return None
     
     def _extract_morrisons_rating(soup: BeautifulSoup, selector: str):
         """Extract Morrisons-specific rating"""
@@ -226,12 +254,17 @@ class ProductExtractor:
         """Extract product link using the provided selector."""
         link_tag = soup.select_one(selector)
         if link_tag and 'href' in link_tag.attrs:
-            href = link_tag['href']
-            # Add base URL if the href is relative
-            if href.startswith('/'):
-                return base_url + href
-            return href
+            return ProductExtractor.absolute_url(link_tag['href'], base_url)
         return None
+
+    @staticmethod
+    def absolute_url(href: Optional[str], base_url: str) -> Optional[str]:
+        """Add the base URL to a relative href."""
+        if href is None:
+            return None
+        if href.startswith('/'):
+            return base_url + href
+        return href
     
     @staticmethod
     def extract_external_id(url):
@@ -1,5 +1,7 @@
 from typing import Dict, Type
 from .base import BaseScraper
+from .config import Config
+from .fetch_backends import BACKEND_AUTO, BACKEND_BROWSER, FETCH_BACKENDS
 from ..scraper.controller.tesco import TescoScraper
 from ..scraper.controller.aldi import AldiScraper
 from ..scraper.controller.iceland import IcelandScraper
@@ -20,6 +22,16 @@ class ScraperFactory:
          "sainsbury": SainsburyScraper,
          "morrison" : MorrisonScraper
     }
+
+    # How each retailer's listings are fetched; <RETAILER>_FETCH_BACKEND overrides these.
+    # Aldi, Iceland and Sainsbury render their listings server-side, Tesco and Morrisons in the browser.
+    _fetch_backends: Dict[str, str] = {
+        "tesco": BACKEND_BROWSER,
+        "aldi": BACKEND_AUTO,
+        "iceland": BACKEND_AUTO,
+        "sainsbury": BACKEND_AUTO,
+        "morrison": BACKEND_BROWSER,
+    }
     
     @classmethod
     def get_scraper(cls, store_name: str, **kwargs) -> BaseScraper:
@@ -31,11 +43,34 @@ class ScraperFactory:
         else:
             available_stores = ", ".join(cls._registry.keys())
             raise ValueError(f"No scraper available for '{store_name}'. Available stores: {available_stores}")
+
+    @classmethod
+    def get_scraper_class(cls, store_name: str) -> Type[BaseScraper]:
+        """Return the scraper class registered for a store without instantiating it."""
+        store_key = store_name.lower().replace(" ", "")
+
+        if store_key in cls._registry:
+            return cls._registry[store_key]
+        available_stores = ", ".join(cls._registry.keys())
+        raise ValueError(f"No scraper available for '{store_name}'. Available stores: {available_stores}")
     
     @classmethod
-    def register_scraper(cls, store_name: str, scraper_class: Type[BaseScraper]) -> None:
+    def get_fetch_backend(cls, store_name: str) -> str:
+        """Return how a store's listings are fetched: 'http', 'browser' or 'auto'."""
+        store_key = store_name.lower().replace(" ", "")
+        backend = Config.FETCH_BACKENDS.get(store_key) or cls._fetch_backends.get(store_key, BACKEND_BROWSER)
+        if backend not in FETCH_BACKENDS:
+            raise ValueError(f"Unknown fetch backend '{backend}' for {store_key}. "
+                             f"Available backends: {', '.join(FETCH_BACKENDS)}")
+        return backend
+
+    @classmethod
+    def register_scraper(cls, store_name: str, scraper_class: Type[BaseScraper],
+                         fetch_backend: str = BACKEND_BROWSER) -> None:
         """Register a new scraper class."""
-        cls._registry[store_name.lower().replace(" ", "")] = scraper_class
+        store_key = store_name.lower().replace(" ", "")
+        cls._registry[store_key] = scraper_class
+        cls._fetch_backends[store_key] = fetch_backend
     
     @classmethod
     def get_available_stores(cls) -> list:
@@ -0,0 +1,138 @@
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .base import BaseScraper, IncompleteScrape, PageFetchError
+from .config import Config
+from .executor import raise_if_cancelled
+from .profiles import profile_manager
+from .specs import ExtractionSpec, products_from_tiles
+from .utils import logger
+
+# How a retailer's listing pages are fetched
+BACKEND_HTTP = "http"  # Plain HTTP through BaseScraper, parsed with the retailer's ExtractionSpec
+BACKEND_BROWSER = "browser"  # A pooled headless Firefox
+BACKEND_AUTO = "auto"  # HTTP first, falling back to the browser when the listing has no product tiles
+FETCH_BACKENDS = (BACKEND_HTTP, BACKEND_BROWSER, BACKEND_AUTO)
+
+# Stands in for the WebDriver of a controller used only for its tile builders
+NO_BROWSER = object()
+
+
+class BrowserRequired(Exception):
+    """Raised when a listing cannot be read over plain HTTP, e.g. because JavaScript renders its tiles."""
+
+
+class HttpListingScraper(BaseScraper):
+    """Reads a retailer's listing pages over plain HTTP.
+
+    Pages are parsed with the retailer's ExtractionSpec and turned into
+    products by its controller's tile builder, so both backends produce the
+    same products for the same markup. Controllers with a ``_page_plan``
+    (Aldi) have their later pages followed as well. With ``probe`` the first
+    page is fetched as a probe (see BaseScraper.fetch_html), as auto mode
+    does before falling back to the browser.
+    """
+
+    # A page without product tiles is told apart by the spec rather than by its text
+    content_marker = None
+
+    def __init__(self, controller, spec: ExtractionSpec, store_key: Optional[str] = None,
+                 probe: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.controller = controller
+        self.spec = spec
+        self.probe = probe
+        self.base_url = controller.base_url
+        self.pages_loaded = 0
+        if store_key is not None:
+            # Start from the cookies and consent state the retailer's browsers have collected
+            for cookie in profile_manager.cookies(store_key):
+                self.session.cookies.set(
+                    cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"],
+                    secure=cookie["secure"], expires=cookie["expires"],
+                )
+
+    def read_listing(self, url: str, probe: bool = False) -> Tuple[List[Dict[str, Any]], Dict[str, Any], int]:
+        """Fetch one listing page, returning its products, page fields and tile count."""
+        html = self.fetch_html(url, probe=probe)
+        self.pages_loaded += 1
+        result = self.spec.extract_html(html)
+        products = products_from_tiles(result["tiles"], self.controller._product_from_fields, self.spec.store)
+        return products, result["page"], len(result["tiles"])
+
+    def iter_groceries(self) -> Iterator[Dict[str, Any]]:
+        """Yield the groceries listing's products page by page.
+
+        Raises BrowserRequired, before yielding anything, when the first
+        page cannot be fetched or has no product tiles, and IncompleteScrape,
+        after yielding the rest, when a later page cannot be fetched.
+        """
+        url = self.controller.groceries_url
+        try:
+            products, page, tiles = self.read_listing(url, probe=self.probe)
+        except PageFetchError as e:
+            raise BrowserRequired(f"Could not fetch {url} over HTTP: {e}") from e
+        if not tiles:
+            raise BrowserRequired(f"No '{self.spec.tile}' tiles in the HTML of {url}")
+        yield from products
+
+        page_plan = getattr(self.controller, "_page_plan", None)
+        if page_plan is None:
+            return
+        page_count, page_url = page_plan(page)
+        if page_url is None:
+            return
+        missing = []
+        for number in range(2, page_count + 1):
+            raise_if_cancelled()  # Stop between pages once the client has gone
+            try:
+                products, _, _ = self.read_listing(page_url(number))
+            except PageFetchError as e:
+                logger.error(f"Failed to load {self.spec.store} page {number} over HTTP: {e}")
+                missing.append(number)
+                continue
+            yield from products
+        if missing:
+            raise IncompleteScrape(f"{self.spec.store} pages {missing} of {page_count} could not be loaded over HTTP")
+
+
+_usage: Dict[str, Dict[str, Any]] = {}
+_usage_lock = threading.Lock()
+_browser_until: Dict[str, float] = {}  # Retailers auto mode sends straight to the browser, until when
+
+
+def browser_required(store_key: str) -> bool:
+    """Whether auto mode found the retailer's listing needs the browser recently enough not to try HTTP again."""
+    with _usage_lock:
+        return _browser_until.get(store_key, 0.0) > time.monotonic()
+
+
+def remember_browser_required(store_key: str, ttl: float = Config.FETCH_AUTO_RECHECK):
+    with _usage_lock:
+        _browser_until[store_key] = time.monotonic() + ttl
+
+
+def record_fetch_backend(store_key: str, backend: str, fell_back: bool = False):
+    """Count a finished scrape against the backend that served it."""
+    with _usage_lock:
+        usage = _usage.setdefault(store_key, {BACKEND_HTTP: 0, BACKEND_BROWSER: 0, "fallbacks": 0})
+        usage[backend] += 1
+        usage["fallbacks"] += int(fell_back)
+        usage["last"] = backend
+
+
+def last_fetch_backend(store_key: str) -> Optional[str]:
+    """The backend of a retailer's most recent finished scrape."""
+    with _usage_lock:
+        return _usage.get(store_key, {}).get("last")
+
+
+def fetch_backend_stats() -> Dict[str, Dict[str, Any]]:
+    from .factory import ScraperFactory
+
+    with _usage_lock:
+        usage = {store_key: dict(counts) for store_key, counts in _usage.items()}
+    return {
+        store_key: {"configured": ScraperFactory.get_fetch_backend(store_key), **usage.get(store_key, {})}
+        for store_key in ScraperFactory.get_available_stores()
+    }
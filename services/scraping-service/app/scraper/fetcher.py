@@ -0,0 +1,99 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set
+from urllib.parse import urlparse
+import httpx
+from .config import Config
+
+
+class AsyncFetcher:
+    """Shared asyncio HTTP client with connection pooling and per-host caps.
+
+    One pooled HTTP/2 client is kept per proxy so connections are reused
+    across scrapers, and a semaphore per host bounds how many requests are in
+    flight against any single retailer.
+    """
+
+    def __init__(self, max_connections: int = Config.FETCH_MAX_CONNECTIONS,
+                 max_per_host: int = Config.FETCH_MAX_PER_HOST,
+                 timeout: float = Config.FETCH_TIMEOUT,
+                 http2: bool = Config.FETCH_HTTP2):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.http2 = http2
+        self._clients: Dict[Optional[str], httpx.AsyncClient] = {}
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._loop = None
+        self._closing: Set[asyncio.Future] = set()
+
+    def _bind_loop(self):
+        # Clients and semaphores belong to the loop that created them
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            stale, previous = list(self._clients.values()), self._loop
+            self._clients = {}
+            self._host_slots = {}
+            self._loop = loop
+            for client in stale:
+                self._close_later(client, previous)
+
+    def _close_later(self, client: httpx.AsyncClient, loop):
+        """Close a client left behind by another loop, on that loop if it still runs."""
+        if loop is not None and loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+                return
+            except RuntimeError:
+                pass  # Closed in the meantime
+        task = asyncio.ensure_future(_aclose_quietly(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def client(self, proxy: Optional[str] = None) -> httpx.AsyncClient:
+        """Return the pooled client for a proxy (or direct connections)."""
+        self._bind_loop()
+        client = self._clients.get(proxy)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                proxies=proxy,
+                timeout=self.timeout,
+                follow_redirects=True,
+                cookies={'notice_behavior': 'expressed,eu'},  # Bypass cookie notice
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            self._clients[proxy] = client
+        return client
+
+    @asynccontextmanager
+    async def host_slot(self, url: str):
+        """Hold one of the per-host concurrency slots for ``url``."""
+        self._bind_loop()
+        host = urlparse(url).netloc
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        async with slot:
+            yield
+
+    async def aclose(self):
+        clients = list(self._clients.values())
+        self._clients = {}
+        for client in clients:
+            await client.aclose()
+        if self._closing:
+            await asyncio.gather(*self._closing)
+
+
+async def _aclose_quietly(client: httpx.AsyncClient):
+    try:
+        await client.aclose()
+    except Exception:
+        pass  # Its connections died with the loop that opened them
+
+
+fetcher = AsyncFetcher()
@@ -0,0 +1,373 @@
+import base64
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import closing
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from lxml import etree
+from .base import PageFetchError
+from .changes import product_key
+from .config import Config
+from .parsing import parse_tree
+from .utils import logger
+
+# Kinds of URL on a crawl frontier
+URL_PAGE = "page"  # A further page of a listing already being crawled
+URL_CATEGORY = "category"  # A category listing, or a seed
+
+# Links a page offers the crawl, including pagination declared in the head
+LINKS = etree.XPath("//a/@href | //link[@rel='next']/@href")
+
+
+class BloomFilter:
+    """Compact set of seen keys with a bounded false-positive rate.
+
+    Sized for ``capacity`` keys at ``error_rate``: a key that was never added
+    is taken as seen with that probability, an added one is never missed.
+    Past its capacity the error rate climbs, which ``stats`` shows as the
+    fill ratio.
+    """
+
+    def __init__(self, capacity: int = Config.CRAWL_SEEN_CAPACITY,
+                 error_rate: float = Config.CRAWL_SEEN_ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterator[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key: str) -> bool:
+        """Add a key, returning False when it was (or looks) already seen."""
+        added = False
+        for p in self._positions(key):
+            if not self.bits[p >> 3] & (1 << (p & 7)):
+                self.bits[p >> 3] |= 1 << (p & 7)
+                added = True
+        self.count += added
+        return added
+
+    def fill_ratio(self) -> float:
+        return round(int.from_bytes(self.bits, "little").bit_count() / self.size, 4)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"size": self.size, "hashes": self.hashes, "count": self.count,
+                "bits": base64.b64encode(zlib.compress(bytes(self.bits))).decode()}
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "BloomFilter":
+        bloom = cls.__new__(cls)
+        bloom.size, bloom.hashes, bloom.count = state["size"], state["hashes"], state["count"]
+        bloom.bits = bytearray(zlib.decompress(base64.b64decode(state["bits"])))
+        return bloom
+
+
+class CrawlRules:
+    """Which links on a retailer's pages the catalogue crawl follows.
+
+    ``category`` matches the paths of category listings and ``page_param``
+    is the query parameter numbering a listing's pages, ``first_page`` being
+    the value of the page without it. Every other query parameter is dropped,
+    so sort orders and tracking tags do not make a known listing look new.
+    """
+
+    def __init__(self, category: str, page_param: str = "page", first_page: str = "1"):
+        self.category = re.compile(category)
+        self.page_param = page_param
+        self.first_page = first_page
+
+    def classify(self, url: str, host: str) -> Optional[Tuple[str, str]]:
+        """Return ``(normalised url, kind)`` for a link the crawl follows, None for any other link."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or parts.netloc != host:
+            return None
+        path = parts.path.rstrip("/") or "/"
+        if not self.category.match(path):
+            return None
+        page = dict(parse_qsl(parts.query)).get(self.page_param)
+        if not page or page == self.first_page:
+            return urlunsplit((parts.scheme, host, path, "", "")), URL_CATEGORY
+        return urlunsplit((parts.scheme, host, path, urlencode({self.page_param: page}), "")), URL_PAGE
+
+
+# Category paths per retailer; product pages never match them
+CRAWL_RULES = {
+    "tesco": CrawlRules(r"^/groceries/en-GB/shop(/[\w-]+){1,4}/all$"),
+    "aldi": CrawlRules(r"^/en-GB(/[a-z][a-z-]*){1,3}$"),
+    "iceland": CrawlRules(r"^/(?!p/)[a-z][a-z-]*(/[a-z][a-z-]*){0,2}$", page_param="start", first_page="0"),
+    "sainsbury": CrawlRules(r"^/shop/gb/groceries(/[\w-]+){1,3}$", page_param="beginIndex", first_page="0"),
+    "morrison": CrawlRules(r"^/categories(/[\w-]+){0,3}$"),
+}
+
+
+def crawl_seeds(retailer: str) -> List[str]:
+    """Where a retailer's crawl starts: CRAWL_SEEDS, or its home page and groceries listing."""
+    base_url, groceries_url = Config.RETAILER_URLS[retailer]
+    seeds = Config.CRAWL_SEEDS.get(retailer) or [base_url + "/", groceries_url]
+    return [urljoin(base_url + "/", seed) for seed in seeds]
+
+
+def discover_links(tree, page_url: str, rules: CrawlRules, host: str) -> List[Tuple[str, str]]:
+    """The category and pagination links on a parsed page, normalised, in page order."""
+    links = []
+    for href in LINKS(tree):
+        link = rules.classify(urljoin(page_url, href.strip()), host)
+        if link is not None:
+            links.append(link)
+    return links
+
+
+class FrontierEntry(NamedTuple):
+    """A queued URL. Entries order by depth, then further listing pages ahead of new categories, then age."""
+    depth: int
+    rank: int
+    seq: int
+    url: str
+
+    @property
+    def kind(self) -> str:
+        return URL_PAGE if self.rank == 0 else URL_CATEGORY
+
+
+class CrawlFrontier:
+    """Priority queue of a crawl's unvisited URLs, deduplicated by a Bloom filter of every URL ever queued.
+
+    A popped entry stays in flight until ``done``, so a checkpoint taken
+    before then queues it again.
+    """
+
+    def __init__(self, seen: Optional[BloomFilter] = None):
+        self.seen = seen or BloomFilter()
+        self._heap: List[FrontierEntry] = []
+        self._in_flight: Dict[str, FrontierEntry] = {}
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._heap) + len(self._in_flight)
+
+    def push(self, url: str, depth: int, kind: str = URL_CATEGORY) -> bool:
+        """Queue a URL unless it was queued before."""
+        if not self.seen.add(url):
+            return False
+        heapq.heappush(self._heap, FrontierEntry(depth, 0 if kind == URL_PAGE else 1, self._seq, url))
+        self._seq += 1
+        return True
+
+    def pop(self) -> Optional[FrontierEntry]:
+        if not self._heap:
+            return None
+        entry = heapq.heappop(self._heap)
+        self._in_flight[entry.url] = entry
+        return entry
+
+    def done(self, entry: FrontierEntry):
+        self._in_flight.pop(entry.url, None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "queue": [list(entry) for entry in sorted(self._heap + list(self._in_flight.values()))],
+            "seq": self._seq,
+            "seen": self.seen.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "CrawlFrontier":
+        frontier = cls(BloomFilter.from_dict(state["seen"]))
+        frontier._heap = [FrontierEntry(*entry) for entry in state["queue"]]
+        heapq.heapify(frontier._heap)
+        frontier._seq = state["seq"]
+        return frontier
+
+
+class FrontierStore:
+    """Crawl checkpoints in a local SQLite file, one row per crawl."""
+
+    def __init__(self, path: str = Config.FRONTIER_DB):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS frontiers ("
+                "crawl_id TEXT PRIMARY KEY, retailer TEXT NOT NULL, state TEXT NOT NULL, "
+                "pages INTEGER NOT NULL, produced INTEGER NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def save(self, crawl_id: str, retailer: str, state: Dict[str, Any]):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO frontiers (crawl_id, retailer, state, pages, produced, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (crawl_id, retailer, json.dumps(state), state["pages"], state["produced"], time.time()),
+            )
+
+    def load(self, crawl_id: str) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT state FROM frontiers WHERE crawl_id = ?", (crawl_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, crawl_id: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM frontiers WHERE crawl_id = ?", (crawl_id,))
+
+
+class CatalogueCrawl:
+    """One retailer's catalogue crawl, resumable from its last checkpoint.
+
+    Pages come off the frontier nearest the seeds first, a listing's further
+    pages ahead of new categories at the same depth. Each page's category
+    and pagination links are queued unless they were seen before, and its
+    products are yielded unless an earlier page already had them. The
+    frontier is checkpointed every ``checkpoint_every`` pages, after the
+    caller has taken the products of the pages before it, so a resumed crawl
+    neither skips nor repeats a page: ``produced`` tells the caller how many
+    of the products it stored the checkpoint covers. The fetch backend the
+    crawl settled on is checkpointed with it, so a resumed crawl fetches
+    its pages the same way.
+    """
+
+    def __init__(self, retailer: str, crawl_id: str, store: Optional[FrontierStore] = None,
+                 rules: Optional[CrawlRules] = None, seeds: Optional[List[str]] = None,
+                 max_pages: int = Config.CRAWL_MAX_PAGES, max_depth: int = Config.CRAWL_MAX_DEPTH,
+                 checkpoint_every: int = Config.CRAWL_CHECKPOINT_PAGES):
+        self.retailer = retailer
+        self.crawl_id = crawl_id
+        self.store = store or FrontierStore()
+        self.rules = rules or CRAWL_RULES[retailer]
+        self.host = urlsplit(Config.RETAILER_URLS[retailer][0]).netloc
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.checkpoint_every = max(1, checkpoint_every)
+
+        state = self.store.load(crawl_id)
+        self.resumed = state is not None
+        if state is not None:
+            self.frontier = CrawlFrontier.from_dict(state["frontier"])
+            self.products = BloomFilter.from_dict(state["products"])
+            self.pages, self.produced, self.errors = state["pages"], state["produced"], state["errors"]
+            self.backend: Optional[str] = state.get("backend")  # Checkpoints from before it was kept have none
+        else:
+            self.frontier = CrawlFrontier()
+            self.products = BloomFilter()
+            self.pages = self.produced = self.errors = 0
+            self.backend = None
+            for seed in seeds or crawl_seeds(retailer):
+                self.frontier.push(seed, 0)
+
+    def iter_pages(self, fetch: Callable[[str], str],
+                   build: Callable[[Any], List[Dict[str, Any]]]) -> Iterator[List[Dict[str, Any]]]:
+        """Yield each crawled page's new products.
+
+        ``fetch`` returns a URL's HTML, raising PageFetchError for a page
+        that cannot be had, and ``build`` turns the parsed page into
+        products. The checkpoint is removed once the frontier runs dry or
+        ``max_pages`` is reached.
+        """
+        _register(self)
+        try:
+            since_checkpoint = 0
+            while self.pages < self.max_pages:
+                entry = self.frontier.pop()
+                if entry is None:
+                    break
+                try:
+                    html = fetch(entry.url)
+                except PageFetchError as e:
+                    logger.warning(f"Skipping {self.retailer} crawl page {entry.url}: {e}")
+                    self.errors += 1
+                    self.frontier.done(entry)
+                    continue
+                self.pages += 1
+
+                tree = parse_tree(html) if html.strip() else None
+                products = []
+                if tree is not None:
+                    self._queue_links(tree, entry)
+                    products = [p for p in build(tree) if self._is_new(p)]
+                self.produced += len(products)
+                yield products
+
+                self.frontier.done(entry)
+                since_checkpoint += 1
+                if since_checkpoint >= self.checkpoint_every:
+                    self.checkpoint()
+                    since_checkpoint = 0
+            if self.pages >= self.max_pages and len(self.frontier):
+                logger.warning(f"{self.retailer} crawl stopped at {self.max_pages} pages, "
+                               f"{len(self.frontier)} left on the frontier")
+            self.store.delete(self.crawl_id)
+        finally:
+            _unregister(self)
+
+    def _queue_links(self, tree, entry: FrontierEntry):
+        for url, kind in discover_links(tree, entry.url, self.rules, self.host):
+            depth = entry.depth + (kind == URL_CATEGORY)
+            if depth <= self.max_depth:
+                self.frontier.push(url, depth, kind)
+
+    def _is_new(self, product: Dict[str, Any]) -> bool:
+        key = product_key(product)
+        return key is None or self.products.add(key)
+
+    def checkpoint(self):
+        self.store.save(self.crawl_id, self.retailer, {
+            "frontier": self.frontier.to_dict(),
+            "products": self.products.to_dict(),
+            "pages": self.pages,
+            "produced": self.produced,
+            "errors": self.errors,
+            "backend": self.backend,
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retailer": self.retailer,
+            "pages": self.pages,
+            "queued": len(self.frontier),
+            "produced": self.produced,
+            "errors": self.errors,
+            "urls_seen": self.frontier.seen.count,
+            "seen_fill": self.frontier.seen.fill_ratio(),
+            "resumed": self.resumed,
+            "backend": self.backend,
+        }
+
+
+_crawls: Dict[str, CatalogueCrawl] = {}
+_crawls_lock = threading.Lock()
+
+
+def _register(crawl: CatalogueCrawl):
+    with _crawls_lock:
+        _crawls[crawl.crawl_id] = crawl
+
+
+def _unregister(crawl: CatalogueCrawl):
+    with _crawls_lock:
+        _crawls.pop(crawl.crawl_id, None)
+
+
+def crawl_stats() -> Dict[str, Dict[str, Any]]:
+    """Progress of the catalogue crawls running in this process."""
+    with _crawls_lock:
+        crawls = list(_crawls.values())
+    return {crawl.crawl_id: crawl.stats() for crawl in crawls}
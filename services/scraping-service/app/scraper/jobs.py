@@ -0,0 +1,275 @@
+import asyncio
+import json
+import os
+import sqlite3
+import uuid
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from starlette.concurrency import run_in_threadpool
+from .breaker import CircuitOpen
+from .config import Config
+from .executor import ScrapeCancelled, ScrapeQueueFull, raise_if_cancelled, scrape_executor
+from .frontier import CatalogueCrawl, FrontierStore
+from .utils import logger
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED)
+
+# Job categories: the groceries listing, or every category and page of the retailer's site
+CATEGORY_GROCERIES = "freshgroceries"
+CATEGORY_CATALOGUE = "catalogue"
+
+
+class JobStore:
+    """Scrape jobs and their results in a local SQLite file.
+
+    Results are appended as the scrape produces them, so a job's partial
+    output is visible while it runs and everything survives a restart.
+    """
+
+    def __init__(self, path: str = Config.JOBS_DB):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, retailer TEXT NOT NULL, category TEXT NOT NULL, "
+                "options TEXT NOT NULL, status TEXT NOT NULL, error TEXT, "
+                "product_count INTEGER NOT NULL DEFAULT 0, created_at TEXT NOT NULL, "
+                "started_at TEXT, finished_at TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_results ("
+                "job_id TEXT NOT NULL, seq INTEGER NOT NULL, product TEXT NOT NULL, "
+                "PRIMARY KEY (job_id, seq))"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, retailer: str, category: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO jobs (id, retailer, category, options, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, retailer, category, json.dumps(options), JOB_QUEUED, datetime.now().isoformat()),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["options"] = json.loads(job["options"])
+        return job
+
+    def mark_running(self, job_id: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                (JOB_RUNNING, datetime.now().isoformat(), job_id),
+            )
+
+    def mark_finished(self, job_id: str, status: str, error: Optional[str] = None):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, error, datetime.now().isoformat(), job_id),
+            )
+
+    def append_results(self, job_id: str, products: List[Dict[str, Any]]):
+        """Append a batch of products to a job and bump its product count."""
+        if not products:
+            return
+        with closing(self._connect()) as conn, conn:
+            count = conn.execute(
+                "SELECT product_count FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()["product_count"]
+            conn.executemany(
+                "INSERT INTO job_results (job_id, seq, product) VALUES (?, ?, ?)",
+                [(job_id, count + i, json.dumps(p)) for i, p in enumerate(products)],
+            )
+            conn.execute(
+                "UPDATE jobs SET product_count = ? WHERE id = ?", (count + len(products), job_id)
+            )
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 500) -> List[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT product FROM job_results WHERE job_id = ? AND seq >= ? ORDER BY seq LIMIT ?",
+                (job_id, offset, limit),
+            ).fetchall()
+        return [json.loads(row["product"]) for row in rows]
+
+    def reset(self, job_id: str, keep: int = 0):
+        """Drop partial results, all but the first ``keep``, and queue the job again."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM job_results WHERE job_id = ? AND seq >= ?", (job_id, keep))
+            conn.execute(
+                "UPDATE jobs SET status = ?, product_count = ?, error = NULL, "
+                "started_at = NULL, finished_at = NULL WHERE id = ?",
+                (JOB_QUEUED, keep, job_id),
+            )
+
+    def unfinished(self) -> List[str]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status NOT IN (?, ?) ORDER BY created_at",
+                FINISHED_STATES,
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+
+class JobRunner:
+    """Runs stored scrape jobs in the background on the scrape executor."""
+
+    # Categories a job can request, mapped to the scrape that produces them
+    CATEGORIES = (CATEGORY_GROCERIES, CATEGORY_CATALOGUE)
+    BATCH_SIZE = 25
+
+    def __init__(self, store: Optional[JobStore] = None, frontiers: Optional[FrontierStore] = None):
+        self._store = store
+        self._frontiers = frontiers
+        self._tasks = set()
+
+    @property
+    def store(self) -> JobStore:
+        if self._store is None:
+            self._store = JobStore()
+        return self._store
+
+    @property
+    def frontiers(self) -> FrontierStore:
+        if self._frontiers is None:
+            self._frontiers = FrontierStore()
+        return self._frontiers
+
+    def submit(self, job_id: str):
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def resume(self):
+        """Queue again every job a previous process left unfinished.
+
+        A catalogue crawl keeps the results its last checkpoint covers and
+        carries on from there; any other job starts over.
+        """
+        for job_id in await run_in_threadpool(self._reset_unfinished):
+            self.submit(job_id)
+
+    def _reset_unfinished(self) -> List[str]:
+        job_ids = self.store.unfinished()
+        for job_id in job_ids:
+            keep = self._reset(job_id)
+            logger.info(f"Resuming interrupted scrape job {job_id}" + (f" from its checkpoint ({keep} products)"
+                                                                        if keep else ""))
+        return job_ids
+
+    def _reset(self, job_id: str) -> int:
+        """Queue a job again, keeping the results its crawl checkpoint covers; returns how many."""
+        checkpoint = self.frontiers.load(job_id)
+        keep = checkpoint["produced"] if checkpoint else 0
+        self.store.reset(job_id, keep)
+        return keep
+
+    async def _run(self, job_id: str):
+        # The store is SQLite, so its calls go to a thread rather than block the event loop
+        job = await run_in_threadpool(self.store.get, job_id)
+        retries = 0
+        while True:
+            try:
+                await scrape_executor.run(job["retailer"], self._scrape, job)
+                await run_in_threadpool(self.store.mark_finished, job_id, JOB_COMPLETED)
+                return
+            except ScrapeQueueFull:
+                # Jobs wait their turn instead of failing on backpressure
+                await asyncio.sleep(Config.JOB_RETRY_DELAY)
+            except CircuitOpen as e:
+                # The retailer is failing; wait for its next probe rather than fail the job. A crawl
+                # stopped part-way carries on from its checkpoint, so results past it are dropped
+                await run_in_threadpool(self._reset, job_id)
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                if (job["category"] == CATEGORY_CATALOGUE and not isinstance(e, ScrapeCancelled)
+                        and retries < Config.CRAWL_MAX_RETRIES):
+                    # A browser crash deep into a crawl should not throw away the pages behind it
+                    retries += 1
+                    keep = await run_in_threadpool(self._reset, job_id)
+                    logger.warning(f"Catalogue crawl {job_id} failed ({e}), resuming from its checkpoint "
+                                   f"({keep} products), retry {retries} of {Config.CRAWL_MAX_RETRIES}")
+                    await asyncio.sleep(Config.JOB_RETRY_DELAY)
+                    continue
+                logger.error(f"Scrape job {job_id} failed: {e}")
+                await run_in_threadpool(self._fail, job_id, str(e))
+                return
+
+    def _fail(self, job_id: str, error: str):
+        self.store.mark_finished(job_id, JOB_FAILED, error)
+        self.frontiers.delete(job_id)
+
+    def _scrape(self, job: Dict[str, Any]):
+        from .browse import iter_groceries
+
+        self.store.mark_running(job["id"])
+        if job["category"] == CATEGORY_CATALOGUE:
+            return self._crawl(job)
+        max_products = job["options"].get("max_products")
+        produced, batch = 0, []
+        for product in iter_groceries(job["retailer"]):
+            batch.append(product)
+            produced += 1
+            if len(batch) >= self.BATCH_SIZE:
+                self.store.append_results(job["id"], batch)
+                batch = []
+                raise_if_cancelled()
+            if max_products and produced >= max_products:
+                break
+        self.store.append_results(job["id"], batch)
+
+    def _crawl(self, job: Dict[str, Any]):
+        """Crawl the retailer's catalogue, storing each page's products before the crawl moves on.
+
+        Pages are stored one at a time so a checkpoint never runs ahead of
+        the stored results. ``max_pages`` and ``max_products`` options cap
+        the crawl.
+        """
+        from .browse import iter_catalogue
+
+        options = job["options"]
+        crawl = CatalogueCrawl(job["retailer"], job["id"], store=self.frontiers,
+                               max_pages=options.get("max_pages") or Config.CRAWL_MAX_PAGES)
+        max_products = options.get("max_products")
+        produced = crawl.produced
+        for products in iter_catalogue(job["retailer"], crawl):
+            if max_products:
+                products = products[:max_products - produced]
+            self.store.append_results(job["id"], products)
+            produced += len(products)
+            raise_if_cancelled()
+            if max_products and produced >= max_products:
+                break
+        self.frontiers.delete(job["id"])
+
+    def iter_results(self, job_id: str, batch: int = 500) -> Iterator[Dict[str, Any]]:
+        offset = 0
+        while True:
+            products = self.store.results(job_id, offset, batch)
+            if not products:
+                return
+            yield from products
+            offset += len(products)
+
+
+job_runner = JobRunner()
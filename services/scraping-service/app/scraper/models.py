@@ -63,6 +63,22 @@ class BulkScrapeRequest(BaseModel):
     urls: List[str]
     store: str
 
+class BulkScrapeResult(BaseModel):
+    """Outcome of scraping one URL in a bulk request."""
+    url: str
+    status: str  # ok, not_found, blocked, no_product_data or failed
+    product: Optional[ProductResponse] = None
+    error: Optional[str] = None
+
+class BulkScrapeResponse(BaseModel):
+    """Response model for bulk scraping; failed URLs do not fail the request."""
+    store: str
+    requested: int
+    unique: int
+    succeeded: int
+    failed: int
+    results: List[BulkScrapeResult]
+
 class ErrorResponse(BaseModel):
     """Response model for errors."""
     error: str
@@ -80,4 +96,38 @@ class HealthResponse(BaseModel):
     """Response model for health check."""
     status: str = "ok"
     version: str = "1.0.0"
-    timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
\ No newline at end of file
+    timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
+
+class JobRequest(BaseModel):
+    """Request model for a background scrape job."""
+    retailer: str
+    category: str = "freshgroceries"  # Or "catalogue" to crawl every category of the retailer
+    options: Dict[str, Any] = Field(default_factory=dict)
+
+class JobResponse(BaseModel):
+    """Response model for a scrape job's status."""
+    id: str
+    retailer: str
+    category: str
+    options: Dict[str, Any] = Field(default_factory=dict)
+    status: str
+    error: Optional[str] = None
+    product_count: int = 0
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    results: Optional[List[Dict[str, Any]]] = None
+
+class ProductChange(BaseModel):
+    """One entry in a retailer's change feed."""
+    change: str  # added, changed or removed
+    key: str  # external_id, or the product URL when the retailer gives none
+    product: ProductResponse  # Current product, or the last one seen when removed
+    changed_at: Optional[float] = None
+
+class ChangeFeedResponse(BaseModel):
+    """Response model for a retailer's change feed; pass ``cursor`` back as ``since`` to read on."""
+    retailer: str
+    cursor: str
+    more: bool
+    changes: List[ProductChange]
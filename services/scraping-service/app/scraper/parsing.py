@@ -0,0 +1,57 @@
+from functools import lru_cache
+from typing import Optional
+import lxml.html
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+from cssselect import HTMLTranslator
+from lxml import etree
+from .config import Config
+
+# "lxml" parses in C and builds only what is read; "html.parser" builds the whole page in Python
+PARSER_BACKENDS = ("lxml", "html.parser")
+
+_translator = HTMLTranslator()
+
+
+@lru_cache(maxsize=512)
+def compiled_selector(selector: str):
+    """Compile a CSS selector once and reuse it for every tile of every page."""
+    return soupsieve.compile(selector)
+
+
+@lru_cache(maxsize=512)
+def compiled_xpath(selector: str) -> etree.XPath:
+    """Compile a CSS selector to an XPath over the descendants of the context element."""
+    return etree.XPath(_translator.css_to_xpath(selector, prefix="descendant::"))
+
+
+def parse_tree(html: str):
+    """Parse a page into an lxml element tree, without building any BeautifulSoup objects."""
+    return lxml.html.document_fromstring(html)
+
+
+def parse_html(html: str, strainer: Optional[SoupStrainer] = None,
+               backend: Optional[str] = None) -> BeautifulSoup:
+    """Parse HTML with the configured backend.
+
+    With lxml and a strainer, only the matching subtrees are turned into
+    BeautifulSoup objects, which is where most of the parsing time goes on a
+    full listing page. ProductExtractor and the specs work unchanged on the
+    result.
+    """
+    backend = backend or Config.PARSER_BACKEND
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend '{backend}'. Available backends: {', '.join(PARSER_BACKENDS)}")
+    if backend == "html.parser":
+        return BeautifulSoup(html, "html.parser")
+    return BeautifulSoup(html, "lxml", parse_only=strainer)
+
+
+def parse_tiles(html: str, spec, backend: Optional[str] = None) -> BeautifulSoup:
+    """Parse just the product tiles described by an ExtractionSpec."""
+    return parse_html(html, spec.strainer, backend)
+
+
+def parse_page_fields(html: str, spec, backend: Optional[str] = None) -> BeautifulSoup:
+    """Parse just the page-level elements (e.g. pagination) of an ExtractionSpec."""
+    return parse_html(html, spec.page_strainer, backend)
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urldefrag, urlparse
+from .base import BaseScraper, PageFetchError
+from .breaker import CIRCUIT_OPEN, get_circuit_breaker
+from .config import Config
+from .extractors import ProductExtractor
+from .parsing import parse_tree
+from .throttle import SoftBanError, get_throttle
+from .utils import logger
+
+# Per-URL outcomes reported by bulk scrapes
+SCRAPE_OK = "ok"
+SCRAPE_NOT_FOUND = "not_found"
+SCRAPE_BLOCKED = "blocked"
+SCRAPE_NO_PRODUCT = "no_product_data"
+SCRAPE_FAILED = "failed"
+# Outcomes that show the retailer's site answering, whether or not the page had a product
+SITE_ANSWERED = (SCRAPE_OK, SCRAPE_NOT_FOUND, SCRAPE_NO_PRODUCT)
+
+
+def _first(value):
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _name(value) -> Optional[str]:
+    value = _first(value)
+    if isinstance(value, dict):
+        value = value.get("name")
+    return ProductExtractor.clean_text(value) if isinstance(value, str) else None
+
+
+def _json_ld_nodes(data) -> Iterable[Dict[str, Any]]:
+    """Every object in a JSON-LD document, including those inside lists and @graph."""
+    if isinstance(data, list):
+        for item in data:
+            yield from _json_ld_nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        yield from _json_ld_nodes(data.get("@graph", []))
+
+
+def _is_product(node: Dict[str, Any]) -> bool:
+    types = node.get("@type")
+    return "Product" in (types if isinstance(types, list) else [types])
+
+
+def _offer_price(offers) -> Dict[str, Any]:
+    offer = _first(offers) or {}
+    if not isinstance(offer, dict):
+        return {}
+    price = offer.get("price", offer.get("lowPrice"))
+    return {
+        "price": ProductExtractor.parse_price(str(price)) if price is not None else None,
+        "currency": offer.get("priceCurrency"),
+    }
+
+
+def _json_ld_product(tree) -> Optional[Dict[str, Any]]:
+    for script in tree.xpath('//script[@type="application/ld+json"]'):
+        try:
+            data = json.loads(script.text_content())
+        except ValueError:
+            continue
+        for node in _json_ld_nodes(data):
+            if not _is_product(node):
+                continue
+            image = _first(node.get("image"))
+            rating = node.get("aggregateRating") or {}
+            return {
+                "name": _name(node.get("name")),
+                "brand": _name(node.get("brand")),
+                "description": ProductExtractor.clean_text(node.get("description")),
+                "image_url": image.get("url") if isinstance(image, dict) else image,
+                "rating": ProductExtractor.parse_rating(str(rating["ratingValue"]))
+                if isinstance(rating, dict) and rating.get("ratingValue") is not None else None,
+                "external_id": str(node.get("sku") or node.get("productID") or node.get("gtin13") or "") or None,
+                **_offer_price(node.get("offers")),
+            }
+    return None
+
+
+def _open_graph_product(tree) -> Optional[Dict[str, Any]]:
+    meta = {}
+    for tag in tree.xpath("//meta[@content]"):
+        key = tag.get("property") or tag.get("name")
+        if key:
+            meta.setdefault(key, tag.get("content"))
+    if "og:title" not in meta:
+        return None
+    price = meta.get("product:price:amount") or meta.get("og:price:amount")
+    return {
+        "name": ProductExtractor.clean_text(meta["og:title"]),
+        "brand": meta.get("product:brand"),
+        "description": ProductExtractor.clean_text(meta.get("og:description")),
+        "image_url": meta.get("og:image"),
+        "price": ProductExtractor.parse_price(price) if price else None,
+        "currency": meta.get("product:price:currency") or meta.get("og:price:currency"),
+    }
+
+
+def extract_product_page(html: str, url: str, store: str) -> Optional[Dict[str, Any]]:
+    """Read a product from a page's JSON-LD, falling back to its OpenGraph tags.
+
+    Returns None when the page carries neither, e.g. a listing or an error page.
+    """
+    tree = parse_tree(html)
+    fields = _json_ld_product(tree) or _open_graph_product(tree)
+    if not fields or not fields.get("name"):
+        return None
+    product = {
+        "store": store,
+        "url": url,
+        **fields,
+        "currency": fields.get("currency") or "GBP",
+        "size": ProductExtractor.parse_size(fields["name"]),
+        "external_id": fields.get("external_id") or ProductExtractor.extract_external_id(url),
+        "timestamp": datetime.now().isoformat(),
+    }
+    # Remove None values
+    return {k: v for k, v in product.items() if v is not None}
+
+
+def unique_urls(urls: Iterable[str]) -> List[str]:
+    """Drop blanks, fragments and repeats, keeping the first occurrence's order."""
+    seen = {}
+    for url in urls:
+        url = urldefrag(url.strip())[0]
+        if url:
+            seen.setdefault(url, None)
+    return list(seen)
+
+
+class ProductPageScraper(BaseScraper):
+    """Scrapes individual product pages over the shared async HTTP client.
+
+    Product pages are read from their structured data (JSON-LD or OpenGraph),
+    which every retailer publishes for search engines, so no browser is needed.
+    """
+
+    def __init__(self, store: str, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+        self.base_url = Config.RETAILER_URLS.get(store, (self.base_url,))[0]
+
+    async def scrape_product_async(self, url: str) -> Dict[str, Any]:
+        """Scrape one product page into ``{"url", "status", "product"?, "error"?}``."""
+        try:
+            html = await self.fetch_html_async(url)
+        except PageFetchError as e:
+            if e.status_code in (404, 410):
+                status = SCRAPE_NOT_FOUND
+            elif e.status_code in (403, 429) or isinstance(e.__cause__, SoftBanError):
+                status = SCRAPE_BLOCKED
+            else:
+                status = SCRAPE_FAILED
+            return {"url": url, "status": status, "error": str(e)}
+        except Exception as e:
+            logger.error(f"Error scraping product {url}: {e}")
+            return {"url": url, "status": SCRAPE_FAILED, "error": str(e)}
+
+        product = extract_product_page(html, url, self.store)
+        if product is None:
+            return {"url": url, "status": SCRAPE_NO_PRODUCT, "error": "No product data on page"}
+        return {"url": url, "status": SCRAPE_OK, "product": product}
+
+    async def scrape_many(self, urls: List[str], request=None,
+                          timeout: float = Config.BULK_SCRAPE_TIMEOUT) -> List[Dict[str, Any]]:
+        """Scrape product pages, in ``urls`` order.
+
+        Only ``Config.BULK_SCRAPE_WORKERS`` pages are fetched at a time, each
+        worker taking the next URL once its page is done, so a large batch
+        holds a few of the host's rate-limit tokens at once rather than
+        reserving them far ahead of browse scrapes. Workers stop taking URLs
+        once ``timeout`` seconds have passed, ``request``'s client has
+        disconnected or the retailer's circuit has opened; the URLs left are
+        reported as failed. The batch is refused with CircuitOpen while the
+        circuit is open, and counts as failed when no page got an answer
+        from the site.
+        """
+        breaker = get_circuit_breaker(self.store)
+        probe = breaker.acquire()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(urls)
+        queue = deque(enumerate(urls))
+        deadline = time.monotonic() + timeout
+        stopped = None
+
+        async def work():
+            nonlocal stopped
+            while queue and stopped is None:
+                if time.monotonic() >= deadline:
+                    stopped = f"Not scraped within {timeout:.0f}s"
+                elif request is not None and await request.is_disconnected():
+                    logger.info(f"Client disconnected, stopping bulk scrape for {request.url.path}")
+                    stopped = "Client closed request"
+                elif breaker.state == CIRCUIT_OPEN:
+                    stopped = f"{self.store} is failing, scrapes are paused"
+                elif queue:  # Another worker may have taken the last URL while this one checked
+                    index, url = queue.popleft()
+                    results[index] = await self.scrape_product_async(url)
+
+        try:
+            await asyncio.gather(*(work() for _ in range(min(max(1, Config.BULK_SCRAPE_WORKERS), len(urls)))))
+        finally:
+            statuses = [result["status"] for result in results if result is not None]
+            breaker.record(any(status in SITE_ANSWERED for status in statuses) if statuses else None, probe)
+        return [result or {"url": url, "status": SCRAPE_FAILED, "error": stopped}
+                for url, result in zip(urls, results)]
+
+
+def scrape_seconds(urls: Iterable[str]) -> float:
+    """Seconds the host rate limits need to let ``urls`` through, at each host's current rate."""
+    hosts = Counter(urlparse(url).netloc for url in urls)
+    return sum(60.0 * count / get_throttle(host).rate for host, count in hosts.items())
@@ -0,0 +1,221 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from typing import Any, Dict, List, Optional
+from .config import Config
+from .utils import logger
+
+SNAPSHOT = "snapshot"
+# Lock files, crash or session leftovers and the disk cache, none of which a new browser needs
+SKIP_FILES = shutil.ignore_patterns(
+    "lock", ".parentlock", "parent.lock", "MarionetteActivePort", "crashes", "minidumps",
+    "sessionstore-backups", "startupCache", "*.tmp", "cache2",
+)
+
+
+def _boot_token() -> str:
+    """Tells this container start (or host boot) from earlier ones, which PIDs cannot once they are reused.
+
+    Made from the kernel's boot id and PID 1's start time; "local" where
+    /proc is not available, leaving stale profiles to the PID check.
+    """
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            boot_id = f.read().strip()
+        with open("/proc/1/stat") as f:
+            init_started = f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return "local"
+    return hashlib.sha1(f"{boot_id}:{init_started}".encode()).hexdigest()[:8]
+
+
+BOOT_TOKEN = _boot_token()
+
+
+class ProfileManager:
+    """Per-retailer Firefox profiles carried from one browser to the next.
+
+    A retailer's snapshot holds the cookies, consent choices and local
+    storage of a browser that has already been through its site; the disk
+    cache stays with each browser. Every new browser runs on a private copy
+    of it, since Firefox locks a profile while it runs, and a healthy
+    browser's working profile is moved in as the new snapshot when it is
+    retired. Snapshots older than ``max_age`` are dropped, so browsers start
+    cold again rather than on stale state.
+    """
+
+    def __init__(self, root: str = Config.PROFILE_DIR, max_age: float = Config.PROFILE_MAX_AGE):
+        self.root = root
+        self.max_age = max_age
+        self._lock = threading.Lock()  # Guards the lock table and counts
+        self._store_locks: Dict[str, threading.Lock] = {}  # One per retailer, guarding its snapshot
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def _store_lock(self, store_key: str) -> threading.Lock:
+        with self._lock:
+            return self._store_locks.setdefault(store_key, threading.Lock())
+
+    def snapshot_dir(self, store_key: str) -> str:
+        return os.path.join(self.root, store_key, SNAPSHOT)
+
+    def checkout(self, store_key: str) -> str:
+        """Create a working profile for a new browser from the retailer's snapshot, or empty without one."""
+        workdir = os.path.join(self.root, store_key, f"run-{BOOT_TOKEN}-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        with self._store_lock(store_key):
+            warm = self._is_fresh(store_key)
+            if warm:
+                shutil.copytree(self.snapshot_dir(store_key), workdir, ignore=SKIP_FILES)
+            else:
+                os.makedirs(workdir)
+        self._count(store_key, "warm_starts" if warm else "cold_starts")
+        return workdir
+
+    def owns(self, path: str) -> Optional[str]:
+        """The retailer a working profile belongs to, or None for a profile this manager did not create."""
+        relative = os.path.relpath(os.path.realpath(path), os.path.realpath(self.root))
+        parts = relative.split(os.sep)
+        if len(parts) != 2 or not parts[1].startswith("run-"):
+            return None
+        return parts[0]
+
+    def retire(self, workdir: str, keep: bool = True):
+        """Remove a quit browser's working profile, first making it the snapshot when ``keep`` is set."""
+        store_key = self.owns(workdir)
+        if store_key is None:
+            return
+        if keep and os.path.isdir(workdir):
+            try:
+                self._save(store_key, workdir)
+            except OSError as e:
+                logger.warning(f"Could not snapshot the {store_key} browser profile: {e}")
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    def _save(self, store_key: str, workdir: str):
+        # The browser has quit, so its working profile is moved in rather than copied
+        for directory, subdirs, files in os.walk(workdir):
+            for name in SKIP_FILES(directory, subdirs + files):
+                path = os.path.join(directory, name)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                    subdirs.remove(name)
+                else:
+                    os.remove(path)
+        snapshot = self.snapshot_dir(store_key)
+        with self._store_lock(store_key):
+            # Swap the new snapshot in whole, so a browser starting now never copies half of one
+            previous = None
+            if os.path.isdir(snapshot):
+                previous = f"{snapshot}-old-{uuid.uuid4().hex[:8]}"
+                os.rename(snapshot, previous)
+            os.rename(workdir, snapshot)
+            os.utime(snapshot)  # Its age counts from now, not from when the browser started
+        self._count(store_key, "snapshots")
+        if previous:
+            shutil.rmtree(previous, ignore_errors=True)
+
+    def _is_fresh(self, store_key: str) -> bool:
+        snapshot = self.snapshot_dir(store_key)
+        return os.path.isdir(snapshot) and time.time() - os.path.getmtime(snapshot) < self.max_age
+
+    def cookies(self, store_key: str) -> List[Dict[str, Any]]:
+        """Unexpired cookies from the retailer's snapshot, for plain HTTP sessions."""
+        with self._store_lock(store_key):
+            path = os.path.join(self.snapshot_dir(store_key), "cookies.sqlite")
+            if not self._is_fresh(store_key) or not os.path.exists(path):
+                return []
+            try:
+                with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as conn:
+                    rows = conn.execute(
+                        "SELECT host, name, value, path, isSecure, expiry FROM moz_cookies"
+                    ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not read the {store_key} profile cookies: {e}")
+                return []
+        now = time.time()
+        cookies = []
+        for host, name, value, cookie_path, secure, expiry in rows:
+            if expiry > 1e11:
+                expiry /= 1000  # Newer Firefox versions store milliseconds
+            if expiry > now:
+                cookies.append({"domain": host, "name": name, "value": value, "path": cookie_path,
+                                "secure": bool(secure), "expires": int(expiry)})
+        return cookies
+
+    def remove_stale(self):
+        """Delete working profiles left behind by processes that are no longer running.
+
+        Profiles from an earlier container start or boot are stale whatever
+        their PID, since PIDs start over and may belong to a live process
+        again; within this one, the PID that created a profile must be gone.
+        """
+        if not os.path.isdir(self.root):
+            return
+        for store_key in os.listdir(self.root):
+            store_dir = os.path.join(self.root, store_key)
+            if not os.path.isdir(store_dir):
+                continue
+            for name in os.listdir(store_dir):
+                if name.startswith("run-"):
+                    parts = name.split("-")  # run-<boot token>-<pid>-<random>
+                    if len(parts) != 4 or parts[1] != BOOT_TOKEN or (
+                            parts[2].isdigit() and not _pid_alive(int(parts[2]))):
+                        shutil.rmtree(os.path.join(store_dir, name), ignore_errors=True)
+                elif name.startswith(f"{SNAPSHOT}-"):
+                    shutil.rmtree(os.path.join(store_dir, name), ignore_errors=True)
+
+    def _count(self, store_key: str, name: str):
+        with self._lock:
+            counts = self._counts.setdefault(store_key, {"warm_starts": 0, "cold_starts": 0, "snapshots": 0})
+            counts[name] += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            stats = {store_key: dict(counts) for store_key, counts in self._counts.items()}
+            for store_key, counts in stats.items():
+                snapshot = self.snapshot_dir(store_key)
+                counts["snapshot_age"] = (
+                    round(time.time() - os.path.getmtime(snapshot)) if os.path.isdir(snapshot) else None
+                )
+        return stats
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+profile_manager = ProfileManager()
+
+
+def apply_browser_profile(options, store_key: str) -> Optional[str]:
+    """Run a new Firefox on a working copy of the retailer's profile, with its disk cache inside it."""
+    if not Config.BROWSER_PROFILES:
+        return None
+    workdir = profile_manager.checkout(store_key)
+    options.add_argument("-profile")
+    options.add_argument(workdir)
+    options.set_preference("browser.cache.disk.enable", True)
+    options.set_preference("browser.cache.disk.parent_directory", workdir)
+    options.set_preference("browser.cache.disk.smart_size.enabled", False)
+    options.set_preference("browser.cache.disk.capacity", Config.PROFILE_CACHE_MB * 1024)  # In KB
+    return workdir
+
+
+def retire_browser_profile(driver, keep: bool = True):
+    """After quitting a driver, snapshot (``keep``) and remove the working profile it ran on."""
+    try:
+        path = (driver.capabilities or {}).get("moz:profile")
+    except Exception:
+        return
+    if path:
+        profile_manager.retire(path, keep)
@@ -0,0 +1,141 @@
+import time
+from typing import NamedTuple, Optional
+from selenium.common.exceptions import TimeoutException
+from .config import Config
+from .resource_blocking import record_page_resources
+from .utils import logger
+
+
+class ReadyState(NamedTuple):
+    tiles: int  # Product tiles on the page when it was judged ready
+    scrolls: int
+    elapsed: float
+    stable: bool  # False when the page never went quiet and was taken as it was
+
+
+# Installed once per document, then polled: counts tiles and reports how long the page has been quiet.
+# Activity is a DOM mutation, a finished resource (PerformanceObserver), a scroll, or a fetch/XHR in flight.
+READY_SCRIPT = """
+var selector = arguments[0], scroll = arguments[1];
+if (window.__scraperLeaving) return {tiles: 0, quiet: 0};  // Navigation started, the next page has not replaced this one yet
+var state = window.__scraperReady;
+if (!state) {
+  state = window.__scraperReady = {last: performance.now(), inflight: 0};
+  var touch = function () { state.last = performance.now(); };
+  new MutationObserver(touch).observe(document, {childList: true, subtree: true});
+  if (window.PerformanceObserver) {
+    try { new PerformanceObserver(touch).observe({type: 'resource', buffered: true}); } catch (e) {}
+  }
+  if (window.fetch) {
+    var fetch = window.fetch;
+    window.fetch = function () {
+      state.inflight++; touch();
+      var done = function () { state.inflight--; touch(); };
+      return fetch.apply(this, arguments).then(
+        function (r) { done(); return r; }, function (e) { done(); throw e; });
+    };
+  }
+  var send = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    state.inflight++; touch();
+    this.addEventListener('loadend', function () { state.inflight--; touch(); });
+    return send.apply(this, arguments);
+  };
+}
+if (scroll) {
+  window.scrollTo(0, document.body ? document.body.scrollHeight : 0);
+  state.last = performance.now();
+}
+return {
+  tiles: document.querySelectorAll(selector).length,
+  quiet: state.inflight > 0 ? 0 : performance.now() - state.last
+};
+"""
+
+
+def wait_until_ready(driver, tile_selector: str, timeout: float, scroll: bool = True,
+                     quiet_ms: float = Config.READY_QUIET_MS, settle_max: float = Config.READY_SETTLE_MAX,
+                     poll: float = Config.READY_POLL, max_scrolls: int = Config.READY_MAX_SCROLLS,
+                     store: Optional[str] = None) -> ReadyState:
+    """Wait until a freshly loaded listing has all its tiles, instead of sleeping a fixed time.
+
+    While the tile count keeps growing the page is scrolled to the bottom to
+    trigger lazy loading. Once it stops growing, the page is ready as soon as
+    it has gone ``quiet_ms`` without DOM changes or network activity, or
+    after ``settle_max`` seconds without new tiles on a page that never goes
+    quiet (tickers, polling). ``timeout`` is a hard deadline: a page with
+    tiles is then taken as it is, and one without any raises
+    TimeoutException, as WebDriverWait would.
+
+    With ``store`` given, what the ready page transferred is added to that
+    retailer's resource-blocking stats.
+    """
+    ready = _wait(driver, tile_selector, timeout, scroll, quiet_ms, settle_max, poll, max_scrolls)
+    if store is not None:
+        record_page_resources(driver, store)
+    return ready
+
+
+def _wait(driver, tile_selector: str, timeout: float, scroll: bool, quiet_ms: float,
+          settle_max: float, poll: float, max_scrolls: int) -> ReadyState:
+    probe = ReadinessProbe(tile_selector, timeout, scroll, quiet_ms, settle_max, max_scrolls)
+    while True:
+        ready = probe.poll(driver)
+        if ready is not None:
+            return ready
+        if not probe.scroll_now:
+            time.sleep(poll)
+
+
+class ReadinessProbe:
+    """The readiness check of wait_until_ready, advanced one poll at a time.
+
+    Lets a caller watch several pages at once (see tabs.TabScheduler)
+    instead of blocking on each in turn.
+    """
+
+    def __init__(self, tile_selector: str, timeout: float, scroll: bool = True,
+                 quiet_ms: float = Config.READY_QUIET_MS, settle_max: float = Config.READY_SETTLE_MAX,
+                 max_scrolls: int = Config.READY_MAX_SCROLLS):
+        self.tile_selector = tile_selector
+        self.timeout = timeout
+        self.scroll = scroll
+        self.quiet_ms = quiet_ms
+        self.settle_max = settle_max
+        self.max_scrolls = max_scrolls
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout
+        self.last_count = 0
+        self.grown_at = self.started
+        self.scrolls = 0
+        self.scroll_now = False  # Poll again at once: the page was just asked to scroll
+
+    def poll(self, driver) -> Optional[ReadyState]:
+        """Check the page once: its ReadyState when ready, None while still loading.
+
+        Raises TimeoutException past the deadline on a page without tiles.
+        """
+        state = driver.execute_script(READY_SCRIPT, self.tile_selector, self.scroll_now)
+        count = state["tiles"]
+        self.scroll_now = False
+        if count > self.last_count:
+            # Still growing: fetch the next batch before judging stability
+            self.last_count = count
+            self.grown_at = time.monotonic()
+            if self.scroll and self.scrolls < self.max_scrolls:
+                self.scroll_now = True
+                self.scrolls += 1
+        elif count and state["quiet"] >= self.quiet_ms:
+            return self._ready(count, True)
+        elif count and time.monotonic() - self.grown_at >= self.settle_max:
+            return self._ready(count, False)
+
+        if time.monotonic() >= self.deadline:
+            if count:
+                logger.debug(f"'{self.tile_selector}' still changing after {self.timeout}s, using {count} tiles")
+                return self._ready(count, False)
+            raise TimeoutException(f"No '{self.tile_selector}' tiles after {self.timeout}s")
+        return None
+
+    def _ready(self, tiles: int, stable: bool) -> ReadyState:
+        return ReadyState(tiles, self.scrolls, round(time.monotonic() - self.started, 3), stable)
@@ -0,0 +1,305 @@
+import json
+import select
+import socket
+import socketserver
+import threading
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+from .config import Config
+from .utils import logger
+
+BLOCKING_MODES = ("block", "audit", "off")
+
+# Resource kinds told apart by URL extension, which is all a PAC script sees of a request
+RESOURCE_TYPES = {
+    "image": ("png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp"),
+    "font": ("woff", "woff2", "ttf", "otf", "eot"),
+    "stylesheet": ("css",),
+    "media": ("mp4", "webm", "m3u8", "mp3", "ogg", "mov"),
+}
+
+PAC_TEMPLATE = """function FindProxyForURL(url, host) {
+  var domains = %(domains)s, blocked = %(blocked)s;
+  var allowed = domains.length == 0;
+  for (var i = 0; i < domains.length && !allowed; i++) {
+    allowed = host == domains[i] || dnsDomainIs(host, '.' + domains[i]);
+  }
+  if (allowed && !(blocked && new RegExp(blocked, 'i').test(url))) return 'DIRECT';
+  return 'PROXY 127.0.0.1:%(port)d';
+}"""
+
+# Everything the browser transferred for the current document, the document included
+RESOURCES_SCRIPT = """
+var entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+var bytes = 0;
+for (var i = 0; i < entries.length; i++) { bytes += entries[i].transferSize || 0; }
+return {requests: entries.length, bytes: bytes};
+"""
+
+
+class ResourcePolicy:
+    """What a retailer's browser may load: its allowed hosts and resource kinds."""
+
+    def __init__(self, domains: List[str], allowed_types: List[str]):
+        unknown = set(allowed_types) - set(RESOURCE_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown resource types {sorted(unknown)}; expected some of {sorted(RESOURCE_TYPES)}")
+        self.domains = [domain.lower() for domain in domains]
+        self.blocked_types = [kind for kind in RESOURCE_TYPES if kind not in allowed_types]
+
+    @classmethod
+    def for_store(cls, store_key: str) -> "ResourcePolicy":
+        return cls(Config.RESOURCE_ALLOW_DOMAINS.get(store_key, []), Config.RESOURCE_ALLOW_TYPES.get(store_key, []))
+
+    @property
+    def blocked_pattern(self) -> Optional[str]:
+        """Regex matching URLs of the blocked resource kinds, or None when none are blocked."""
+        extensions = [ext for kind in self.blocked_types for ext in RESOURCE_TYPES[kind]]
+        if not extensions:
+            return None
+        return r"\.(%s)(?:[?#]|$)" % "|".join(extensions)
+
+    def pac_script(self, sink_port: int) -> str:
+        """A proxy auto-config script sending everything this policy rejects to the sink."""
+        return PAC_TEMPLATE % {
+            "domains": json.dumps(self.domains),
+            "blocked": json.dumps(self.blocked_pattern),
+            "port": sink_port,
+        }
+
+
+class ResourceSink(socketserver.ThreadingTCPServer):
+    """A local proxy receiving the requests a retailer's blocking profile rejects.
+
+    In "block" mode every request is answered with 403 at once, so the
+    browser gives up on it without touching the network. In "audit" mode
+    requests are tunnelled to their origin instead and the response bytes
+    counted, which measures what blocking would save on the live site.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, store_key: str, mode: str = "block"):
+        super().__init__(("127.0.0.1", 0), _SinkHandler)
+        self.store_key = store_key
+        self.mode = mode
+        self.requests = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, name=f"resource-sink-{store_key}", daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def count(self, requests: int = 0, received: int = 0):
+        with self._lock:
+            self.requests += requests
+            self.bytes += received
+
+    def totals(self) -> Dict[str, int]:
+        with self._lock:
+            return {"requests": self.requests, "bytes": self.bytes}
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _SinkHandler(socketserver.BaseRequestHandler):
+    timeout = 30
+
+    def handle(self):
+        sink: ResourceSink = self.server
+        client = self.request
+        client.settimeout(self.timeout)
+        try:
+            head = _read_head(client)
+        except OSError:
+            return
+        if not head:
+            return
+        sink.count(requests=1)
+        target = _target(head)
+        if sink.mode != "audit" or target is None:
+            client.sendall(b"HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            return
+
+        try:
+            upstream = socket.create_connection(target, timeout=self.timeout)
+        except OSError as e:
+            logger.debug(f"Audit sink could not reach {target[0]}:{target[1]}: {e}")
+            client.sendall(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            return
+        with upstream:
+            if head.startswith(b"CONNECT "):
+                client.sendall(b"HTTP/1.1 200 Connection established\r\n\r\n")
+            else:
+                upstream.sendall(head)  # Origin servers accept the absolute-form request line
+            sink.count(received=_pump(client, upstream, self.timeout))
+
+
+def _read_head(sock: socket.socket) -> bytes:
+    """Read a request up to the end of its headers."""
+    data = b""
+    while b"\r\n\r\n" not in data and len(data) < 65536:
+        chunk = sock.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def _target(head: bytes) -> Optional[tuple]:
+    """The (host, port) a proxied request is for, from its request line."""
+    try:
+        method, target = head.split(b"\r\n", 1)[0].decode("latin-1").split(" ")[:2]
+    except ValueError:
+        return None
+    if method != "CONNECT":
+        if "://" not in target:
+            return None
+        target = target.split("://", 1)[1].split("/", 1)[0]
+    host, _, port = target.rpartition(":")
+    if not host or not port.isdigit():
+        return (target, 443 if method == "CONNECT" else 80)
+    return (host.strip("[]"), int(port))
+
+
+def _pump(client: socket.socket, upstream: socket.socket, timeout: float) -> int:
+    """Relay both ways until either side closes, returning the bytes received from upstream."""
+    received = 0
+    sockets = [client, upstream]
+    while True:
+        readable, _, _ = select.select(sockets, [], [], timeout)
+        if not readable:
+            return received
+        for sock in readable:
+            try:
+                data = sock.recv(65536)
+            except OSError:
+                return received
+            if not data:
+                return received
+            if sock is upstream:
+                received += len(data)
+                client.sendall(data)
+            else:
+                upstream.sendall(data)
+
+
+# Kept per retailer over its recorded pages; the saved ones are what the sink rejected while they loaded
+PAGE_TOTALS = ("pages", "requests", "bytes", "saved_requests", "saved_bytes")
+
+_sinks: Dict[str, ResourceSink] = {}
+_pages: Dict[str, Dict[str, int]] = {}
+_sink_seen: Dict[str, Dict[str, int]] = {}  # Sink totals when the retailer's last page was recorded
+_lock = threading.Lock()
+
+
+def get_sink(store_key: str) -> ResourceSink:
+    """Return the retailer's sink, starting it on first use."""
+    with _lock:
+        sink = _sinks.get(store_key)
+        if sink is None:
+            sink = _sinks[store_key] = ResourceSink(store_key, Config.RESOURCE_BLOCKING)
+        return sink
+
+
+def blocking_preferences(store_key: str, mode: Optional[str] = None) -> Dict[str, Any]:
+    """Firefox preferences applying a retailer's blocking profile.
+
+    With blocking off, images stay disabled as they always were; in audit
+    mode nothing is disabled so the sink sees every request it would block.
+    """
+    mode = mode or Config.RESOURCE_BLOCKING
+    if mode not in BLOCKING_MODES:
+        raise ValueError(f"Unknown RESOURCE_BLOCKING mode '{mode}'; expected one of {', '.join(BLOCKING_MODES)}")
+    if mode == "off":
+        return {"permissions.default.image": 2}
+
+    policy = ResourcePolicy.for_store(store_key)
+    pac = policy.pac_script(get_sink(store_key).port)
+    prefs = {
+        "network.proxy.type": 2,
+        "network.proxy.autoconfig_url": "data:application/x-ns-proxy-autoconfig," + quote(pac),
+        "network.proxy.autoconfig_url.include_path": True,  # Let the PAC see HTTPS paths, not just hosts
+        "network.proxy.failover_direct": False,  # Never fetch a blocked request directly if the sink is down
+    }
+    if mode == "block":
+        blocked = set(policy.blocked_types)
+        prefs["permissions.default.image"] = 2 if "image" in blocked else 1
+        if "font" in blocked:
+            prefs["gfx.downloadable_fonts.enabled"] = False
+            prefs["browser.display.use_document_fonts"] = 0
+        if "media" in blocked:
+            prefs["media.autoplay.default"] = 5
+    return prefs
+
+
+def apply_resource_blocking(options, store_key: str):
+    """Set a retailer's blocking profile on FirefoxOptions."""
+    for name, value in blocking_preferences(store_key).items():
+        options.set_preference(name, value)
+
+
+def record_page_resources(driver, store_key: str):
+    """Add what the browser transferred for the page loaded in ``driver`` to the retailer's totals.
+
+    The page is also credited with what the sink rejected since the
+    retailer's previous page was recorded, so the savings are those of the
+    pages counted rather than everything the sink has seen.
+    """
+    try:
+        loaded = driver.execute_script(RESOURCES_SCRIPT) or {}
+    except Exception as e:
+        logger.debug(f"Could not read resource timings for {store_key}: {e}")
+        return
+    with _lock:
+        sink = _sinks.get(store_key)
+        blocked = sink.totals() if sink is not None else {"requests": 0, "bytes": 0}
+        seen = _sink_seen.get(store_key, {"requests": 0, "bytes": 0})
+        _sink_seen[store_key] = blocked
+        pages = _pages.setdefault(store_key, dict.fromkeys(PAGE_TOTALS, 0))
+        pages["pages"] += 1
+        pages["requests"] += int(loaded.get("requests") or 0)
+        pages["bytes"] += int(loaded.get("bytes") or 0)
+        pages["saved_requests"] += blocked["requests"] - seen["requests"]
+        pages["saved_bytes"] += blocked["bytes"] - seen["bytes"]
+
+
+def resource_blocking_stats() -> Dict[str, Dict[str, Any]]:
+    """Per retailer: pages loaded, what they transferred and what the profile kept off the wire.
+
+    ``blocked_*`` are everything the sink has rejected; the per-page savings
+    only count what was rejected while the recorded pages loaded. Pages of a
+    retailer loading at the same time share out their savings by when each
+    finished. Blocked responses are never downloaded, so bytes saved are
+    only known from an "audit" run, where the sink fetches them on the
+    browser's behalf.
+    """
+    with _lock:
+        pages = {store_key: dict(totals) for store_key, totals in _pages.items()}
+        sinks = dict(_sinks)
+    stats = {}
+    for store_key in sorted(set(pages) | set(sinks)):
+        loaded = pages.get(store_key, dict.fromkeys(PAGE_TOTALS, 0))
+        blocked = sinks[store_key].totals() if store_key in sinks else {"requests": 0, "bytes": 0}
+        count = loaded["pages"] or 1
+        audit = store_key in sinks and sinks[store_key].mode == "audit"
+        stats[store_key] = {
+            "mode": sinks[store_key].mode if store_key in sinks else Config.RESOURCE_BLOCKING,
+            "pages": loaded["pages"],
+            "requests": loaded["requests"],
+            "bytes": loaded["bytes"],
+            "blocked_requests": blocked["requests"],
+            "blocked_bytes": blocked["bytes"] if audit else None,
+            "per_page": {
+                "requests": round(loaded["requests"] / count, 1),
+                "bytes": round(loaded["bytes"] / count),
+                "requests_saved": round(loaded["saved_requests"] / count, 1),
+                "bytes_saved": round(loaded["saved_bytes"] / count) if audit else None,
+            },
+        }
+    return stats
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import List
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request, Response
+from typing import List, Optional
 from selenium import webdriver
 from ...scraper.models import (
     ProductRequest, SearchRequest, ProductResponse, 
@@ -7,7 +7,7 @@ from ...scraper.models import (
 )
 from ...scraper.factory import ScraperFactory
 from ...scraper.utils import logger
-from app.scraper.controller.aldi import AldiScraper
+from ...scraper.routes.common import browse_or_raise, stream_or_raise, MAX_AGE_QUERY
 
 
 router = APIRouter(tags=["Scraping"])
@@ -16,22 +16,13 @@ router = APIRouter(tags=["Scraping"])
 
 # Tesco fresh groceries browse endpoint
 @router.get("/browse/aldi/freshgroceries", response_model=List[ProductResponse], tags=["Browsing"])
-async def browse_aldi_groceries():
+async def browse_aldi_groceries(request: Request, response: Response, max_age: Optional[float] = MAX_AGE_QUERY):
     """Browse Aldi groceries for featured products using Selenium."""
-    
-    scraper = AldiScraper()
-    
-    try:
-        products = scraper.aldi_groceries()
-        if not products:
-            raise HTTPException(status_code=404, detail="No products found.")
-        return products
+    return await browse_or_raise("aldi", request, max_age, response)
 
-    except Exception as e:
-        if hasattr(scraper, 'close'):
-            scraper.close()
-        logger.error(f"Error browsing Aldi fresh groceries: {e}")
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
-    finally:
-        scraper.close()  # Ensure Selenium WebDriver is properly closed
+# Aldi fresh groceries streamed page by page as NDJSON
+@router.get("/browse/aldi/freshgroceries/stream", tags=["Browsing"])
+async def stream_aldi_groceries(request: Request):
+    """Stream Aldi groceries as NDJSON while later pages are still loading."""
+    return stream_or_raise("aldi", request)
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
+from ...scraper.config import Config
+from ...scraper.factory import ScraperFactory
+from ...scraper.models import ChangeFeedResponse
+from ...scraper.routes.common import changes_or_raise, stream_all
+
+
+router = APIRouter(tags=["Browsing"])
+
+
+# Every registered retailer browsed concurrently, merged into one NDJSON stream
+@router.get("/browse/all", tags=["Browsing"])
+async def browse_all_groceries(
+    request: Request,
+    retailers: Optional[str] = Query(None, description="Comma-separated retailers, defaults to all"),
+    timeout: Optional[float] = Query(None, gt=0, description="Seconds allowed per retailer"),
+):
+    """Stream products from every retailer as they arrive, with a status line per retailer."""
+    available = ScraperFactory.get_available_stores()
+    if retailers:
+        store_keys = list(dict.fromkeys(r.strip().lower().replace(" ", "") for r in retailers.split(",") if r.strip()))
+        unknown = [r for r in store_keys if r not in available]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown retailers: {', '.join(unknown)}. Available stores: {', '.join(available)}",
+            )
+    else:
+        store_keys = available
+    return stream_all(store_keys, request, timeout)
+
+
+# Products added, removed or changed in price, offer or rating since a cursor
+@router.get("/browse/{retailer}/changes", response_model=ChangeFeedResponse, tags=["Browsing"])
+async def browse_changes(
+    retailer: str,
+    request: Request,
+    since: Optional[str] = Query(None, description="Cursor from the previous response; omit for every current product"),
+    limit: int = Query(Config.CHANGES_PAGE_SIZE, ge=1, le=Config.CHANGES_PAGE_SIZE, description="Most changes returned"),
+):
+    """Return what changed in a retailer's catalogue since ``since``, with the cursor to read on from."""
+    store_key = retailer.strip().lower().replace(" ", "")
+    available = ScraperFactory.get_available_stores()
+    if store_key not in available:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown retailer: {retailer}. Available stores: {', '.join(available)}",
+        )
+    return await changes_or_raise(store_key, request, since, limit)
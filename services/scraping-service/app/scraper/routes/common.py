@@ -0,0 +1,222 @@
+import asyncio
+import json
+import math
+import time
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from ...scraper.base import IncompleteScrape
+from ...scraper.breaker import CircuitOpen, get_circuit_breaker
+from ...scraper.browse import browse_groceries, iter_groceries
+from ...scraper.changes import CursorExpired
+from ...scraper.config import Config
+from ...scraper.driver_pool import DriverPoolExhausted
+from ...scraper.executor import ScrapeCancelled, ScrapeQueueFull, scrape_executor
+from ...scraper.factory import ScraperFactory
+from ...scraper.fetch_backends import last_fetch_backend
+from ...scraper.product_pages import SCRAPE_BLOCKED, SCRAPE_FAILED, SCRAPE_OK, ProductPageScraper
+from ...scraper.snapshots import snapshot_cache
+from ...scraper.throttle import get_throttle
+from ...scraper.utils import logger
+
+# Shared ?max_age= parameter of the browse endpoints
+MAX_AGE_QUERY = Query(None, ge=0, description="Oldest snapshot accepted, in seconds; 0 forces a live scrape")
+
+
+async def browse_or_raise(store_name: str, request: Request, max_age: Optional[float] = None,
+                          response: Optional[Response] = None) -> List[Dict[str, Any]]:
+    """Serve a retailer's browse results from its snapshot, scraping when there is none fresh enough.
+
+    ``max_age`` caps how old a snapshot may be for this request, 0 forcing a
+    live scrape. The snapshot's age, source and the fetch backend that
+    scraped it are reported in the ``Age``, ``X-Snapshot`` and
+    ``X-Fetch-Backend`` headers.
+    """
+    snapshot, source = await _snapshot_or_raise(store_name, max_age, request)
+    if not snapshot.products:
+        raise HTTPException(status_code=404, detail="No products found.")
+    if response is not None:
+        response.headers["Age"] = str(int(snapshot.age))
+        response.headers["X-Snapshot"] = source
+        if snapshot.backend is not None:
+            response.headers["X-Fetch-Backend"] = snapshot.backend
+    return snapshot.products
+
+
+async def changes_or_raise(store_name: str, request: Request, since: Optional[str] = None,
+                           limit: int = Config.CHANGES_PAGE_SIZE) -> Dict[str, Any]:
+    """Read a retailer's change feed from the ``since`` cursor.
+
+    Without a cursor the current products are paged through first; their
+    cursor is ``<sequence>:<last key>`` until the last page, which hands
+    back the sequence the resync started from. Reading the feed also starts
+    a background refresh of the retailer's snapshot when it is past its TTL,
+    so polling the feed alone keeps it current; the log is served without
+    waiting for it. A cursor older than the retained log gets 410, telling
+    the consumer to resync without one.
+    """
+    store_key = store_name.lower().replace(" ", "")
+    sequence, _, after = (since or "").partition(":")
+    if since is not None and not sequence.isdigit():
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {since}")
+    await snapshot_cache.revalidate(store_key, browse_groceries)
+    try:
+        if since is None or after:
+            changes, latest, more = await run_in_threadpool(
+                snapshot_cache.changes.changes, store_key, None, limit, after or None
+            )
+            start = int(sequence) if after else latest
+            cursor = f"{start}:{changes[-1]['key']}" if more else str(start)
+            return {"retailer": store_key, "cursor": cursor, "more": more, "changes": changes}
+        changes, cursor, more = await run_in_threadpool(snapshot_cache.changes.changes, store_key, int(sequence), limit)
+    except CursorExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    return {"retailer": store_key, "cursor": str(cursor), "more": more, "changes": changes}
+
+
+async def _snapshot_or_raise(store_name: str, max_age: Optional[float] = None, request: Optional[Request] = None):
+    store_key = store_name.lower().replace(" ", "")
+    try:
+        return await snapshot_cache.get(store_key, browse_groceries, max_age, request=request)
+    except ScrapeQueueFull as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except CircuitOpen as e:
+        raise circuit_open_error(e)
+    except ScrapeCancelled:
+        raise HTTPException(status_code=499, detail="Client closed request")
+    except DriverPoolExhausted as e:
+        # Busy rather than down, unlike an open circuit's 503, so worth retrying shortly
+        logger.warning(f"No {store_name} browser available: {e}")
+        raise HTTPException(status_code=429, detail=str(e),
+                            headers={"Retry-After": str(Config.DRIVER_POOL_RETRY_AFTER)})
+    except IncompleteScrape as e:
+        logger.warning(f"Incomplete {store_name} scrape: {e}")
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error browsing {store_name} fresh groceries: {e}")
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+def circuit_open_error(e: CircuitOpen) -> HTTPException:
+    """The 503 answered while a retailer's circuit is open, with Retry-After until its next probe."""
+    logger.warning(str(e))
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+async def scrape_product_or_raise(store_name: str, url: str) -> Dict[str, Any]:
+    """Scrape one product page over HTTP, mapping failures to HTTP errors."""
+    try:
+        ScraperFactory.get_scraper_class(store_name)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    store_key = store_name.lower().replace(" ", "")
+    result = await ProductPageScraper(store_key).scrape_product_async(url)
+    if result["status"] == SCRAPE_BLOCKED:
+        backoff = math.ceil(60 / get_throttle(url).rate)
+        raise HTTPException(status_code=503, detail=f"Blocked by {store_name}: {result['error']}",
+                            headers={"Retry-After": str(backoff)})
+    if result["status"] == SCRAPE_FAILED:
+        raise HTTPException(status_code=502, detail=f"Failed to scrape product: {result['error']}")
+    if result["status"] != SCRAPE_OK:
+        raise HTTPException(status_code=404, detail=f"Failed to scrape product: {result['error']}")
+    return result["product"]
+
+
+def stream_or_raise(store_name: str, request: Request) -> StreamingResponse:
+    """Stream a browse scrape as NDJSON, one product per line, while it runs.
+
+    The status code is sent before scraping starts, so a failure part-way
+    through ends the stream with a final ``{"error": ...}`` line instead.
+    """
+    store_key = store_name.lower().replace(" ", "")
+    try:
+        get_circuit_breaker(store_key).check()
+        scrape_executor.check_capacity(store_key)
+    except CircuitOpen as e:
+        raise circuit_open_error(e)
+    except ScrapeQueueFull as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    async def lines():
+        try:
+            async for product in scrape_executor.stream(store_key, iter_groceries, store_key, request=request):
+                yield json.dumps(product) + "\n"
+        except ScrapeCancelled:
+            return
+        except Exception as e:
+            logger.error(f"Error streaming {store_name} fresh groceries: {e}")
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def _fan_out_retailer(store_key: str, queue: asyncio.Queue, timeout: float, request: Request):
+    """Feed one retailer's products into the merged stream, then a status line for it."""
+    started = time.monotonic()
+    deadline = started + timeout
+    count = 0
+    products = scrape_executor.stream(store_key, iter_groceries, store_key, request=request)
+    try:
+        while True:
+            try:
+                product = await asyncio.wait_for(products.__anext__(), deadline - time.monotonic())
+            except StopAsyncIteration:
+                break
+            count += 1
+            await queue.put({**product, "retailer": store_key})
+        status = {"status": "completed", "backend": last_fetch_backend(store_key)}
+    except asyncio.TimeoutError:
+        logger.warning(f"{store_key} browse timed out after {timeout}s with {count} products")
+        status = {"status": "timeout", "error": f"No complete result within {timeout}s"}
+    except ScrapeQueueFull as e:
+        status = {"status": "busy", "error": str(e), "retry_after": e.retry_after}
+    except CircuitOpen as e:
+        status = {"status": "unavailable", "error": str(e), "retry_after": e.retry_after}
+    except ScrapeCancelled:
+        status = {"status": "cancelled"}
+    except IncompleteScrape as e:
+        status = {"status": "incomplete", "error": str(e)}
+    except Exception as e:
+        logger.error(f"Error browsing {store_key} in multi-retailer browse: {e}")
+        status = {"status": "failed", "error": str(e)}
+    finally:
+        await products.aclose()
+    await queue.put({"retailer": store_key, **status, "products": count,
+                     "elapsed": round(time.monotonic() - started, 2)})
+
+
+def stream_all(store_keys: List[str], request: Request, timeout: Optional[float] = None) -> StreamingResponse:
+    """Browse several retailers at once, merging their products into one NDJSON stream.
+
+    Product lines carry a ``retailer`` key and arrive as each retailer
+    produces them. Every retailer ends with one status line (a line with a
+    ``status`` key: completed, incomplete, timeout, busy, unavailable,
+    failed or cancelled) so a failure
+    in one retailer is reported without failing the others. Completed lines
+    also name the fetch backend that served the retailer.
+    """
+    async def lines():
+        queue: asyncio.Queue = asyncio.Queue(maxsize=Config.SCRAPE_STREAM_BUFFER)
+        tasks = [
+            asyncio.create_task(_fan_out_retailer(
+                store_key, queue, timeout or Config.BROWSE_TIMEOUTS.get(store_key, Config.BROWSE_TIMEOUT), request
+            ))
+            for store_key in store_keys
+        ]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                line = await queue.get()
+                if "status" in line:
+                    remaining -= 1
+                yield json.dumps(line) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
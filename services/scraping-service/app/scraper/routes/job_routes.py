@@ -0,0 +1,71 @@
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from ...scraper.config import Config
+from ...scraper.jobs import FINISHED_STATES, JobRunner, job_runner
+from ...scraper.models import JobRequest, JobResponse
+
+
+router = APIRouter(tags=["Jobs"])
+
+
+async def get_job_or_404(job_id: str):
+    # The job store is SQLite; its calls run in a thread so they never block the event loop
+    job = await run_in_threadpool(job_runner.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+# Submit a background scrape job
+@router.post("/jobs", response_model=JobResponse, status_code=202, tags=["Jobs"])
+async def create_job(job_request: JobRequest):
+    """Queue a scrape and return its job ID without waiting for the results."""
+    retailer = job_request.retailer.lower().replace(" ", "")
+    if retailer not in Config.RETAILERS:
+        raise HTTPException(status_code=400, detail=f"Unsupported retailer: {job_request.retailer}")
+    if job_request.category not in JobRunner.CATEGORIES:
+        raise HTTPException(status_code=400, detail=f"Unsupported category: {job_request.category}")
+
+    job = await run_in_threadpool(job_runner.store.create, retailer, job_request.category, job_request.options)
+    job_runner.submit(job["id"])
+    return job
+
+
+# Job status with the results collected so far
+@router.get("/jobs/{job_id}", response_model=JobResponse, tags=["Jobs"])
+async def get_job(job_id: str, limit: int = Query(50, ge=0, le=1000)):
+    """Return a job's status and up to ``limit`` of its results so far."""
+    job = await get_job_or_404(job_id)
+    job["results"] = await run_in_threadpool(job_runner.store.results, job_id, 0, limit)
+    return job
+
+
+# Stream a job's results as NDJSON
+@router.get("/jobs/{job_id}/results", tags=["Jobs"])
+async def stream_job_results(job_id: str, follow: bool = True):
+    """Stream a job's products, one JSON object per line.
+
+    With ``follow`` the stream stays open and picks up new products until the
+    job finishes; otherwise it ends after the results stored so far.
+    """
+    await get_job_or_404(job_id)
+
+    async def lines():
+        offset = 0
+        while True:
+            # Read the status first so products stored just before it finished are not missed
+            finished = (await run_in_threadpool(job_runner.store.get, job_id))["status"] in FINISHED_STATES
+            products = await run_in_threadpool(job_runner.store.results, job_id, offset)
+            for product in products:
+                yield json.dumps(product) + "\n"
+            offset += len(products)
+            if products:
+                continue
+            if finished or not follow:
+                return
+            await asyncio.sleep(1)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, HTTPException, Request
+from ...scraper.breaker import CircuitOpen
+from ...scraper.config import Config
+from ...scraper.factory import ScraperFactory
+from ...scraper.models import BulkScrapeRequest, BulkScrapeResponse, ErrorResponse
+from ...scraper.product_pages import SCRAPE_OK, ProductPageScraper, scrape_seconds, unique_urls
+from .common import circuit_open_error
+
+
+router = APIRouter(tags=["Scraping"])
+
+
+# Bulk product scraping endpoint
+@router.post("/scrape/bulk", response_model=BulkScrapeResponse,
+             responses={400: {"model": ErrorResponse}, 503: {"model": ErrorResponse}}, tags=["Scraping"])
+async def scrape_bulk(bulk_request: BulkScrapeRequest, request: Request):
+    """Scrape many product pages, reporting a status for each URL.
+
+    A batch the retailer's current rate limit cannot let through within
+    BULK_SCRAPE_TIMEOUT is refused rather than queued behind other scrapes,
+    and one for a retailer whose circuit is open gets 503 with Retry-After.
+    """
+    try:
+        ScraperFactory.get_scraper_class(bulk_request.store)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    urls = unique_urls(bulk_request.urls)
+    if not urls:
+        raise HTTPException(status_code=400, detail="No URLs to scrape")
+    if len(urls) > Config.BULK_SCRAPE_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many URLs ({len(urls)}), at most {Config.BULK_SCRAPE_MAX_URLS} per request",
+        )
+
+    seconds = scrape_seconds(urls)
+    if seconds > Config.BULK_SCRAPE_TIMEOUT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many URLs ({len(urls)}) for the current rate limit: they need {seconds:.0f}s, "
+                   f"at most {Config.BULK_SCRAPE_TIMEOUT:.0f}s per request",
+        )
+
+    store_key = bulk_request.store.lower().replace(" ", "")
+    try:
+        results = await ProductPageScraper(store_key).scrape_many(urls, request=request)
+    except CircuitOpen as e:
+        raise circuit_open_error(e)
+    succeeded = sum(1 for result in results if result["status"] == SCRAPE_OK)
+    return BulkScrapeResponse(
+        store=bulk_request.store,
+        requested=len(bulk_request.urls),
+        unique=len(urls),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results,
+    )
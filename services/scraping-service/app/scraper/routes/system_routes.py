@@ -0,0 +1,30 @@
+from fastapi import APIRouter
+from ...scraper.breaker import circuit_breaker_stats
+from ...scraper.driver_pool import driver_pool_stats
+from ...scraper.fetch_backends import fetch_backend_stats
+from ...scraper.frontier import crawl_stats
+from ...scraper.profiles import profile_manager
+from ...scraper.resource_blocking import resource_blocking_stats
+from ...scraper.throttle import throttle_stats
+from ...scraper.executor import scrape_executor
+from ...scraper.snapshots import snapshot_cache
+
+
+router = APIRouter(tags=["System"])
+
+
+# Runtime metrics endpoint
+@router.get("/metrics", tags=["System"])
+async def scraper_metrics():
+    """Report the state of the scraping service's shared resources."""
+    return {
+        "driver_pools": driver_pool_stats(),
+        "throttle": throttle_stats(),
+        "executor": scrape_executor.stats(),
+        "fetch_backends": fetch_backend_stats(),
+        "snapshots": snapshot_cache.stats(),
+        "resource_blocking": resource_blocking_stats(),
+        "profiles": profile_manager.stats(),
+        "crawls": crawl_stats(),
+        "circuit_breakers": circuit_breaker_stats(),
+    }
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Depends
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Optional
 import logging
@@ -8,7 +8,7 @@ from ...scraper.models import (
 )
 from ...scraper.factory import ScraperFactory
 from ...scraper.utils import logger
-from app.scraper.controller.tesco import TescoScraper
+from ...scraper.routes.common import browse_or_raise, stream_or_raise, MAX_AGE_QUERY
 
 
 router = APIRouter(tags=["Scraping"])
@@ -38,26 +38,16 @@ async def list_available_stores():
     
 # Tesco fresh groceries browse endpoint
 @router.get("/browse/tesco/freshgroceries", response_model=List[ProductResponse], tags=["Browsing"])
-async def browse_tesco_groceries():
+async def browse_tesco_groceries(request: Request, response: Response, max_age: Optional[float] = MAX_AGE_QUERY):
     """Browse Tesco groceries for featured products."""
-    scraper = TescoScraper()
-    try:
-      
-       products = scraper.tesco_groceries()
-       if not products:
-            raise HTTPException(status_code=404, detail="No products found.")
-       return products
+    return await browse_or_raise("tesco", request, max_age, response)
 
-    except Exception as e:
-        if hasattr(scraper, 'close'):
-            scraper.close()
-        logger.error(f"Error browsing Tesco fresh groceries: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Unexpected error: {str(e)}"
-        )    
-    finally:
-        scraper.close()  # Ensure Selenium WebDriver is properly closed
+
+# Tesco fresh groceries streamed batch by batch as NDJSON
+@router.get("/browse/tesco/freshgroceries/stream", tags=["Browsing"])
+async def stream_tesco_groceries(request: Request):
+    """Stream Tesco groceries as NDJSON while later tiles are still being scrolled into view."""
+    return stream_or_raise("tesco", request)
 
 # # Tesco fresh groceries browse endpoint
 # @router.get("/browse/tesco/freshgroceries", response_model=List[ProductResponse], tags=["Browsing"])
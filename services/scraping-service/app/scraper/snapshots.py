@@ -0,0 +1,210 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+from starlette.concurrency import run_in_threadpool
+from .breaker import get_circuit_breaker
+from .changes import ChangeLog
+from .config import Config
+from .executor import ScrapeCancelled, scrape_executor
+from .utils import logger
+
+# Where a browse response came from
+SNAPSHOT_FRESH = "fresh"  # Snapshot younger than the TTL
+SNAPSHOT_STALE = "stale"  # Older snapshot served while a refresh runs in the background
+SNAPSHOT_LIVE = "live"  # Scraped for this request (or joined an identical scrape in flight)
+
+
+class Snapshot(NamedTuple):
+    products: List[Dict[str, Any]]
+    scraped_at: float
+    backend: Optional[str] = None  # Fetch backend that scraped it, when known
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.scraped_at)
+
+
+class SnapshotStore:
+    """The last good browse result per retailer, kept in a local SQLite file."""
+
+    def __init__(self, path: str = Config.SNAPSHOT_DB):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "retailer TEXT PRIMARY KEY, products TEXT NOT NULL, scraped_at REAL NOT NULL, backend TEXT)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(snapshots)")}
+            if "backend" not in columns:  # Stores created before snapshots kept their backend
+                conn.execute("ALTER TABLE snapshots ADD COLUMN backend TEXT")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, retailer: str) -> Optional[Snapshot]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT products, scraped_at, backend FROM snapshots WHERE retailer = ?", (retailer,)
+            ).fetchone()
+        if row is None:
+            return None
+        return Snapshot(json.loads(row[0]), row[1], row[2])
+
+    def put(self, retailer: str, products: List[Dict[str, Any]], scraped_at: Optional[float] = None,
+            backend: Optional[str] = None) -> Snapshot:
+        snapshot = Snapshot(products, scraped_at if scraped_at is not None else time.time(), backend)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots (retailer, products, scraped_at, backend) VALUES (?, ?, ?, ?)",
+                (retailer, json.dumps(products), snapshot.scraped_at, backend),
+            )
+        return snapshot
+
+
+class SnapshotCache:
+    """Serves browse results from snapshots, refreshing them stale-while-revalidate.
+
+    A snapshot younger than ``ttl`` is served as is. An older one, up to
+    ``max_stale``, is served immediately while a background scrape refreshes
+    it. Without a usable snapshot the caller waits for a live scrape. Only one
+    scrape per retailer runs at a time: concurrent callers join it, and a
+    live scrape is cancelled once every caller waiting on it has
+    disconnected. Every refresh is also diffed into the retailer's change
+    feed.
+    """
+
+    def __init__(self, store: Optional[SnapshotStore] = None, ttl: float = Config.SNAPSHOT_TTL,
+                 max_stale: float = Config.SNAPSHOT_MAX_STALE, changes: Optional[ChangeLog] = None):
+        self._store = store
+        self._changes = changes
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._refreshes: Dict[str, asyncio.Task] = {}
+        self._live: Set[asyncio.Task] = set()  # Refreshes started for a waiting caller, not in the background
+        self._waiters: Dict[str, int] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._served: Dict[str, Tuple[float, int]] = {}  # Scrape time and size of the last snapshot served
+        self._loop = None
+
+    @property
+    def store(self) -> SnapshotStore:
+        if self._store is None:
+            self._store = SnapshotStore()
+        return self._store
+
+    @property
+    def changes(self) -> ChangeLog:
+        if self._changes is None:
+            self._changes = ChangeLog()
+        return self._changes
+
+    async def get(self, retailer: str, scrape, max_age: Optional[float] = None, request=None):
+        """Return ``(snapshot, source)`` for a retailer.
+
+        ``scrape`` is the blocking function run on the scrape executor for a
+        refresh. ``max_age`` overrides the TTL for this call; 0 forces a live
+        scrape. When ``request`` is given and its client disconnects during a
+        live scrape, ScrapeCancelled is raised. A live scrape that finds
+        nothing leaves the stored snapshot in place and serves it as stale.
+        """
+        snapshot = await run_in_threadpool(self.store.get, retailer)
+        ttl = self.ttl if max_age is None else max_age
+        if snapshot is not None and snapshot.age <= ttl:
+            return self._count(retailer, snapshot, SNAPSHOT_FRESH)
+        if snapshot is not None and max_age is None and snapshot.age <= self.ttl + self.max_stale:
+            self._refresh(retailer, scrape)
+            return self._count(retailer, snapshot, SNAPSHOT_STALE)
+        refreshed = await self._wait(retailer, self._refresh(retailer, scrape, live=True), request)
+        if not refreshed.products and snapshot is not None:
+            return self._count(retailer, snapshot, SNAPSHOT_STALE)
+        return self._count(retailer, refreshed, SNAPSHOT_LIVE)
+
+    async def revalidate(self, retailer: str, scrape):
+        """Start a background refresh when the retailer has no snapshot within its TTL, without waiting for it."""
+        snapshot = await run_in_threadpool(self.store.get, retailer)
+        if snapshot is None or snapshot.age > self.ttl:
+            self._refresh(retailer, scrape)
+
+    async def _wait(self, retailer: str, task: asyncio.Task, request) -> Snapshot:
+        """Wait for a refresh, cancelling it if this was its last caller and the client went away."""
+        self._waiters[retailer] = self._waiters.get(retailer, 0) + 1
+        try:
+            if request is None:
+                # Shielded so a caller giving up does not cancel a scrape others are waiting on
+                return await asyncio.shield(task)
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=scrape_executor.disconnect_poll)
+                if done:
+                    return task.result()
+                if await request.is_disconnected():
+                    logger.info(f"Client disconnected, leaving the {retailer} scrape for {request.url.path}")
+                    if self._waiters[retailer] == 1 and task in self._live:
+                        task.cancel()
+                    raise ScrapeCancelled("Client disconnected")
+        finally:
+            self._waiters[retailer] -= 1
+
+    def _count(self, retailer: str, snapshot: Snapshot, source: str):
+        counts = self._counts.setdefault(retailer, {})
+        counts[source] = counts.get(source, 0) + 1
+        if snapshot.products:
+            self._served[retailer] = (snapshot.scraped_at, len(snapshot.products))
+        return snapshot, source
+
+    def _refresh(self, retailer: str, scrape, live: bool = False) -> asyncio.Task:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Refresh tasks belong to the loop that started them
+            self._refreshes, self._live, self._waiters = {}, set(), {}
+            self._loop = loop
+        task = self._refreshes.get(retailer)
+        if task is None or task.done():
+            task = self._refreshes[retailer] = asyncio.ensure_future(self._scrape(retailer, scrape))
+            task.add_done_callback(self._log_background_failure)
+            if live:
+                self._live.add(task)
+                task.add_done_callback(self._live.discard)
+        return task
+
+    async def _scrape(self, retailer: str, scrape) -> Snapshot:
+        try:
+            get_circuit_breaker(retailer).check()  # Fail fast rather than queue behind a retailer that is down
+            products = await scrape_executor.run(retailer, scrape, retailer)
+        finally:
+            self._refreshes.pop(retailer, None)
+        if not products:
+            # Keep the last good result rather than caching an empty scrape
+            return Snapshot([], time.time())
+        # A browse scrape's Listing says which backend read it
+        snapshot = await run_in_threadpool(self.store.put, retailer, products, None, getattr(products, "backend", None))
+        changed = await run_in_threadpool(self.changes.record, retailer, products)
+        logger.info(f"{retailer} snapshot refreshed: {len(products)} products, {changed} changes")
+        return snapshot
+
+    @staticmethod
+    def _log_background_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Snapshot refresh failed: {task.exception()}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-retailer counts and the last snapshot served, from memory so /metrics never waits on SQLite."""
+        stats = {}
+        for retailer in sorted(set(self._counts) | set(self._refreshes)):
+            scraped_at, products = self._served.get(retailer, (None, 0))
+            stats[retailer] = {
+                "age": round(max(0.0, time.time() - scraped_at), 1) if scraped_at is not None else None,
+                "products": products,
+                "refreshing": retailer in self._refreshes,
+                **self._counts.get(retailer, {}),
+            }
+        return stats
+
+
+snapshot_cache = SnapshotCache()
@@ -0,0 +1,322 @@
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional
+from bs4 import BeautifulSoup, SoupStrainer
+from .config import Config
+from lxml import html as lxml_html
+from .parsing import compiled_selector, compiled_xpath, parse_tree
+from .utils import logger
+
+
+class FieldSpec:
+    """Where one raw product field lives relative to its tile.
+
+    ``attr`` of None reads the element's text, "outerHTML" its markup and
+    anything else that attribute. With ``many`` every match is read into a
+    list; otherwise the first match is read (None when there is none). A
+    ``selector`` of None reads the tile itself.
+    """
+
+    def __init__(self, selector: Optional[str], attr: Optional[str] = None, many: bool = False):
+        self.selector = selector
+        self.attr = attr
+        self.many = many
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"selector": self.selector, "attr": self.attr, "many": self.many}
+
+
+class ExtractionSpec:
+    """Selectors for a retailer's product tiles, shared by every extraction backend.
+
+    The same spec is run inside the browser as one ``execute_script`` call or
+    against a parsed page in Python, and both return the same raw field values
+    for a controller to turn into products.
+    """
+
+    def __init__(self, store: str, tile: str, fields: Dict[str, FieldSpec],
+                 page_fields: Optional[Dict[str, FieldSpec]] = None, limit: Optional[int] = None,
+                 strainer: Optional[SoupStrainer] = None, page_strainer: Optional[SoupStrainer] = None):
+        self.store = store
+        self.tile = tile
+        self.fields = fields
+        self.page_fields = page_fields or {}
+        self.limit = limit  # Only read the first N tiles
+        # Partial-parse filters matching the tile and page-field elements, see parsing.parse_html
+        self.strainer = strainer
+        self.page_strainer = page_strainer
+        self._script = None
+
+    @property
+    def script(self) -> str:
+        """JavaScript that reads every tile's fields from the live DOM as a JSON string."""
+        if self._script is None:
+            spec = {
+                "tile": self.tile,
+                "limit": self.limit,
+                "fields": {name: field.as_dict() for name, field in self.fields.items()},
+                "page": {name: field.as_dict() for name, field in self.page_fields.items()},
+            }
+            self._script = EXTRACT_SCRIPT % json.dumps(spec)
+        return self._script
+
+    def extract_live(self, driver) -> Dict[str, Any]:
+        """Read the fields straight from the browser, skipping page_source."""
+        return json.loads(driver.execute_script(self.script))
+
+    def extract_new_live(self, driver, scroll: bool = True) -> Dict[str, Any]:
+        """Read the tiles that appeared since the last call, then scroll to load more.
+
+        Tiles read are emptied, keeping their height so the scroll position
+        holds, so a long infinite-scroll page does not keep every tile's
+        markup alive. ``total`` in the result counts every tile on the page,
+        read or not.
+        """
+        return json.loads(driver.execute_script(self.script, {"scroll": scroll}))
+
+    def extract_soup(self, soup: BeautifulSoup) -> Dict[str, Any]:
+        """Read the same fields from an already parsed page."""
+        return {
+            "tiles": [
+                {name: _read(tile, field) for name, field in self.fields.items()}
+                for tile in compiled_selector(self.tile).select(soup)[:self.limit]
+            ],
+            "page": self.extract_page_fields(soup),
+        }
+
+    def extract_page_fields(self, soup: BeautifulSoup) -> Dict[str, Any]:
+        """Read only the page-level fields, such as pagination links."""
+        return {name: _read(soup, field) for name, field in self.page_fields.items()}
+
+    def extract_tree(self, tree) -> Dict[str, Any]:
+        """Read the same fields from an lxml element tree."""
+        return {
+            "tiles": [
+                {name: _read_tree(tile, field) for name, field in self.fields.items()}
+                for tile in compiled_xpath(self.tile)(tree)[:self.limit]
+            ],
+            "page": {name: _read_tree(tree, field) for name, field in self.page_fields.items()},
+        }
+
+    def extract_html(self, html: str, backend: Optional[str] = None) -> Dict[str, Any]:
+        """Read the fields from saved or downloaded HTML with the configured parser backend.
+
+        The lxml backend reads the fields straight from lxml's C tree; the
+        html.parser backend builds the whole page with BeautifulSoup.
+        """
+        backend = backend or Config.PARSER_BACKEND
+        if backend == "lxml":
+            return self.extract_tree(parse_tree(html))
+        return self.extract_soup(BeautifulSoup(html, "html.parser"))
+
+
+def _value(element, attr: Optional[str]):
+    if attr is None:
+        return element.text
+    if attr == "outerHTML":
+        return str(element)
+    return element.get(attr)
+
+
+def _read(root, field: FieldSpec):
+    if field.many:
+        return [_value(element, field.attr) for element in compiled_selector(field.selector).select(root)]
+    element = compiled_selector(field.selector).select_one(root) if field.selector else root
+    return _value(element, field.attr) if element is not None else None
+
+
+def _tree_value(element, attr: Optional[str]):
+    if attr is None:
+        return element.text_content()
+    if attr == "outerHTML":
+        return lxml_html.tostring(element, encoding="unicode", with_tail=False)
+    return element.get(attr)
+
+
+def _read_tree(root, field: FieldSpec):
+    if field.many:
+        return [_tree_value(element, field.attr) for element in compiled_xpath(field.selector)(root)]
+    if not field.selector:
+        return _tree_value(root, field.attr)
+    matches = compiled_xpath(field.selector)(root)
+    return _tree_value(matches[0], field.attr) if matches else None
+
+
+# Mirrors _read/_value above, so both backends return identical raw values.
+# Called with a harvest argument it reads only tiles not read before, empties them, then optionally scrolls.
+EXTRACT_SCRIPT = """
+return (function (spec, harvest) {
+  function value(el, attr) {
+    if (attr === null) return el.textContent;
+    if (attr === 'outerHTML') return el.outerHTML;
+    return el.getAttribute(attr);
+  }
+  function read(root, field) {
+    if (field.many) {
+      return Array.from(root.querySelectorAll(field.selector)).map(function (el) { return value(el, field.attr); });
+    }
+    var el = field.selector ? root.querySelector(field.selector) : root;
+    return el ? value(el, field.attr) : null;
+  }
+  function readAll(root, fields) {
+    var out = {};
+    Object.keys(fields).forEach(function (name) { out[name] = read(root, fields[name]); });
+    return out;
+  }
+  var tiles = Array.from(document.querySelectorAll(spec.tile));
+  var total = tiles.length;
+  if (harvest) tiles = tiles.filter(function (tile) { return !tile.hasAttribute('data-scraper-read'); });
+  if (spec.limit !== null) tiles = tiles.slice(0, spec.limit);
+  var out = tiles.map(function (tile) { return readAll(tile, spec.fields); });
+  if (harvest) {
+    // Mark what was read so the next call returns only tiles that appeared since, and drop
+    // its markup; the emptied tile keeps its height so the page does not jump back up
+    tiles.forEach(function (tile) {
+      tile.setAttribute('data-scraper-read', '');
+      tile.style.height = tile.offsetHeight + 'px';
+      tile.replaceChildren();
+    });
+    if (harvest.scroll) {
+      window.scrollTo(0, document.body ? document.body.scrollHeight : 0);
+      if (window.__scraperReady) window.__scraperReady.last = performance.now();  // See readiness.READY_SCRIPT
+    }
+  }
+  return JSON.stringify({tiles: out, page: readAll(document, spec.page), total: total});
+})(%s, arguments[0] || null);
+"""
+
+
+def products_from_tiles(tiles: List[Dict[str, Any]], build: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+                        store: str) -> List[Dict[str, Any]]:
+    """Turn raw tile fields into product dicts, skipping tiles that fail to build."""
+    products = []
+    for fields in tiles:
+        try:
+            product = build(fields)
+            if product:
+                # Remove None values
+                products.append({k: v for k, v in product.items() if v is not None})
+        except Exception as e:
+            logger.error(f"Error extracting {store} product: {e}")
+    return products
+
+
+def extract_live_products(driver, spec: ExtractionSpec,
+                          build: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """Extract products in the browser, or return None so the caller falls back to page_source.
+
+    Returns ``{"products": [...], "page": {...}}``. Browser extraction is
+    skipped when EXTRACTION_MODE is "soup", fails, or finds no tiles (which
+    also covers block pages the fallback needs to see).
+    """
+    if Config.EXTRACTION_MODE != "browser":
+        return None
+    try:
+        result = spec.extract_live(driver)
+    except Exception as e:
+        logger.warning(f"In-browser extraction failed for {spec.store}, falling back to page_source: {e}")
+        return None
+    if not result.get("tiles"):
+        return None
+    return {"products": products_from_tiles(result["tiles"], build, spec.store), "page": result.get("page", {})}
+
+
+# Image fields read alongside each retailer's main image selector, see ProductExtractor.pick_image_url
+def _image_fields(selector: str) -> Dict[str, FieldSpec]:
+    return {
+        "image_src": FieldSpec(selector, "src"),
+        "image_srcset": FieldSpec("picture source[srcset]", "srcset"),
+        "image_data_src": FieldSpec("img[data-src]", "data-src"),
+    }
+
+
+ALDI_SPEC = ExtractionSpec(
+    store="Aldi",
+    tile="div.product-teaser-item",
+    fields={
+        "link": FieldSpec("a.product-tile__link", "href"),
+        "name": FieldSpec("div.product-tile__name p"),
+        "brand": FieldSpec("div.product-tile__brandname p"),
+        "price": FieldSpec("span.base-price__regular span"),
+        "size": FieldSpec("div.product-tile__unit-of-measurement p"),
+        **_image_fields("img.base-image"),
+    },
+    strainer=SoupStrainer("div", class_="product-teaser-item"),
+    page_strainer=SoupStrainer(attrs={"data-test": re.compile(r"^(current-page|page-)")}),
+    page_fields={
+        "current_page": FieldSpec("span.base-pagination__count--active", "data-test"),
+        "page_numbers": FieldSpec('a[data-test^="page-"]', "data-test", many=True),
+        "page_hrefs": FieldSpec('a[data-test^="page-"]', "href", many=True),
+    },
+)
+
+TESCO_SPEC = ExtractionSpec(
+    store="Tesco",
+    tile="li[data-testid]",
+    fields={
+        "link": FieldSpec("a[href^='/groceries/en-GB/products/']", "href"),
+        "title_label": FieldSpec("h3 a[aria-label]", "aria-label"),
+        "title_text": FieldSpec("h3 a[aria-label]"),
+        "price": FieldSpec("p.styled__PriceText-sc-v0qv7n-1"),
+        "clubcard_price": FieldSpec("p.styled__ContentText-sc-1d7lp92-9"),
+        "image_src": FieldSpec("img.styled__StyledImage-sc-1fweb41-1", "src"),
+    },
+    strainer=SoupStrainer("li", attrs={"data-testid": True}),
+    page_strainer=SoupStrainer(["a", "link"], rel="next"),
+    page_fields={
+        "next_page": FieldSpec("a[rel='next'], link[rel='next']", "href"),
+    },
+)
+
+ICELAND_SPEC = ExtractionSpec(
+    store="Iceland",
+    tile="div[data-test-selector='product-list-item']",
+    fields={
+        "link": FieldSpec("a[data-test-selector='product-list-item-name']", "href"),
+        "name": FieldSpec("a[data-test-selector='product-list-item-name']"),
+        "price": FieldSpec("span._105qcvc4il"),
+        "unit_price": FieldSpec("p._105qcvc4mg"),
+        "stars": FieldSpec('svg[viewBox="0 0 24 24"] use', "xlink:href", many=True),
+        **_image_fields("picture img"),
+    },
+    strainer=SoupStrainer("div", attrs={"data-test-selector": "product-list-item"}),
+)
+
+SAINSBURY_SPEC = ExtractionSpec(
+    store="Sainsbury",
+    tile="li.gridItem",
+    fields={
+        "link": FieldSpec("h3 a", "href"),
+        "name": FieldSpec("h3 a"),
+        "price": FieldSpec("p.pricePerUnit"),
+        "price_per_measure": FieldSpec("p.pricePerMeasure"),
+        "rating": FieldSpec("div.reviews img", "alt"),
+        "badges": FieldSpec("div.badges img", "alt", many=True),
+        **_image_fields("h3 a img"),
+    },
+    strainer=SoupStrainer("li", class_="gridItem"),
+)
+
+MORRISON_SPEC = ExtractionSpec(
+    store="Morrisons",
+    tile="div[data-test^='fop-wrapper']",
+    fields={
+        "link": FieldSpec("a[data-test='fop-product-link']", "href"),
+        "name": FieldSpec("h3[data-test='fop-title']"),
+        "price": FieldSpec("span[data-test='fop-price']"),
+        "offer": FieldSpec("span[data-test='fop-offer-text']"),
+        "size": FieldSpec("span.sc-1sjeki5-0"),
+        "unit_price": FieldSpec("span[data-test='fop-price-per-unit']"),
+        "rating_html": FieldSpec("div[data-test='rating-badge']", "outerHTML"),
+        **_image_fields("img[data-test='lazy-load-image']"),
+    },
+    strainer=SoupStrainer("div", attrs={"data-test": re.compile(r"^fop-wrapper")}),
+)
+
+SPECS = {
+    "aldi": ALDI_SPEC,
+    "tesco": TESCO_SPEC,
+    "iceland": ICELAND_SPEC,
+    "sainsbury": SAINSBURY_SPEC,
+    "morrison": MORRISON_SPEC,
+}
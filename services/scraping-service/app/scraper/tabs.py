@@ -0,0 +1,149 @@
+import time
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from .config import Config
+from .readiness import ReadinessProbe
+from .resource_blocking import record_page_resources
+from .throttle import wait_for_slot
+from .utils import logger
+
+# Starts a navigation without waiting for it, unlike driver.get. Deferred so the
+# script returns before the document unloads; the flag stops READY_SCRIPT from
+# judging the outgoing page.
+NAVIGATE_SCRIPT = """
+var url = arguments[0];
+window.__scraperLeaving = true;
+setTimeout(function () { window.location.href = url; }, 0);
+"""
+
+
+class _Tab:
+    def __init__(self, handle: str):
+        self.handle = handle
+        self.job: Any = None
+        self.url: Optional[str] = None
+        self.probe: Optional[ReadinessProbe] = None
+
+
+class TabScheduler:
+    """Loads several pages at once in one browser, each in its own tab.
+
+    Navigations are started in up to ``tabs`` window handles without waiting
+    for them; the tabs are then polled in turn and each page is extracted as
+    soon as it is ready, after which its tab moves on to the next job. One
+    browser thereby overlaps the network waits of several pages.
+    """
+
+    def __init__(self, driver, tile_selector: str, timeout: float, tabs: int = Config.BROWSER_TABS,
+                 scroll: bool = True, poll: float = Config.READY_POLL, store: Optional[str] = None):
+        self.driver = driver
+        self.tile_selector = tile_selector
+        self.timeout = timeout
+        self.max_tabs = max(1, tabs)
+        self.scroll = scroll
+        self.poll = poll
+        self.store = store  # Retailer whose resource-blocking stats each page is added to
+        self._tabs: List[_Tab] = []
+
+    @property
+    def pending(self) -> List[Any]:
+        """Jobs started but not yet handed back, e.g. to requeue when the browser dies."""
+        return [tab.job for tab in self._tabs if tab.probe is not None]
+
+    def run(self, jobs: Iterable[Any], url: Callable[[Any], str],
+            extract: Callable[[Any], Any]) -> Iterator[Tuple[Any, Any, Optional[Exception]]]:
+        """Load ``url(job)`` for each job and yield ``(job, extract(driver), None)`` as pages get ready.
+
+        Results come in the order pages finish, not the order of ``jobs``,
+        which is only drawn from when a tab is free. ``jobs`` may yield WAIT
+        when it has nothing right now but may have later, e.g. pages another
+        browser could hand back; it is asked again on the next round, and
+        the run only ends once it is exhausted. A page with no tiles by
+        its deadline, or whose extraction fails, is yielded as
+        ``(job, None, error)``. The finished page's tab stays selected while
+        the caller handles a result. A WebDriverException from the browser
+        itself is raised, leaving the unfinished jobs in ``pending``. The
+        extra tabs are closed and the first one selected again at the end.
+        """
+        driver = self.driver
+        jobs = iter(jobs)
+        self._tabs = [_Tab(driver.current_window_handle)]
+        exhausted = False
+        try:
+            while True:
+                # Give every idle tab a page, opening tabs up to the limit while there is work
+                waiting = False
+                for tab in self._tabs:
+                    if tab.probe is None and not (exhausted or waiting):
+                        job = next(jobs, _NO_JOB)
+                        exhausted, waiting = job is _NO_JOB, job is WAIT
+                        if not (exhausted or waiting):
+                            self._start(tab, job, url)
+                while not (exhausted or waiting) and len(self._tabs) < self.max_tabs:
+                    job = next(jobs, _NO_JOB)
+                    exhausted, waiting = job is _NO_JOB, job is WAIT
+                    if not (exhausted or waiting):
+                        driver.switch_to.new_window("tab")
+                        tab = _Tab(driver.current_window_handle)
+                        self._tabs.append(tab)
+                        self._start(tab, job, url)
+                busy = [tab for tab in self._tabs if tab.probe is not None]
+                if not busy:
+                    if exhausted:
+                        return
+                    time.sleep(self.poll)
+                    continue
+
+                finished = False
+                for tab in busy:
+                    driver.switch_to.window(tab.handle)
+                    try:
+                        ready = tab.probe.poll(driver)
+                    except TimeoutException as e:
+                        finished = True
+                        yield self._finish(tab, None, e)
+                        continue
+                    if ready is None:
+                        continue
+                    finished = True
+                    if self.store is not None:
+                        record_page_resources(driver, self.store)
+                    try:
+                        result = extract(driver)
+                    except WebDriverException:
+                        raise
+                    except Exception as e:
+                        yield self._finish(tab, None, e)
+                        continue
+                    yield self._finish(tab, result, None)
+                if not finished and not any(tab.probe is not None and tab.probe.scroll_now for tab in busy):
+                    time.sleep(self.poll)
+        finally:
+            self._close_tabs()
+
+    def _start(self, tab: _Tab, job: Any, url: Callable[[Any], str]):
+        """Start ``job``'s navigation in ``tab``."""
+        tab.job, tab.url = job, url(job)
+        wait_for_slot(tab.url)
+        tab.probe = ReadinessProbe(self.tile_selector, self.timeout, self.scroll)  # Pending from here on
+        self.driver.switch_to.window(tab.handle)
+        self.driver.execute_script(NAVIGATE_SCRIPT, tab.url)
+
+    def _finish(self, tab: _Tab, result: Any, error: Optional[Exception]) -> Tuple[Any, Any, Optional[Exception]]:
+        job = tab.job
+        tab.job, tab.url, tab.probe = None, None, None
+        return job, result, error
+
+    def _close_tabs(self):
+        try:
+            for tab in self._tabs[1:]:
+                self.driver.switch_to.window(tab.handle)
+                self.driver.close()
+            self.driver.switch_to.window(self._tabs[0].handle)
+        except WebDriverException as e:
+            logger.warning(f"Could not close the scheduler's tabs: {e}")
+
+
+_NO_JOB = object()
+# Yielded by a job source with no job right now that may have one later
+WAIT = object()
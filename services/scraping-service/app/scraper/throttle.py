@@ -0,0 +1,170 @@
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from lxml import etree
+from selenium.common.exceptions import TimeoutException
+from .config import Config
+from .parsing import parse_tree
+from .utils import get_rate_limiter, logger
+
+# Markers of anti-bot interstitials served with a 200 status, matched against the title and visible text
+BLOCK_MARKERS = (
+    "captcha",
+    "are you a robot",
+    "access denied",
+    "unusual traffic",
+    "request unsuccessful",
+)
+# Containers of bot challenges that render their message with JavaScript
+CHALLENGE_ELEMENTS = etree.XPath("//*[@id='px-captcha' or @id='challenge-form' or @id='captcha-container']")
+# Text a visitor never sees, such as the reCAPTCHA scripts many ordinary pages embed
+HIDDEN_ELEMENTS = etree.XPath("//script | //style | //noscript | //template")
+
+
+class SoftBanError(ValueError):
+    """Raised when a retailer serves a block page or a page without products."""
+
+
+def looks_blocked(html: Optional[str]) -> bool:
+    """Check whether a page is a captcha or block page rather than a listing.
+
+    Markers only count in the page title and visible text, so a listing
+    that merely loads a captcha script is not mistaken for a block page.
+    Pages that mention no marker at all are never parsed.
+    """
+    if not html:
+        return False
+    text = html.lower()
+    if not any(marker in text for marker in BLOCK_MARKERS) and "challenge-form" not in text:
+        return False
+    try:
+        tree = parse_tree(html)
+    except (etree.ParserError, ValueError):
+        return False
+    if CHALLENGE_ELEMENTS(tree):
+        return True
+    for element in HIDDEN_ELEMENTS(tree):
+        element.drop_tree()
+    visible = " ".join(tree.text_content().split()).lower()
+    return any(marker in visible for marker in BLOCK_MARKERS)
+
+
+class AdaptiveThrottle:
+    """AIMD request-rate controller for one retailer host.
+
+    Every successful page raises the allowed rate by ``increase`` requests per
+    minute; every soft-ban signal (403/429, captcha page, missing product
+    content) multiplies it by ``decrease``. Decreases are applied at most once
+    per ``cooldown`` seconds so a burst of concurrent failures counts as one
+    congestion event.
+    """
+
+    def __init__(self, host: str, initial_rpm: float,
+                 min_rpm: float = Config.THROTTLE_MIN_RPM,
+                 max_rpm: float = Config.THROTTLE_MAX_RPM,
+                 increase: float = Config.THROTTLE_INCREASE_RPM,
+                 decrease: float = Config.THROTTLE_DECREASE_FACTOR,
+                 cooldown: float = Config.THROTTLE_COOLDOWN):
+        self.host = host
+        self.min_rpm = min_rpm
+        self.max_rpm = max_rpm
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._rate = min(max(initial_rpm, min_rpm), max_rpm)
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self.successes = 0
+        self.bans = 0
+        self.last_ban_reason = None
+
+    @property
+    def rate(self) -> float:
+        """Current allowed requests per minute."""
+        return self._rate
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self._rate = min(self.max_rpm, self._rate + self.increase)
+
+    def record_ban(self, reason: str) -> float:
+        """Cut the rate after a soft-ban signal and return the backoff to apply, in seconds."""
+        with self._lock:
+            self.bans += 1
+            self.last_ban_reason = reason
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self._rate = max(self.min_rpm, self._rate * self.decrease)
+                self._last_decrease = now
+                logger.warning(f"Throttling {self.host} to {self._rate:.1f} rpm after {reason}")
+            return 60.0 / self._rate
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "rate_rpm": round(self._rate, 2),
+                "min_rpm": self.min_rpm,
+                "max_rpm": self.max_rpm,
+                "successes": self.successes,
+                "bans": self.bans,
+                "last_ban_reason": self.last_ban_reason,
+            }
+
+
+_throttles: Dict[str, AdaptiveThrottle] = {}
+_throttles_lock = threading.Lock()
+
+
+def _host(url_or_host: str) -> str:
+    return urlparse(url_or_host).netloc if "://" in url_or_host else url_or_host
+
+
+def get_throttle(url_or_host: str) -> AdaptiveThrottle:
+    """Return the shared throttle for a retailer host (a URL is accepted too)."""
+    host = _host(url_or_host)
+    with _throttles_lock:
+        throttle = _throttles.get(host)
+        if throttle is None:
+            initial = Config.RATE_LIMIT_HOSTS.get(host, Config.RATE_LIMIT_RPM)
+            throttle = _throttles[host] = AdaptiveThrottle(host, initial)
+        return throttle
+
+
+def wait_for_slot(url: str):
+    """Block until the host's current adaptive rate allows another request."""
+    host = _host(url)
+    get_rate_limiter().wait(host, requests_per_minute=get_throttle(host).rate)
+
+
+def record_browser_failure(driver, url: str, error: Exception):
+    """Feed a failed browser page load into the host's throttle.
+
+    A captcha page or a timeout waiting for product tiles counts as a soft
+    ban; other failures (driver crashes, network errors) leave the rate alone.
+    """
+    try:
+        html = driver.page_source
+    except Exception:
+        html = None
+    if looks_blocked(html):
+        get_throttle(url).record_ban("captcha page")
+    elif isinstance(error, TimeoutException):
+        get_throttle(url).record_ban("no product content")
+
+
+def record_browser_page(url: str, html: Optional[str], has_products: bool):
+    """Feed a page the browser already loaded into the host's throttle."""
+    throttle = get_throttle(url)
+    if looks_blocked(html):
+        throttle.record_ban("captcha page")
+    elif not has_products:
+        throttle.record_ban("no product content")
+    else:
+        throttle.record_success()
+
+
+def throttle_stats() -> Dict[str, Dict[str, object]]:
+    with _throttles_lock:
+        return {host: throttle.stats() for host, throttle in _throttles.items()}
@@ -1,6 +1,13 @@
+import asyncio
+import os
+import sqlite3
+import threading
 import time
 import random
 import logging
+from contextlib import closing
+from typing import Dict, Optional, Tuple
+from .config import Config
 
 # Configure logging
 logging.basicConfig(
@@ -13,26 +20,125 @@ logging.basicConfig(
 )
 logger = logging.getLogger("scraper")
 
+class MemoryBucketStore:
+    """Token buckets kept in process memory, shared by every scraper in the worker."""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, rate: float, capacity: float, now: float) -> float:
+        """Take one token from ``key``'s bucket and return how long to wait for it."""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate) - 1
+            self._buckets[key] = (tokens, now)
+        return 0.0 if tokens >= 0 else -tokens / rate
+
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file so several worker processes share one budget."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def reserve(self, key: str, rate: float, capacity: float, now: float) -> float:
+        """Take one token from ``key``'s bucket and return how long to wait for it."""
+        with closing(self._connect()) as conn:
+            # IMMEDIATE takes the write lock up front so concurrent workers serialize
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated = row if row else (capacity, now)
+                tokens = min(capacity, tokens + max(0.0, now - updated) * rate) - 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    (key, tokens, max(now, updated)),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return 0.0 if tokens >= 0 else -tokens / rate
+
+
 class RateLimiter:
-    """Handles rate limiting for scraping requests to avoid overloading servers."""
-    
-    def __init__(self, requests_per_minute: int = 5):
+    """Token-bucket rate limiting per retailer host to avoid overloading servers.
+
+    Each host gets ``requests_per_minute`` tokens a minute and can burst up to
+    ``burst`` requests. Waiting callers reserve their token up front, so
+    concurrent scrapers queue fairly instead of racing. ``wait`` blocks the
+    calling thread; ``acquire`` is the awaitable equivalent for async code.
+    """
+
+    def __init__(self, requests_per_minute: float = 5, burst: float = 1,
+                 store=None, host_limits: Optional[Dict[str, float]] = None):
         self.requests_per_minute = requests_per_minute
         self.minimum_interval = 60.0 / requests_per_minute
-        self.last_request_time = 0
-    
-    def wait(self):
-        """Wait appropriate time to respect rate limits."""
-        current_time = time.time()
-        elapsed = current_time - self.last_request_time
-        
-        if elapsed < self.minimum_interval:
-            sleep_time = self.minimum_interval - elapsed
+        self.burst = burst
+        self.store = store or MemoryBucketStore()
+        self.host_limits = host_limits or {}
+
+    def requests_per_minute_for(self, key: str) -> float:
+        return self.host_limits.get(key, self.requests_per_minute)
+
+    def _reserve(self, key: Optional[str], requests_per_minute: Optional[float] = None) -> float:
+        key = key or "default"
+        rate = (requests_per_minute or self.requests_per_minute_for(key)) / 60.0
+        delay = self.store.reserve(key, rate, self.burst, time.time())
+        if delay > 0:
             # Add small random jitter to avoid patterns
-            sleep_time += random.uniform(0.1, 0.3)
-            time.sleep(sleep_time)
-            
-        self.last_request_time = time.time()
+            delay += random.uniform(0.1, 0.3)
+        return delay
+
+    def wait(self, key: Optional[str] = None, requests_per_minute: Optional[float] = None):
+        """Block until a request to ``key`` is allowed."""
+        delay = self._reserve(key, requests_per_minute)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire(self, key: Optional[str] = None, requests_per_minute: Optional[float] = None):
+        """Wait without blocking the event loop until a request to ``key`` is allowed."""
+        if isinstance(self.store, SQLiteBucketStore):
+            delay = await asyncio.to_thread(self._reserve, key, requests_per_minute)
+        else:
+            delay = self._reserve(key, requests_per_minute)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the rate limiter shared by every scraper in this process."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            store = None
+            if Config.RATE_LIMIT_BACKEND == 'sqlite':
+                store = SQLiteBucketStore(Config.RATE_LIMIT_DB)
+            _rate_limiter = RateLimiter(
+                requests_per_minute=Config.RATE_LIMIT_RPM,
+                burst=Config.RATE_LIMIT_BURST,
+                store=store,
+                host_limits=Config.RATE_LIMIT_HOSTS,
+            )
+        return _rate_limiter
 
 
 class UserAgentRotator:
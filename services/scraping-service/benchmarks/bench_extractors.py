@@ -0,0 +1,119 @@
+"""Time parse + extraction for every listing page in the corpus, offline.
+
+Each extraction mode from tests/corpus.py is run against each page in the
+corpus; the median time per page and per tile is reported and the output is
+checked field by field against the golden JSON, so both slow-downs and
+selector breakage fail the run.
+
+    python -m benchmarks.bench_extractors
+    python -m benchmarks.bench_extractors --baseline benchmarks/baseline.json
+    python -m benchmarks.bench_extractors --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_extractors --update-golden
+"""
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+from tests.corpus import (
+    REFERENCE_MODE, comparable, corpus_pages, extraction_modes, load_manifest, read_golden, read_html,
+    write_golden
+)
+
+
+def time_mode(extract, html: str, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        extract(html)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def run(runs: int) -> List[Dict[str, Any]]:
+    results = []
+    for page in corpus_pages():
+        html = read_html(page)
+        golden = read_golden(page)
+        for mode, extract in extraction_modes(page["retailer"]).items():
+            products = extract(html)
+            seconds = time_mode(extract, html, runs)
+            results.append({
+                "retailer": page["retailer"],
+                "mode": mode,
+                "tiles": len(products),
+                "ms_per_page": round(seconds * 1000, 3),
+                "ms_per_tile": round(seconds * 1000 / max(len(products), 1), 4),
+                "matches_golden": comparable(products) == golden,
+            })
+    return results
+
+
+def update_golden():
+    for page in corpus_pages():
+        products = extraction_modes(page["retailer"])[REFERENCE_MODE](read_html(page))
+        write_golden(page, comparable(products))
+        print(f"{page['golden']}: {len(products)} products")
+
+
+def regressions(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Modes slower than the baseline by more than ``tolerance`` (0.5 = 50% slower)."""
+    slow = []
+    timings = {(r["retailer"], r["mode"]): r["ms_per_page"] for r in baseline["results"]}
+    for result in results:
+        before = timings.get((result["retailer"], result["mode"]))
+        if before and result["ms_per_page"] > before * (1 + tolerance):
+            slow.append(f"{result['retailer']} {result['mode']}: {result['ms_per_page']}ms, "
+                        f"baseline {before}ms")
+    return slow
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per page and mode")
+    parser.add_argument("--baseline", help="Fail when slower than the timings in this file")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed slow-down against the baseline, as a fraction")
+    parser.add_argument("--save-baseline", help="Write these timings to a baseline file")
+    parser.add_argument("--update-golden", action="store_true",
+                        help=f"Regenerate the golden JSON from {REFERENCE_MODE} and exit")
+    args = parser.parse_args(argv)
+    # Tiles the corpus deliberately breaks would log once per timed run
+    logging.getLogger("scraper").setLevel(logging.CRITICAL)
+
+    if args.update_golden:
+        update_golden()
+        return 0
+
+    results = run(args.runs)
+    print(f"{'retailer':<10} {'mode':<17} {'tiles':>5} {'ms/page':>9} {'ms/tile':>9}  golden")
+    for r in results:
+        print(f"{r['retailer']:<10} {r['mode']:<17} {r['tiles']:>5} {r['ms_per_page']:>9.3f} "
+              f"{r['ms_per_tile']:>9.4f}  {'ok' if r['matches_golden'] else 'MISMATCH'}")
+
+    failed = False
+    mismatches = [r for r in results if not r["matches_golden"]]
+    if mismatches:
+        print(f"\n{len(mismatches)} extraction(s) differ from the golden output", file=sys.stderr)
+        failed = True
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            slow = regressions(results, json.load(f), args.tolerance)
+        for line in slow:
+            print(f"Slower than baseline: {line}", file=sys.stderr)
+        failed = failed or bool(slow)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"corpus_version": load_manifest()["version"], "runs": args.runs, "results": results},
+                      f, indent=2)
+            f.write("\n")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Drive concurrent browse requests at a scraping service pointed at mock_retailer.
+
+Reports latency percentiles, status codes and products per retailer, plus the
+mock's own per-outcome counts when --mock-url is given.
+
+    python -m benchmarks.load_test --requests 40 --concurrency 8 --mock-url http://localhost:8101
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+import httpx
+from app.scraper.config import Config
+
+
+async def _browse(client: httpx.AsyncClient, retailer: str, results: Dict[str, List[dict]]):
+    start = time.perf_counter()
+    try:
+        response = await client.get(f"/browse/{retailer}/freshgroceries")
+        products = len(response.json()) if response.status_code == 200 else 0
+        status = str(response.status_code)
+    except httpx.HTTPError as e:
+        products, status = 0, type(e).__name__
+    results[retailer].append({"seconds": time.perf_counter() - start, "status": status, "products": products})
+
+
+async def run(service_url: str, retailers: List[str], requests: int, concurrency: int,
+              timeout: float) -> Dict[str, List[dict]]:
+    results = defaultdict(list)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(retailer: str):
+        async with semaphore:
+            await _browse(client, retailer, results)
+
+    async with httpx.AsyncClient(base_url=service_url, timeout=timeout) as client:
+        await asyncio.gather(*(one(retailers[i % len(retailers)]) for i in range(requests)))
+    return results
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+def report(results: Dict[str, List[dict]], elapsed: float, mock_stats: Optional[dict]):
+    print(f"{'retailer':<10} {'reqs':>5} {'p50 s':>7} {'p95 s':>7} {'products':>9}  statuses")
+    total = 0
+    for retailer, rows in sorted(results.items()):
+        seconds = [row["seconds"] for row in rows]
+        statuses = Counter(row["status"] for row in rows)
+        total += len(rows)
+        print(f"{retailer:<10} {len(rows):>5} {statistics.median(seconds):>7.2f} "
+              f"{_percentile(seconds, 0.95):>7.2f} {sum(row['products'] for row in rows):>9}  {dict(statuses)}")
+    print(f"\n{total} requests in {elapsed:.1f}s ({total / elapsed:.2f} req/s)")
+    if mock_stats is not None:
+        print(f"mock retailer responses: {mock_stats}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--service-url", default="http://localhost:5001")
+    parser.add_argument("--retailers", default=",".join(Config.RETAILERS))
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--mock-url", help="mock_retailer instance to read response counts from")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = asyncio.run(run(args.service_url, args.retailers.split(","), args.requests,
+                              args.concurrency, args.timeout))
+    elapsed = time.perf_counter() - start
+    mock_stats = httpx.get(f"{args.mock_url}/_mock/stats").json() if args.mock_url else None
+    report(results, elapsed, mock_stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import logging
 import os
 import subprocess
 import sys
+import threading
 import uvicorn
 from fastapi import FastAPI
 from app.scraper.middleware import Middleware
@@ -11,6 +12,16 @@ from app.scraper.routes.tesco_routes import router as tesco_product_router
 from app.scraper.routes.iceland_routes import router as iceland_product_router
 from app.scraper.routes.sainsbury_routes import router as sainsbury_product_router
 from app.scraper.routes.morrison_routes import router as morrison_product_router
+from app.scraper.routes.system_routes import router as system_router
+from app.scraper.routes.job_routes import router as job_router
+from app.scraper.routes.browse_routes import router as browse_router
+from app.scraper.routes.scrape_routes import router as scrape_router
+from app.scraper.config import Config
+from app.scraper.driver_pool import prewarm_driver_pools, close_driver_pools
+from app.scraper.profiles import profile_manager
+from app.scraper.fetcher import fetcher
+from app.scraper.executor import scrape_executor
+from app.scraper.jobs import job_runner
 from selenium import webdriver
 
 from selenium.webdriver.chrome.service import Service
@@ -44,8 +55,38 @@ app.include_router(tesco_product_router)
 app.include_router(iceland_product_router)
 app.include_router(sainsbury_product_router)
 app.include_router(morrison_product_router)
+app.include_router(system_router)
+app.include_router(job_router)
+app.include_router(browse_router)
+app.include_router(scrape_router)
 
 
+@app.on_event("startup")
+def start_driver_pools():
+    """Pre-warm the WebDriver pools without blocking startup"""
+    profile_manager.remove_stale()  # Browser profiles of workers that did not shut down cleanly
+    if Config.DRIVER_POOL_PREWARM:
+        threading.Thread(target=prewarm_driver_pools, daemon=True).start()
+
+
+@app.on_event("startup")
+async def resume_jobs():
+    """Re-queue scrape jobs interrupted by the last shutdown"""
+    await job_runner.resume()
+
+
+@app.on_event("shutdown")
+def stop_driver_pools():
+    """Stop the scrape executor and quit every pooled browser"""
+    scrape_executor.shutdown()
+    close_driver_pools()
+
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Close the pooled async HTTP clients"""
+    await fetcher.aclose()
+
 
 def main():
     """Main entry point for the application"""
@@ -0,0 +1,302 @@
+"""Listing markup for the stand-in retailer, shaped like the pages each controller reads.
+
+Every tile is generated from a seed of (retailer, page, index), so the same
+URL always returns the same products and a load test can check what the
+scrapers produced.
+"""
+import html
+import json
+import random
+
+NAMES = [
+    "Organic Bananas", "British Semi Skimmed Milk", "Free Range Eggs", "Cherry Tomatoes", "Baby Spinach",
+    "Mature Cheddar", "Wholemeal Bread", "Chicken Breast Fillets", "Salmon Fillets", "Greek Style Yogurt",
+    "Red Onions", "Braeburn Apples", "Blueberries", "Carrots", "Broccoli", "Strawberries",
+    "Avocado Ripe & Ready", "Beef Mince 5% Fat", "Houmous", "Sweet Potatoes",
+]
+SIZES = ["500g", "1kg", "2 Litres", "6 pack", "250g", "400g", "150g", "1.5kg", "12 pack", "750ml"]
+
+# Listing path served for each retailer, the same path its controller's groceries_url uses
+LISTING_PATHS = {
+    "tesco": "/groceries/en-GB/shop/fresh-food/all",
+    "aldi": "/en-GB/fresh-food",
+    "iceland": "/fresh",
+    "sainsbury": "/shop/gb/groceries/new---trending/aldi-price-match",
+    "morrison": "/categories",
+}
+
+# Product page paths, matching the links in each retailer's tiles
+PRODUCT_PATHS = {
+    "tesco": "/groceries/en-GB/products/{product_id}",
+    "aldi": "/en-GB/{slug}/{product_id}",
+    "iceland": "/p/{slug}/{product_id}.html",
+    "sainsbury": "/gol/{product_id}/{slug}",
+    "morrison": "/products/{slug}/{product_id}",
+}
+
+# Element wrapping the tiles, which lazily loaded tiles are appended to
+CONTAINERS = {
+    "tesco": ("ul", "product-list"),
+    "aldi": ("div", "product-listing"),
+    "iceland": ("div", "product-grid"),
+    "sainsbury": ("ul", "productLister gridView"),
+    "morrison": ("div", "fops-shelf"),
+}
+
+TITLES = {
+    "tesco": "Fresh Food - Tesco Groceries",
+    "aldi": "Fresh Food | ALDI",
+    "iceland": "Fresh | Iceland Foods",
+    "sainsbury": "New &amp; Trending | Sainsbury's",
+    "morrison": "Fresh | Morrisons",
+}
+
+CAPTCHA_PAGE = (
+    "<!DOCTYPE html><html><head><title>Are you a robot?</title></head><body>"
+    "<h1>Please complete the captcha to continue</h1>"
+    "<p>We have detected unusual traffic from your network.</p></body></html>"
+)
+
+
+def _rng(retailer: str, page: int, index: int) -> random.Random:
+    return random.Random(f"{retailer}:{page}:{index}")
+
+
+def _price(rng: random.Random, index: int) -> str:
+    return f"{rng.randint(30, 99)}p" if index % 5 == 0 else f"£{rng.randint(1, 9)}.{rng.randint(0, 99):02d}"
+
+
+def _unit_price(rng: random.Random) -> str:
+    return f"£{rng.randint(1, 9)}.{rng.randint(0, 99):02d}"
+
+
+def _slug(name: str) -> str:
+    return name.lower().replace("&", "and").replace("%", "").replace(" ", "-")
+
+
+def _image(base_url: str, product_id) -> str:
+    return f"{base_url}/_mock/img/{product_id}.jpg"
+
+
+def _aldi_tile(page: int, i: int, base_url: str) -> str:
+    rng = _rng("aldi", page, i)
+    name = NAMES[(i + page) % len(NAMES)]
+    product_id = f"{page}{i:04d}00000{i % 10}"
+    if i % 4:
+        img = f'<img class="base-image" src="{_image(base_url, product_id)}">'
+    else:
+        img = ('<img class="base-image" src="data:image/gif;base64,R0lG" '
+               f'data-src="{_image(base_url, product_id)}">')
+    brand_name = ["NATURE'S PICK", "CORNISH FARM", "SPECIALLY SELECTED"][i % 3]
+    brand = f'<div class="product-tile__brandname"><p> {html.escape(brand_name)} </p></div>' if i % 6 else ""
+    return (
+        f'<div class="product-teaser-item"><div class="product-tile">'
+        f'<a class="product-tile__link" href="/en-GB/p-{_slug(name)}/{product_id}">'
+        f'<div class="product-tile__image">{img}</div></a>{brand}'
+        f'<div class="product-tile__name"><p>{html.escape(name)}</p></div>'
+        f'<div class="product-tile__unit-of-measurement"><p>{SIZES[i % len(SIZES)]}</p></div>'
+        f'<div class="product-tile__price"><span class="base-price__regular"><span>{_price(rng, i)}</span></span>'
+        f'<span class="base-price__comparison-price">{_unit_price(rng)}/kg</span></div></div></div>'
+    )
+
+
+def _tesco_tile(page: int, i: int, base_url: str) -> str:
+    rng = _rng("tesco", page, i)
+    name = NAMES[(i + page) % len(NAMES)]
+    product_id = 300000000 + page * 10000 + i
+    size = SIZES[i % len(SIZES)]
+    clubcard = (
+        f'<p class="text__StyledText-sc-1jpzi8m-0 styled__ContentText-sc-1d7lp92-9">'
+        f'{_unit_price(rng)} Clubcard Price</p>' if i % 3 == 0 else ""
+    )
+    return (
+        f'<li data-testid="{product_id}"><div class="styled__StyledVerticalTile">'
+        f'<a class="styled__ImageContainer-sc-1fweb41-0" href="/groceries/en-GB/products/{product_id}">'
+        f'<img class="styled__StyledImage-sc-1fweb41-1" src="{_image(base_url, product_id)}"></a>'
+        f'<h3><a aria-label="Tesco {html.escape(name)} {size}" href="/groceries/en-GB/products/{product_id}">'
+        f'<span>Tesco {html.escape(name)}</span></a></h3>'
+        f'<p class="styled__PriceText-sc-v0qv7n-1">{_price(rng, i)}</p>'
+        f'<p class="styled__Subtext-sc-v0qv7n-2">{_unit_price(rng)}/kg</p>{clubcard}</div></li>'
+    )
+
+
+def _iceland_tile(page: int, i: int, base_url: str) -> str:
+    rng = _rng("iceland", page, i)
+    name = NAMES[(i + page) % len(NAMES)]
+    product_id = 60000 + page * 1000 + i
+    full = i % 5
+    half = 1 if i % 2 and full < 5 else 0
+    stars = "".join(
+        f'<svg viewBox="0 0 24 24"><use xlink:href="/icons.svg#review-star-{kind}"></use></svg>'
+        for kind in ["fill"] * full + ["half"] * half + ["empty"] * (5 - full - half)
+    )
+    if i % 3 == 0:
+        picture = (f'<picture><source srcset="{_image(base_url, product_id)}?w=400 400w, '
+                   f'{_image(base_url, product_id)}?w=200 200w"><img alt="" src="data:image/png;base64,AAA"></picture>')
+    else:
+        picture = f'<picture><img alt="{html.escape(name)}" src="{_image(base_url, product_id)}"></picture>'
+    unit_price = f'<p class="_105qcvc4mg">{_unit_price(rng)} per kg</p>' if i % 4 else ""
+    link = f"/p/{_slug(name)}/{product_id}.html"
+    return (
+        f'<div data-test-selector="product-list-item"><a href="{link}">{picture}</a>'
+        f'<a data-test-selector="product-list-item-name" href="{link}">'
+        f'Iceland {html.escape(name)} {SIZES[i % len(SIZES)]}</a>'
+        f'<div class="rating">{stars}</div><span class="_105qcvc4il">{_price(rng, i)}</span>{unit_price}</div>'
+    )
+
+
+def _sainsbury_tile(page: int, i: int, base_url: str) -> str:
+    rng = _rng("sainsbury", page, i)
+    name = NAMES[(i + page) % len(NAMES)]
+    product_id = 7000000 + page * 1000 + i
+    badges = "".join(
+        f'<img alt="{badge}" src="/badge.png">'
+        for badge in (["Nectar Price"] if i % 3 == 0 else []) + (["New"] if i % 7 == 0 else [])
+    )
+    reviews = (f'<div class="reviews"><img alt="{i % 5}_{i % 10}" src="/stars.png">'
+               f'<a class="numberOfReviews">Reviews ({i * 3})</a></div>' if i % 2 else "")
+    return (
+        f'<li class="gridItem"><div class="productNameAndPromotions"><h3>'
+        f'<a href="{base_url}/gol/{product_id}/sainsburys-{_slug(name)}">'
+        f'<img alt="" src="{_image(base_url, product_id)}">'
+        f'Sainsbury&#39;s {html.escape(name)} {SIZES[i % len(SIZES)]}</a></h3></div>{reviews}'
+        f'<div class="badges">{badges}</div><div class="pricing">'
+        f'<p class="pricePerUnit">{_price(rng, i)}<abbr title="per">/</abbr>'
+        f'<abbr title="unit"><span class="pricePerUnitUnit">unit</span></abbr></p>'
+        f'<p class="pricePerMeasure">{_unit_price(rng)}<abbr title="per">/</abbr>'
+        f'<abbr title="kilogram"><span class="pricePerMeasureMeasure">kg</span></abbr></p></div></li>'
+    )
+
+
+def _morrison_tile(page: int, i: int, base_url: str) -> str:
+    rng = _rng("morrison", page, i)
+    name = NAMES[(i + page) % len(NAMES)]
+    product_id = 100000000 + page * 10000 + i
+    rating = ""
+    if i % 3 == 1:
+        rating = (f'<div data-test="rating-badge"><span class="salt-vc">Rating, {i % 5}.{i % 10} out of 5 '
+                  f'from {i * 2} reviews</span>'
+                  + '<svg data-test="icon__reviews"></svg>' * (i % 5) + "</div>")
+    offer = f'<span data-test="fop-offer-text">Any 3 for £{rng.randint(3, 9)}</span>' if i % 4 == 0 else ""
+    return (
+        f'<div data-test="fop-wrapper:{product_id}"><div class="fop">'
+        f'<a data-test="fop-product-link" href="/products/morrisons-{_slug(name)}/{product_id}">'
+        f'<img data-test="lazy-load-image" src="{_image(base_url, product_id)}"></a>'
+        f'<h3 data-test="fop-title">Morrisons {html.escape(name)}</h3>'
+        f'<span class="sc-1sjeki5-0">{SIZES[i % len(SIZES)]}</span>{rating}'
+        f'<span data-test="fop-price">{_price(rng, i)}</span>'
+        f'<span data-test="fop-price-per-unit">({_unit_price(rng)} per kg)</span>{offer}</div></div>'
+    )
+
+
+TILE_RENDERERS = {
+    "tesco": _tesco_tile,
+    "aldi": _aldi_tile,
+    "iceland": _iceland_tile,
+    "sainsbury": _sainsbury_tile,
+    "morrison": _morrison_tile,
+}
+
+
+def render_tiles(retailer: str, page: int, start: int, stop: int, base_url: str) -> str:
+    """Markup for tiles ``start`` to ``stop`` of one listing page."""
+    render = TILE_RENDERERS[retailer]
+    return "".join(render(page, i, base_url) for i in range(start, stop))
+
+
+def _aldi_pagination(page: int, pages: int) -> str:
+    links = []
+    for number in range(1, pages + 1):
+        if number == page:
+            links.append(f'<span class="base-pagination__count base-pagination__count--active" '
+                         f'data-test="current-page{number}">{number}</span>')
+        else:
+            links.append(f'<a class="base-pagination__count" data-test="page-{number}" '
+                         f'href="{LISTING_PATHS["aldi"]}?page={number}&amp;sort=relevance">{number}</a>')
+    return f'<nav class="base-pagination">{"".join(links)}</nav>'
+
+
+def _tesco_pagination(page: int, pages: int) -> str:
+    if page >= pages:
+        return ""
+    return (f'<nav aria-label="pagination"><a rel="next" '
+            f'href="{LISTING_PATHS["tesco"]}?page={page + 1}">Next</a></nav>')
+
+
+def _lazy_loader(selector: str, url: str) -> str:
+    # Fetches the rest of the tiles on the first scroll, like the retailers' infinite listings
+    return (
+        "<script>(function () {"
+        "var loaded = false;"
+        "window.addEventListener('scroll', function () {"
+        "if (loaded) return; loaded = true;"
+        f"fetch({json.dumps(url)}).then(function (r) {{ return r.text(); }}).then(function (markup) {{"
+        f"document.querySelector({json.dumps(selector)}).insertAdjacentHTML('beforeend', markup);"
+        "});"
+        "}, {passive: true});"
+        "})();</script>"
+    )
+
+
+def _chrome(title: str, body: str) -> str:
+    nav = "".join(
+        f'<li class="nav__item"><a href="/c/{i}">Category {i}</a><ul>'
+        + "".join(f'<li><a href="/c/{i}/{j}">Sub {j}</a></li>' for j in range(12))
+        + "</ul></li>"
+        for i in range(25)
+    )
+    footer = "".join(f'<p class="footer__text">Legal text paragraph {i}.</p>' for i in range(40))
+    return (
+        f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>{title}</title></head>'
+        f'<body><header><nav><ul class="nav">{nav}</ul></nav></header><main>{body}</main>'
+        f'<footer>{footer}</footer></body></html>'
+    )
+
+
+def render_listing(retailer: str, page: int, pages: int, tiles: int, eager: int,
+                   base_url: str, lazy_url: str) -> str:
+    """A full listing page with ``eager`` tiles inline and the rest loaded on scroll."""
+    tag, css_class = CONTAINERS[retailer]
+    eager = min(eager, tiles)
+    body = f'<{tag} class="{css_class}">{render_tiles(retailer, page, 0, eager, base_url)}</{tag}>'
+    if retailer == "aldi" and pages > 1:
+        body += _aldi_pagination(page, pages)
+    if retailer == "tesco":
+        body += _tesco_pagination(page, pages)
+    if eager < tiles:
+        body += _lazy_loader(f"{tag}.{css_class.split()[0]}", lazy_url)
+    return _chrome(TITLES[retailer], body)
+
+
+
+def render_product_page(retailer: str, product_id: str, url: str, base_url: str) -> str:
+    """A product page carrying JSON-LD, or only OpenGraph tags for Morrisons."""
+    rng = random.Random(f"{retailer}:product:{product_id}")
+    name = f"{rng.choice(NAMES)} {rng.choice(SIZES)}"
+    price = f"{rng.randint(0, 9)}.{rng.randint(10, 99)}"
+    image = _image(base_url, product_id)
+    head = (
+        f'<meta property="og:title" content="{html.escape(name)}">'
+        f'<meta property="og:image" content="{image}">'
+        f'<meta property="og:url" content="{html.escape(url)}">'
+        f'<meta property="product:price:amount" content="{price}">'
+        f'<meta property="product:price:currency" content="GBP">'
+    )
+    if retailer != "morrison":
+        product = {
+            "@context": "https://schema.org",
+            "@type": "Product",
+            "name": name,
+            "sku": str(product_id),
+            "image": [image],
+            "brand": {"@type": "Brand", "name": retailer.title()},
+            "description": f"{name} from {retailer.title()}.",
+            "aggregateRating": {"@type": "AggregateRating", "ratingValue": round(rng.uniform(3, 5), 1)},
+            "offers": {"@type": "Offer", "price": price, "priceCurrency": "GBP",
+                       "availability": "https://schema.org/InStock"},
+        }
+        head += f'<script type="application/ld+json">{json.dumps(product)}</script>'
+    body = (f'<h1 class="product-title">{html.escape(name)}</h1>'
+            f'<p class="product-price">£{price}</p><img src="{image}">')
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>{html.escape(name)}</title>'
+            f'{head}</head><body><main class="product-details">{body}</main></body></html>')
@@ -0,0 +1,181 @@
+"""Stand-in retailer site for load-testing the scrapers on one machine.
+
+Serves paginated, lazily loaded listings and product pages for all five
+retailers on the same paths as the real sites, with configurable latency,
+server errors, 429s and captcha pages. Point the scraping service at it with
+the per-retailer URL overrides, one port per retailer so each gets its own
+rate limit and throttle, as they would against the real hosts:
+
+    python -m mock_retailer.server --port 8101 &
+    python -m mock_retailer.server --port 8102 &
+    ALDI_BASE_URL=http://localhost:8101 TESCO_BASE_URL=http://localhost:8102 uvicorn main:app --port 5001
+
+The fault knobs are read from MOCK_* environment variables and can be
+changed while a test runs with POST /_mock/config.
+"""
+import argparse
+import asyncio
+import base64
+import os
+import random
+from collections import Counter, defaultdict
+from typing import Optional
+import uvicorn
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, Response
+from pydantic import BaseModel, Field
+from .pages import CAPTCHA_PAGE, LISTING_PATHS, PRODUCT_PATHS, render_listing, render_product_page, render_tiles
+
+# 1x1 transparent GIF served for every product image
+PIXEL = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+
+class MockSettings(BaseModel):
+    """Page shape and fault injection for the stand-in retailer."""
+    latency_ms: float = Field(float(os.getenv("MOCK_LATENCY_MS", 300)), ge=0)
+    latency_jitter_ms: float = Field(float(os.getenv("MOCK_LATENCY_JITTER_MS", 200)), ge=0)
+    error_rate: float = Field(float(os.getenv("MOCK_ERROR_RATE", 0)), ge=0, le=1)  # 500 responses
+    throttle_rate: float = Field(float(os.getenv("MOCK_429_RATE", 0)), ge=0, le=1)  # 429 responses
+    captcha_rate: float = Field(float(os.getenv("MOCK_CAPTCHA_RATE", 0)), ge=0, le=1)  # 200 block pages
+    retry_after: int = Field(int(os.getenv("MOCK_RETRY_AFTER", 5)), ge=0)
+    pages: int = Field(int(os.getenv("MOCK_PAGES", 4)), ge=1)
+    tiles_per_page: int = Field(int(os.getenv("MOCK_TILES_PER_PAGE", 30)), ge=0)
+    eager_tiles: int = Field(int(os.getenv("MOCK_EAGER_TILES", 12)), ge=0)  # The rest load on scroll
+
+
+class MockSettingsUpdate(BaseModel):
+    latency_ms: Optional[float] = Field(None, ge=0)
+    latency_jitter_ms: Optional[float] = Field(None, ge=0)
+    error_rate: Optional[float] = Field(None, ge=0, le=1)
+    throttle_rate: Optional[float] = Field(None, ge=0, le=1)
+    captcha_rate: Optional[float] = Field(None, ge=0, le=1)
+    retry_after: Optional[int] = Field(None, ge=0)
+    pages: Optional[int] = Field(None, ge=1)
+    tiles_per_page: Optional[int] = Field(None, ge=0)
+    eager_tiles: Optional[int] = Field(None, ge=0)
+
+
+app = FastAPI(title="Mock Retailer", description="Stand-in retailer listings for scraper load tests")
+app.state.settings = MockSettings()
+app.state.stats = defaultdict(Counter)
+
+
+def _base_url(request: Request) -> str:
+    return str(request.base_url).rstrip("/")
+
+
+async def _inject_faults(request: Request, retailer: str) -> Optional[Response]:
+    """Delay the response and maybe replace it with a configured failure."""
+    settings = request.app.state.settings
+    stats = request.app.state.stats[retailer]
+    delay = settings.latency_ms + random.uniform(0, settings.latency_jitter_ms)
+    if delay:
+        await asyncio.sleep(delay / 1000)
+    roll = random.random()
+    if roll < settings.throttle_rate:
+        stats["throttled"] += 1
+        return Response("Too Many Requests", status_code=429,
+                        headers={"Retry-After": str(settings.retry_after)})
+    roll -= settings.throttle_rate
+    if roll < settings.error_rate:
+        stats["errors"] += 1
+        return Response("Internal Server Error", status_code=500)
+    roll -= settings.error_rate
+    if roll < settings.captcha_rate:
+        stats["captchas"] += 1
+        return HTMLResponse(CAPTCHA_PAGE)
+    stats["pages"] += 1
+    return None
+
+
+def _listing_route(retailer: str):
+    async def listing(request: Request, page: int = Query(1, ge=1)):
+        settings = request.app.state.settings
+        if page > settings.pages:
+            raise HTTPException(status_code=404, detail="Page not found")
+        failure = await _inject_faults(request, retailer)
+        if failure is not None:
+            return failure
+        lazy_url = f"/_mock/tiles/{retailer}?page={page}"
+        return HTMLResponse(render_listing(
+            retailer, page, settings.pages, settings.tiles_per_page, settings.eager_tiles,
+            _base_url(request), lazy_url,
+        ))
+
+    listing.__name__ = f"{retailer}_listing"
+    return listing
+
+
+def _product_route(retailer: str):
+    async def product(request: Request, product_id: str):
+        failure = await _inject_faults(request, retailer)
+        if failure is not None:
+            return failure
+        return HTMLResponse(render_product_page(retailer, product_id, str(request.url), _base_url(request)))
+
+    product.__name__ = f"{retailer}_product"
+    return product
+
+
+for _retailer, _path in LISTING_PATHS.items():
+    app.add_api_route(_path, _listing_route(_retailer), methods=["GET"], response_class=HTMLResponse)
+
+for _retailer, _path in PRODUCT_PATHS.items():
+    app.add_api_route(_path, _product_route(_retailer), methods=["GET"], response_class=HTMLResponse)
+
+
+@app.get("/_mock/tiles/{retailer}", response_class=HTMLResponse)
+async def lazy_tiles(request: Request, retailer: str, page: int = Query(1, ge=1)):
+    """Tiles a listing page loads after the first scroll."""
+    if retailer not in LISTING_PATHS:
+        raise HTTPException(status_code=404, detail="Unknown retailer")
+    settings = request.app.state.settings
+    failure = await _inject_faults(request, retailer)
+    if failure is not None:
+        return failure
+    return HTMLResponse(render_tiles(
+        retailer, page, min(settings.eager_tiles, settings.tiles_per_page), settings.tiles_per_page,
+        _base_url(request),
+    ))
+
+
+@app.get("/_mock/img/{name}")
+async def product_image(name: str):
+    return Response(PIXEL, media_type="image/gif", headers={"Cache-Control": "max-age=86400"})
+
+
+@app.get("/_mock/config", response_model=MockSettings)
+async def get_config(request: Request):
+    return request.app.state.settings
+
+
+@app.post("/_mock/config", response_model=MockSettings)
+async def update_config(request: Request, update: MockSettingsUpdate):
+    """Change page shape or fault rates while a load test runs."""
+    settings = request.app.state.settings
+    request.app.state.settings = settings.model_copy(update=update.model_dump(exclude_none=True))
+    return request.app.state.settings
+
+
+@app.get("/_mock/stats")
+async def get_stats(request: Request):
+    """Responses served per retailer, by outcome."""
+    return {retailer: dict(counts) for retailer, counts in request.app.state.stats.items()}
+
+
+@app.post("/_mock/stats/reset")
+async def reset_stats(request: Request):
+    request.app.state.stats.clear()
+    return {"status": "reset"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in retailer site for scraper load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args(argv)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
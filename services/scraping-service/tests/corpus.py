@@ -0,0 +1,70 @@
+"""Offline listing-page corpus shared by the extractor tests and benchmarks."""
+import json
+import os
+from typing import Any, Callable, Dict, List
+from bs4 import BeautifulSoup
+from app.scraper.factory import ScraperFactory
+from app.scraper.parsing import parse_tiles
+from app.scraper.specs import SPECS, products_from_tiles
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Fields that change on every run and are left out of golden comparisons
+VOLATILE_FIELDS = ("timestamp",)
+
+
+def load_manifest() -> Dict[str, Any]:
+    with open(os.path.join(FIXTURES_DIR, "manifest.json")) as f:
+        return json.load(f)
+
+
+def corpus_pages() -> List[Dict[str, Any]]:
+    return load_manifest()["pages"]
+
+
+def read_html(page: Dict[str, Any]) -> str:
+    with open(os.path.join(FIXTURES_DIR, page["html"]), encoding="utf-8") as f:
+        return f.read()
+
+
+def read_golden(page: Dict[str, Any]) -> List[Dict[str, Any]]:
+    with open(os.path.join(FIXTURES_DIR, page["golden"]), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_golden(page: Dict[str, Any], products: List[Dict[str, Any]]):
+    with open(os.path.join(FIXTURES_DIR, page["golden"]), "w", encoding="utf-8") as f:
+        json.dump(products, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def comparable(products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{k: v for k, v in product.items() if k not in VOLATILE_FIELDS} for product in products]
+
+
+def offline_scraper(retailer: str):
+    """A controller instance for extraction only; it never touches its driver."""
+    return ScraperFactory.get_scraper(retailer, driver=object())
+
+
+def extraction_modes(retailer: str) -> Dict[str, Callable[[str], List[Dict[str, Any]]]]:
+    """Every way a controller can turn listing HTML into products, keyed by name.
+
+    soup/* run the controller's ProductExtractor code on a BeautifulSoup tree;
+    spec/* read the retailer's ExtractionSpec and build products from the raw
+    fields, as the in-browser path does.
+    """
+    scraper = offline_scraper(retailer)
+    spec = SPECS[retailer]
+    return {
+        "soup/html.parser": lambda html: scraper._products_from_soup(BeautifulSoup(html, "html.parser")),
+        "soup/lxml": lambda html: scraper._products_from_soup(parse_tiles(html, spec, "lxml")),
+        "spec/html.parser": lambda html: products_from_tiles(
+            spec.extract_html(html, "html.parser")["tiles"], scraper._product_from_fields, spec.store),
+        "spec/lxml": lambda html: products_from_tiles(
+            spec.extract_html(html, "lxml")["tiles"], scraper._product_from_fields, spec.store),
+    }
+
+
+# The reference extraction the golden files are generated from
+REFERENCE_MODE = "soup/html.parser"
@@ -0,0 +1,70 @@
+import json
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.scraper.routes import common
+from app.scraper.routes.browse_routes import router
+
+
+def fake_iter_groceries(store_key):
+    """Stand-in scrapes: tesco is fast, aldi slow, iceland fails part-way, sainsbury hangs."""
+    if store_key == "tesco":
+        for i in range(3):
+            yield {"store": "Tesco", "name": f"Tesco product {i}"}
+    elif store_key == "aldi":
+        for i in range(2):
+            time.sleep(0.2)
+            yield {"store": "Aldi", "name": f"Aldi product {i}"}
+    elif store_key == "iceland":
+        yield {"store": "Iceland", "name": "Iceland product 0"}
+        raise RuntimeError("listing changed")
+    elif store_key == "sainsbury":
+        time.sleep(2)
+        yield {"store": "Sainsbury", "name": "too late"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(common, "iter_groceries", fake_iter_groceries)
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_merges_retailers_with_a_status_line_each(client):
+    response = client.get("/browse/all", params={"retailers": "tesco,aldi,iceland"})
+    lines = _lines(response)
+    statuses = {line["retailer"]: line for line in lines if "status" in line}
+    products = [line for line in lines if "status" not in line]
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert statuses["tesco"]["status"] == "completed" and statuses["tesco"]["products"] == 3
+    assert statuses["aldi"]["status"] == "completed" and statuses["aldi"]["products"] == 2
+    assert statuses["iceland"]["status"] == "failed" and "listing changed" in statuses["iceland"]["error"]
+    assert sorted(p["retailer"] for p in products) == ["aldi", "aldi", "iceland", "tesco", "tesco", "tesco"]
+    # Fast retailers are not held back by slow ones
+    assert lines.index(statuses["tesco"]) < lines.index(statuses["aldi"])
+
+
+def test_slow_retailer_times_out_alone(client):
+    start = time.monotonic()
+    response = client.get("/browse/all", params={"retailers": "tesco,sainsbury", "timeout": 0.5})
+    statuses = {line["retailer"]: line for line in _lines(response) if "status" in line}
+
+    assert statuses["tesco"]["status"] == "completed"
+    assert statuses["sainsbury"]["status"] == "timeout"
+    assert statuses["sainsbury"]["products"] == 0
+    assert time.monotonic() - start < 1.5
+
+
+def test_unknown_retailer_is_rejected(client):
+    response = client.get("/browse/all", params={"retailers": "tesco,lidl"})
+
+    assert response.status_code == 400
+    assert "lidl" in response.json()["detail"]
@@ -0,0 +1,208 @@
+import sqlite3
+import threading
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.scraper.changes import ChangeLog, CursorExpired
+from app.scraper.routes import common
+from app.scraper.routes.browse_routes import router
+from app.scraper.snapshots import SnapshotCache, SnapshotStore
+
+
+def _product(external_id, price, name=None, **fields):
+    return {"store": "Tesco", "url": f"https://tesco/p/{external_id}", "external_id": external_id,
+            "name": name or f"Product {external_id}", "price": price, **fields}
+
+
+@pytest.fixture
+def log(tmp_path):
+    return ChangeLog(str(tmp_path / "changes.db"))
+
+
+def test_first_scrape_adds_everything(log):
+    assert log.record("tesco", [_product("1", 1.0), _product("2", 2.0)]) == 2
+
+    changes, cursor, more = log.changes("tesco", since=0)
+
+    assert [(c["change"], c["key"]) for c in changes] == [("added", "1"), ("added", "2")]
+    assert (cursor, more) == (2, False)
+
+
+def test_only_tracked_changes_are_logged(tmp_path):
+    log = ChangeLog(str(tmp_path / "changes.db"), remove_after=1)
+    log.record("tesco", [_product("1", 1.0), _product("2", 2.0), _product("3", 3.0)])
+    _, cursor, _ = log.changes("tesco", since=0)
+
+    # A new name or timestamp alone is not a change; price, offer and rating are
+    changed = log.record("tesco", [
+        _product("1", 1.0, name="Renamed", timestamp="later"),
+        _product("2", 1.5),
+        _product("4", 4.0, badges="Clubcard Price"),
+    ])
+    changes, cursor, _ = log.changes("tesco", since=cursor)
+
+    assert changed == 3
+    assert [(c["change"], c["key"]) for c in changes] == [("changed", "2"), ("added", "4"), ("removed", "3")]
+    assert changes[0]["product"]["price"] == 1.5
+    assert changes[2]["product"]["price"] == 3.0  # Last seen before removal
+    assert log.record("tesco", [_product("1", 1.0), _product("2", 1.5), _product("4", 4.0, badges="Clubcard Price")]) == 0
+    assert log.changes("tesco", since=cursor)[0] == []
+
+
+def test_pages_by_cursor(log):
+    log.record("tesco", [_product(str(i), float(i)) for i in range(5)])
+
+    first, cursor, more = log.changes("tesco", since=0, limit=3)
+    rest, end, done = log.changes("tesco", since=cursor, limit=3)
+
+    assert (len(first), more) == (3, True)
+    assert (len(rest), done) == (2, False)
+    assert [c["key"] for c in first + rest] == ["0", "1", "2", "3", "4"]
+    assert log.changes("tesco", since=end) == ([], end, False)
+
+
+def test_product_is_removed_only_after_missing_from_several_scrapes(log):
+    log.record("tesco", [_product("1", 1.0), _product("2", 2.0)])
+    _, cursor, _ = log.changes("tesco", since=0)
+
+    log.record("tesco", [_product("2", 2.0)])  # A partial scrape
+    log.record("tesco", [_product("1", 1.0), _product("2", 2.0)])
+    assert log.changes("tesco", since=cursor)[0] == []
+
+    for _ in range(log.remove_after):
+        log.record("tesco", [_product("2", 2.0)])
+    assert [(c["change"], c["key"]) for c in log.changes("tesco", since=cursor)[0]] == [("removed", "1")]
+
+
+def test_without_cursor_returns_current_state(tmp_path):
+    log = ChangeLog(str(tmp_path / "changes.db"), remove_after=1)
+    log.record("tesco", [_product("1", 1.0), _product("2", 2.0)])
+    log.record("tesco", [_product("2", 2.5)])
+
+    changes, cursor, _ = log.changes("tesco")
+
+    assert [(c["key"], c["product"]["price"]) for c in changes] == [("2", 2.5)]
+    assert log.changes("tesco", since=cursor)[0] == []
+
+
+class ScrapeMidRead(ChangeLog):
+    """Records a scrape from another thread just after changes() has read the latest sequence."""
+
+    pending = None
+
+    def _connect(self):
+        log = self
+
+        class Connection(sqlite3.Connection):
+            def execute(self, sql, *args):
+                cursor = super().execute(sql, *args)
+                if sql.startswith("SELECT COALESCE(MAX(seq)") and log.pending:
+                    log.writer = threading.Thread(target=log.record, args=("tesco", log.pending))
+                    log.pending = None
+                    log.writer.start()
+                    log.writer.join(0.3)  # Long enough to commit, unless the read holds it off
+                return cursor
+
+        return sqlite3.connect(self.path, timeout=30, factory=Connection)
+
+
+def test_current_state_and_its_cursor_come_from_one_read(tmp_path):
+    log = ScrapeMidRead(str(tmp_path / "changes.db"))
+    log.record("tesco", [_product("1", 1.0)])
+    log.pending = [_product("1", 1.0), _product("2", 2.0)]
+
+    state, cursor, _ = log.changes("tesco")
+    log.writer.join()
+    changes = log.changes("tesco", since=cursor)[0]
+
+    # Product 2 is either in the state or in the changes after its cursor, never both
+    assert [c["key"] for c in state + changes] == ["1", "2"]
+
+
+def test_current_state_is_paged_by_key(log):
+    log.record("tesco", [_product(str(i), float(i)) for i in range(5)])
+
+    first, _, more = log.changes("tesco", limit=3)
+    rest, _, done = log.changes("tesco", limit=3, after=first[-1]["key"])
+
+    assert (more, done) == (True, False)
+    assert [c["key"] for c in first + rest] == ["0", "1", "2", "3", "4"]
+
+
+def test_retailers_are_kept_apart(log):
+    log.record("tesco", [_product("1", 1.0)])
+    log.record("aldi", [_product("1", 9.0)])
+
+    assert [c["product"]["price"] for c in log.changes("aldi", since=0)[0]] == [9.0]
+
+
+def test_pruned_cursor_has_expired(tmp_path):
+    log = ChangeLog(str(tmp_path / "changes.db"), retention=0)
+    log.record("tesco", [_product("1", 1.0)])
+    log.record("tesco", [_product("1", 2.0)])
+
+    with pytest.raises(CursorExpired):
+        log.changes("tesco", since=0)
+
+
+class Scrapes:
+    """Hands out one product list per scrape, signalling each scrape."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.scraped = threading.Event()
+
+    def __call__(self, retailer):
+        self.scraped.set()
+        result = self.results.pop(0) if self.results else []
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = SnapshotCache(SnapshotStore(str(tmp_path / "snapshots.db")), ttl=60, max_stale=600,
+                          changes=ChangeLog(str(tmp_path / "changes.db")))
+    monkeypatch.setattr(common, "snapshot_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def client(cache):
+    app = FastAPI()
+    app.include_router(router)
+    with TestClient(app) as test_client:  # One event loop across requests, for the background refresh
+        yield test_client
+
+
+def test_changes_endpoint(client, cache, monkeypatch):
+    monkeypatch.setattr(common, "browse_groceries", Scrapes())
+    cache.store.put("tesco", [_product("1", 1.0), _product("2", 1.8)])  # Fresh, so no refresh is started
+    cache.changes.record("tesco", [_product("1", 1.0), _product("2", 2.0), _product("3", 3.0)])
+    first_page = client.get("/browse/tesco/changes", params={"limit": 2}).json()
+    last_page = client.get("/browse/tesco/changes", params={"since": first_page["cursor"], "limit": 2}).json()
+    cache.changes.record("tesco", [_product("1", 1.0), _product("2", 1.8), _product("3", 3.0)])
+    second = client.get("/browse/tesco/changes", params={"since": last_page["cursor"]}).json()
+
+    assert first_page["more"] and not last_page["more"]
+    assert [c["key"] for c in first_page["changes"] + last_page["changes"]] == ["1", "2", "3"]
+    assert [(c["change"], c["key"], c["product"]["price"]) for c in second["changes"]] == [("changed", "2", 1.8)]
+    assert int(second["cursor"]) > int(last_page["cursor"])
+
+
+def test_changes_endpoint_refreshes_in_the_background_and_serves_the_log_when_it_fails(client, cache, monkeypatch):
+    scrapes = Scrapes(RuntimeError("Tesco is down"))
+    monkeypatch.setattr(common, "browse_groceries", scrapes)
+    cache.changes.record("tesco", [_product("1", 1.0)])
+
+    response = client.get("/browse/tesco/changes")  # No snapshot yet, so a refresh starts
+
+    assert response.status_code == 200
+    assert [c["key"] for c in response.json()["changes"]] == ["1"]
+    assert scrapes.scraped.wait(2)
+
+
+def test_changes_endpoint_rejects_bad_requests(client):
+    assert client.get("/browse/lidl/changes").status_code == 404
+    assert client.get("/browse/tesco/changes", params={"since": "abc"}).status_code == 400
@@ -0,0 +1,174 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.scraper import breaker, browse
+from app.scraper.breaker import (
+    CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, CircuitBreaker, CircuitOpen, get_circuit_breaker
+)
+from app.scraper.base import PageFetchError
+from app.scraper.config import Config
+from app.scraper.driver_pool import DriverPoolExhausted
+from app.scraper.executor import ScrapeCancelled
+from app.scraper.fetch_backends import HttpListingScraper
+from app.scraper.frontier import CatalogueCrawl, FrontierStore
+from app.scraper.product_pages import ProductPageScraper
+from app.scraper.routes import common
+from app.scraper.routes.aldi_routes import router
+from app.scraper.routes.scrape_routes import router as scrape_router
+from app.scraper.snapshots import SnapshotCache, SnapshotStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breaker.time, "monotonic", clock)
+    monkeypatch.setattr(breaker, "_breakers", {})
+    return clock
+
+
+def _breaker():
+    return CircuitBreaker("aldi", window=600, min_calls=3, failure_rate=0.5, open_for=60, max_open_for=200, probes=1)
+
+
+def test_opens_once_enough_scrapes_fail_in_the_window(clock):
+    circuit = _breaker()
+    for succeeded in (False, True):
+        circuit.record(succeeded, circuit.acquire())
+    clock.now += 700  # Both outcomes fall out of the window
+    for succeeded in (False, True):
+        circuit.record(succeeded, circuit.acquire())
+    assert circuit.state == CIRCUIT_CLOSED
+
+    circuit.record(False, circuit.acquire())
+
+    assert circuit.state == CIRCUIT_OPEN
+    with pytest.raises(CircuitOpen) as refused:
+        circuit.acquire()
+    assert refused.value.retry_after == 60
+
+
+def test_half_open_probe_closes_or_reopens_for_longer(clock):
+    circuit = _breaker()
+    for _ in range(3):
+        circuit.record(False, circuit.acquire())
+
+    clock.now += 60
+    assert circuit.state == CIRCUIT_HALF_OPEN
+    probe = circuit.acquire()
+    with pytest.raises(CircuitOpen):
+        circuit.check()  # One probe at a time
+    circuit.record(False, probe)
+    with pytest.raises(CircuitOpen) as refused:
+        circuit.check()
+    assert refused.value.retry_after == 120
+
+    clock.now += 120
+    circuit.record(True, circuit.acquire())
+
+    assert circuit.state == CIRCUIT_CLOSED and circuit.acquire() is False
+    assert circuit.stats()["opened"] == 2
+
+
+def test_browse_records_outcomes_but_not_cancellations(clock, monkeypatch):
+    def failing(store_key):
+        raise RuntimeError("blocked")
+        yield
+
+    def cancelled(store_key):
+        raise ScrapeCancelled()
+        yield
+
+    circuit = get_circuit_breaker("aldi")
+    monkeypatch.setattr(browse, "_iter_groceries", cancelled)
+    for _ in range(3):
+        with pytest.raises(ScrapeCancelled):
+            browse.browse_groceries("aldi")
+    assert circuit.stats()["calls"] == 0
+
+    monkeypatch.setattr(browse, "_iter_groceries", lambda store_key: iter([]))
+    assert browse.browse_groceries("aldi") == []  # An empty listing counts as a failure
+    monkeypatch.setattr(browse, "_iter_groceries", failing)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            browse.browse_groceries("aldi")
+
+    assert circuit.state == CIRCUIT_OPEN
+    with pytest.raises(CircuitOpen):
+        browse.browse_groceries("aldi")
+
+
+def test_open_circuit_fails_fast_with_retry_after(clock, tmp_path, monkeypatch):
+    scrapes = []
+    monkeypatch.setattr(common, "snapshot_cache", SnapshotCache(SnapshotStore(str(tmp_path / "snapshots.db"))))
+    monkeypatch.setattr(common, "browse_groceries", scrapes.append)
+    circuit = get_circuit_breaker("aldi")
+    for _ in range(circuit.min_calls):
+        circuit.record(False)
+    client = TestClient(FastAPI())
+    client.app.include_router(router)
+
+    for path in ("/browse/aldi/freshgroceries", "/browse/aldi/freshgroceries/stream"):
+        response = client.get(path)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(int(circuit.open_for))
+    assert scrapes == []
+
+
+def test_pool_exhaustion_is_busy_not_down(clock, tmp_path, monkeypatch):
+    def exhausted(store_key):
+        raise DriverPoolExhausted("No aldi driver available after 120s")
+
+    monkeypatch.setattr(common, "snapshot_cache", SnapshotCache(SnapshotStore(str(tmp_path / "snapshots.db"))))
+    monkeypatch.setattr(common, "browse_groceries", exhausted)
+    client = TestClient(FastAPI())
+    client.app.include_router(router)
+
+    response = client.get("/browse/aldi/freshgroceries")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(Config.DRIVER_POOL_RETRY_AFTER)
+
+
+def test_bulk_scrapes_are_refused_while_open_and_count_when_nothing_answers(clock, monkeypatch):
+    async def blocked(self, url):
+        return {"url": url, "status": "blocked", "error": "HTTP 403"}
+
+    monkeypatch.setattr(ProductPageScraper, "scrape_product_async", blocked)
+    circuit = get_circuit_breaker("aldi")
+    client = TestClient(FastAPI())
+    client.app.include_router(scrape_router)
+    body = {"store": "aldi", "urls": ["https://groceries.aldi.co.uk/p/1"]}
+
+    for _ in range(circuit.min_calls):
+        assert client.post("/scrape/bulk", json=body).status_code == 200
+    response = client.post("/scrape/bulk", json=body)
+
+    assert circuit.state == CIRCUIT_OPEN
+    assert response.status_code == 503 and response.headers["Retry-After"] == str(int(circuit.open_for))
+
+
+def test_catalogue_crawl_stops_once_the_circuit_opens(clock, tmp_path, monkeypatch):
+    fetched = []
+    circuit = get_circuit_breaker("aldi")
+
+    def fetch_html(self, url):
+        fetched.append(url)
+        for _ in range(circuit.min_calls):
+            circuit.record(False)  # Listing scrapes fail meanwhile
+        raise PageFetchError("HTTP 500", 500)
+
+    monkeypatch.setattr(HttpListingScraper, "fetch_html", fetch_html)
+    monkeypatch.setitem(Config.FETCH_BACKENDS, "aldi", "http")
+    crawl = CatalogueCrawl("aldi", "crawl-1", store=FrontierStore(str(tmp_path / "frontiers.db")))
+
+    with pytest.raises(CircuitOpen):
+        list(browse.iter_catalogue("aldi", crawl))
+    assert len(fetched) == 1
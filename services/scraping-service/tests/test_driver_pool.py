@@ -0,0 +1,110 @@
+import threading
+import pytest
+from selenium.common.exceptions import WebDriverException
+from app.scraper.driver_pool import DriverPool, DriverPoolExhausted
+
+
+class FakeDriver:
+    def __init__(self, number):
+        self.number = number
+        self.capabilities = {}
+        self.current_url = "about:blank"
+        self.window_handles = ["tab-0"]
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+class Factory:
+    def __init__(self):
+        self.drivers = []
+
+    def __call__(self):
+        driver = FakeDriver(len(self.drivers))
+        self.drivers.append(driver)
+        return driver
+
+
+def test_checked_in_driver_is_leased_again():
+    factory = Factory()
+    pool = DriverPool("aldi", factory, size=2, max_pages=10, max_rss_mb=0)
+
+    with pool.driver() as lease:
+        first = lease.driver
+        assert pool.stats()["leased"] == 1
+    with pool.driver() as lease:
+        second = lease.driver
+
+    assert first is second and len(factory.drivers) == 1
+    assert pool.stats() == {"size": 2, "live": 1, "idle": 1, "leased": 0, "recycled": 0}
+
+
+def test_prewarm_fills_the_pool():
+    factory = Factory()
+    pool = DriverPool("aldi", factory, size=3, max_rss_mb=0)
+
+    pool.prewarm()
+
+    assert len(factory.drivers) == 3 and pool.stats()["idle"] == 3
+
+
+def test_worn_out_driver_is_recycled():
+    factory = Factory()
+    pool = DriverPool("aldi", factory, size=1, max_pages=5, max_rss_mb=0)
+
+    with pool.driver() as lease:
+        lease.pages = 5
+    driver = pool.checkout()
+
+    assert factory.drivers[0].quit_called
+    assert driver is factory.drivers[1] and pool.stats()["recycled"] == 1
+
+
+def test_broken_and_unhealthy_drivers_are_discarded():
+    factory = Factory()
+    pool = DriverPool("aldi", factory, size=1, max_rss_mb=0)
+
+    with pytest.raises(WebDriverException):
+        with pool.driver():
+            raise WebDriverException("browser crashed")
+    unhealthy = pool.checkout()
+    pool.checkin(unhealthy)
+    unhealthy.window_handles = []  # The browser window has gone away while idle
+    driver = pool.checkout()
+
+    assert factory.drivers[0].quit_called and unhealthy.quit_called
+    assert driver is factory.drivers[2] and pool.stats()["recycled"] == 2
+
+
+def test_checkout_waits_for_a_checkin_then_gives_up():
+    pool = DriverPool("aldi", Factory(), size=1, max_rss_mb=0)
+    driver = pool.checkout()
+
+    with pytest.raises(DriverPoolExhausted):
+        pool.checkout(timeout=0.05)
+    threading.Timer(0.05, pool.checkin, args=(driver,)).start()
+
+    assert pool.checkout(timeout=2) is driver
+
+
+def test_failed_driver_start_frees_its_slot():
+    def failing():
+        raise WebDriverException("geckodriver not found")
+
+    pool = DriverPool("aldi", failing, size=1, max_rss_mb=0)
+
+    for _ in range(2):
+        with pytest.raises(WebDriverException):
+            pool.checkout(timeout=0.05)
+    assert pool.stats()["live"] == 0
+
+
+def test_lease_marked_broken_is_discarded():
+    factory = Factory()
+    pool = DriverPool("aldi", factory, size=1, max_rss_mb=0)
+
+    with pool.driver() as lease:
+        lease.broken = True
+
+    assert factory.drivers[0].quit_called and pool.stats()["live"] == 0
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.scraper.executor import ScrapeCancelled, ScrapeExecutor, ScrapeQueueFull, scrape_cancelled
+
+
+class Tracker:
+    """A blocking scrape that records how many copies of it run at once."""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, value):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return value
+
+
+class FakeRequest:
+    """A client that disconnects after ``after`` seconds."""
+
+    def __init__(self, after):
+        self.gone_at = time.monotonic() + after
+        self.url = type("URL", (), {"path": "/browse/aldi/freshgroceries"})()
+
+    async def is_disconnected(self):
+        return time.monotonic() >= self.gone_at
+
+
+def _executor(**kwargs):
+    settings = dict(max_workers=4, concurrency={"aldi": 1, "tesco": 2}, max_queue=3, disconnect_poll=0.02)
+    settings.update(kwargs)
+    return ScrapeExecutor(**settings)
+
+
+def test_each_retailer_runs_at_most_its_concurrency():
+    executor, aldi, tesco = _executor(), Tracker(), Tracker()
+
+    async def main():
+        return await asyncio.gather(*[executor.run("aldi", aldi, i) for i in range(3)],
+                                    *[executor.run("tesco", tesco, i) for i in range(2)])
+
+    assert asyncio.run(main()) == [0, 1, 2, 0, 1]
+    assert aldi.peak == 1 and tesco.peak == 2
+
+
+def test_scrapes_past_the_queue_depth_are_refused():
+    executor = _executor()
+
+    async def main():
+        running = [asyncio.ensure_future(executor.run("aldi", Tracker(), i)) for i in range(3)]
+        await asyncio.sleep(0)
+        with pytest.raises(ScrapeQueueFull) as refused:
+            await executor.run("aldi", Tracker(), 3)
+        assert executor.stats()["aldi"]["queued"] + executor.stats()["aldi"]["running"] == 3
+        await asyncio.gather(*running)
+        return refused.value
+
+    refused = asyncio.run(main())
+
+    assert refused.retry_after > 0 and executor.stats()["aldi"]["running"] == 0
+    assert asyncio.run(executor.run("aldi", Tracker(0), "again")) == "again"
+
+
+def test_disconnected_client_cancels_the_scrape_at_its_next_check():
+    executor, stopped = _executor(), threading.Event()
+
+    def scrape():
+        while not scrape_cancelled():
+            time.sleep(0.01)
+        stopped.set()
+
+    with pytest.raises(ScrapeCancelled):
+        asyncio.run(executor.run("aldi", scrape, request=FakeRequest(after=0.05)))
+
+    assert stopped.wait(1)
+
+
+def test_stream_yields_items_and_stops_the_scrape_when_closed():
+    executor, produced = _executor(), []
+
+    def scrape():
+        for i in range(1000):
+            produced.append(i)
+            yield i
+
+    async def main():
+        items = []
+        stream = executor.stream("aldi", scrape, buffer=2)
+        async for item in stream:
+            items.append(item)
+            if len(items) == 3:
+                break
+        await stream.aclose()
+        return items
+
+    assert asyncio.run(main()) == [0, 1, 2]
+    time.sleep(0.1)
+    assert len(produced) < 10  # The bounded buffer held the scrape back, and closing ended it
@@ -0,0 +1,140 @@
+import pytest
+from app.scraper.extractors import ProductExtractor
+from app.scraper.specs import SPECS
+from tests.corpus import (
+    comparable, corpus_pages, extraction_modes, offline_scraper, read_golden, read_html
+)
+
+PAGES = corpus_pages()
+MODES = ["soup/html.parser", "soup/lxml", "spec/html.parser", "spec/lxml"]
+
+# A few tiles per page, written down by reading the fixture HTML rather than by running an extractor
+HAND_CHECKED = {
+    "aldi": [
+        {"store": "Aldi", "url": "https://groceries.aldi.co.uk/en-GB/p-british-semi-skimmed-milk/100000000",
+         "name": "British Semi Skimmed Milk", "price": 0.71, "size": "500g",
+         "image_url": "https://assets.aldi.co.uk/lazy/100000000.jpg",  # Lazy image behind a placeholder
+         "provide_rating": False, "external_id": "100000000"},
+        {"store": "Aldi", "url": "https://groceries.aldi.co.uk/en-GB/p-free-range-eggs/100100001",
+         "name": "Free Range Eggs", "brand": "CORNISH FARM", "price": 1.09, "size": "1kg",
+         "image_url": "https://assets.aldi.co.uk/100100001.jpg", "provide_rating": False, "external_id": "100100001"},
+    ],
+    "tesco": [
+        {"store": "Tesco", "url": "https://www.tesco.com/groceries/en-GB/products/300000000",
+         "name": "Tesco Organic Bananas",  # Empty aria-label, so the title text
+         "price": "61p", "discount_price": "£3.16 Clubcard Price",
+         "image_url": "https://digitalcontent.api.tesco.com/v2/media/ghs/300000000.jpeg"},
+        {"store": "Tesco", "url": "https://www.tesco.com/groceries/en-GB/products/300007919",
+         "name": "Tesco British Semi Skimmed Milk 1kg", "price": "£8.10",
+         "image_url": "https://digitalcontent.api.tesco.com/v2/media/ghs/300007919.jpeg"},
+    ],
+    "iceland": [
+        {"store": "Iceland", "url": "https://www.iceland.co.uk/p/organic-bananas/60000.html",
+         "name": "Iceland Organic Bananas 500g", "price": 0.97, "size": "500g",
+         "image_url": "https://assets.iceland.co.uk/60000-400.webp",  # Widest srcset entry
+         "rating": 0.0, "provide_rating": True, "external_id": "60000"},
+        {"store": "Iceland", "url": "https://www.iceland.co.uk/p/free-range-eggs/60026.html",
+         "name": "Iceland Free Range Eggs 2 Litres", "price": 6.21, "size": "2 Litres",
+         "unit_price": "£5.66 per kg", "image_url": "https://assets.iceland.co.uk/60026.jpg",
+         "rating": 2.0, "provide_rating": True, "external_id": "60026"},
+    ],
+    "sainsbury": [
+        {"store": "Sainsbury", "url": "https://www.sainsburys.co.uk/gol/7000000/sainsburys-organic-bananas",
+         "name": "Sainsbury's Organic Bananas 500g", "price": 0.33, "size": "500g", "unit_price": "£5.27/kg",
+         "image_url": "https://www.sainsburys.co.uk/wcsstore7.20.1.145/ExtendedSitesCatalogAssetStore/images/"
+                      "catalog/productImages/22/00000007000000/00000007000000_L.jpeg",
+         "provide_rating": True, "external_id": "7000000", "badges": "Nectar Price, New"},
+        {"store": "Sainsbury", "url": "https://www.sainsburys.co.uk/gol/7000155/sainsburys-mature-cheddar",
+         "name": "Sainsbury's Mature Cheddar 400g", "price": 0.98, "size": "400g", "unit_price": "£3.67/kg",
+         "rating": 0.5, "provide_rating": True, "external_id": "7000155"},  # Placeholder image only
+    ],
+    "morrison": [
+        {"store": "Morrisons", "url": "https://groceries.morrisons.com/products/morrisons-organic-bananas/100000000",
+         "name": "Morrisons Organic Bananas", "brand": "Morrisons", "price": 0.49, "discount_price": "Any 3 for £9",
+         "size": "500g", "unit_price": "(£6.18 per kg)",
+         "image_url": "https://groceries.morrisons.com/productImages/100000000.jpg",
+         "external_id": "100000000", "provide_rating": False},
+        {"store": "Morrisons", "url": "https://groceries.morrisons.com/products/morrisons-free-range-eggs/100000194",
+         "name": "Morrisons Free Range Eggs", "brand": "Morrisons", "price": 2.5, "size": "2 Litres",
+         "unit_price": "(£8.20 per kg)", "image_url": "https://groceries.morrisons.com/productImages/100000194.jpg",
+         "rating": 3.5,  # Three full stars and a partial one
+         "external_id": "100000194", "provide_rating": False},
+    ],
+}
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("page", PAGES, ids=[page["retailer"] for page in PAGES])
+def test_extraction_matches_golden(page, mode):
+    """Every extraction path returns the golden products for each corpus page.
+
+    Regression-only: every golden file is generated by the soup/html.parser
+    extraction, so it pins the other paths and later changes to that output
+    but cannot show the output was right. test_extraction_matches_hand_checked_tiles does.
+    """
+    products = extraction_modes(page["retailer"])[mode](read_html(page))
+
+    assert comparable(products) == read_golden(page)
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("page", PAGES, ids=[page["retailer"] for page in PAGES])
+def test_extraction_matches_hand_checked_tiles(page, mode):
+    """Every extraction path reads the hand-checked tiles exactly as they appear on the page."""
+    products = {product["url"]: product for product in comparable(
+        extraction_modes(page["retailer"])[mode](read_html(page)))}
+
+    for expected in HAND_CHECKED[page["retailer"]]:
+        assert products.get(expected["url"]) == expected
+
+
+@pytest.mark.parametrize("page", PAGES, ids=[page["retailer"] for page in PAGES])
+def test_products_are_timestamped(page):
+    """Volatile fields are still produced, they are just left out of the golden files."""
+    products = extraction_modes(page["retailer"])["spec/lxml"](read_html(page))
+
+    assert products
+    assert all("timestamp" in product for product in products)
+
+
+@pytest.mark.parametrize("retailer", sorted(SPECS))
+def test_tiles_without_a_product_link_are_skipped(retailer):
+    """A tile whose link is missing yields no product rather than one without a URL."""
+    fields = {name: None for name in SPECS[retailer].fields}
+
+    assert offline_scraper(retailer)._product_from_fields(fields) is None
+
+
+def test_retailers_all_have_fixtures():
+    """The corpus covers every retailer with an extraction spec."""
+    assert sorted(page["retailer"] for page in PAGES) == sorted(SPECS)
+
+
+def test_aldi_page_plan_from_pagination():
+    """Aldi's page count and page URL template are read from the first page."""
+    page = next(page for page in PAGES if page["retailer"] == "aldi")
+    scraper = offline_scraper("aldi")
+
+    page_info = SPECS["aldi"].extract_html(read_html(page), "lxml")["page"]
+    page_count, page_url = scraper._page_plan(page_info)
+
+    assert page_count == 4
+    assert page_url(3) == "https://groceries.aldi.co.uk/en-GB/fresh-food?page=3&sort=relevance"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("£1.25", 1.25),
+    ("52p", 0.52),
+    (" £10 ", 10.0),
+    ("Price unavailable", None),
+    (None, None),
+])
+def test_parse_price(text, expected):
+    """Prices in pounds and pence are normalised to pounds."""
+    assert ProductExtractor.parse_price(text) == expected
+
+
+def test_pick_image_url_skips_placeholders():
+    """Placeholder data: URLs fall through to srcset, then to data-src."""
+    assert ProductExtractor.pick_image_url("data:image/gif;base64,R0", "https://a/1.webp 400w, https://a/2.webp 200w") == "https://a/1.webp"
+    assert ProductExtractor.pick_image_url("data:image/gif;base64,R0", None, "https://a/lazy.jpg") == "https://a/lazy.jpg"
@@ -0,0 +1,116 @@
+import pytest
+import requests
+from fastapi.testclient import TestClient
+from app.scraper import browse, fetch_backends, utils
+from app.scraper.base import IncompleteScrape, PageFetchError
+from app.scraper.config import Config
+from app.scraper.factory import ScraperFactory
+from app.scraper.fetch_backends import BrowserRequired, HttpListingScraper, fetch_backend_stats, last_fetch_backend
+from app.scraper.throttle import get_throttle
+from mock_retailer.server import MockSettings, app as mock_app
+
+
+@pytest.fixture
+def mock_site(monkeypatch):
+    """Route every BaseScraper request to the mock retailer, whatever its host."""
+    mock_app.state.settings = MockSettings(latency_ms=0, latency_jitter_ms=0, pages=3, tiles_per_page=6, eager_tiles=6)
+    client = TestClient(mock_app)
+    monkeypatch.setattr(requests, "Session", lambda: client)
+    monkeypatch.setattr(utils, "_rate_limiter", utils.RateLimiter(requests_per_minute=60000, burst=1000))
+    monkeypatch.setattr(fetch_backends, "_usage", {})
+    monkeypatch.setattr(fetch_backends, "_browser_until", {})
+    # Any browser scrape is a stand-in, so a test can tell which backend served it
+    monkeypatch.setattr(browse, "_iter_browser_groceries", lambda store_key: iter([{"name": "from the browser"}]))
+    return mock_app.state.settings
+
+
+def test_http_backend_reads_every_listing_page(mock_site, monkeypatch):
+    monkeypatch.setitem(Config.FETCH_BACKENDS, "aldi", "http")
+
+    products = browse.browse_groceries("aldi")
+
+    assert len(products) == 18  # 3 pages of 6 tiles
+    assert len({p["url"] for p in products}) == 18
+    assert all(p["store"] == "Aldi" and p["price"] for p in products)
+    assert products.backend == last_fetch_backend("aldi") == "http"
+
+
+def test_auto_backend_stays_on_http_when_tiles_are_served(mock_site, monkeypatch):
+    monkeypatch.setitem(Config.FETCH_BACKENDS, "sainsbury", "auto")
+
+    products = browse.browse_groceries("sainsbury")
+
+    assert len(products) == 6
+    assert fetch_backend_stats()["sainsbury"] == {
+        "configured": "auto", "http": 1, "browser": 0, "fallbacks": 0, "last": "http"}
+
+
+def test_auto_backend_falls_back_when_tiles_need_javascript(mock_site, monkeypatch):
+    mock_site.eager_tiles = 0  # Every tile comes from the lazy loader
+    monkeypatch.setitem(Config.FETCH_BACKENDS, "iceland", "auto")
+
+    products = browse.browse_groceries("iceland")
+
+    assert products == [{"name": "from the browser"}]
+    assert fetch_backend_stats()["iceland"]["fallbacks"] == 1
+    assert products.backend == last_fetch_backend("iceland") == "browser"
+
+
+def test_auto_backend_remembers_the_fallback_for_a_while(mock_site, monkeypatch):
+    mock_site.eager_tiles = 0
+    monkeypatch.setitem(Config.FETCH_BACKENDS, "iceland", "auto")
+    browse.browse_groceries("iceland")
+    mock_site.eager_tiles = 6  # HTTP would work now, but is not tried again yet
+
+    assert browse.browse_groceries("iceland").backend == "browser"
+    assert fetch_backend_stats()["iceland"]["fallbacks"] == 1
+
+    monkeypatch.setitem(fetch_backends._browser_until, "iceland", 0.0)  # The recheck is due
+    assert browse.browse_groceries("iceland").backend == "http"
+
+
+def test_auto_backend_probe_is_one_request_that_leaves_the_throttle_alone(mock_site, monkeypatch):
+    mock_site.throttle_rate = 1  # Every request answered with 429
+    monkeypatch.setitem(Config.FETCH_BACKENDS, "morrison", "auto")
+    throttle = get_throttle(ScraperFactory.get_scraper("morrison", driver=fetch_backends.NO_BROWSER).groceries_url)
+    rate = throttle.rate
+    mock_app.state.stats.clear()
+
+    products = browse.browse_groceries("morrison")
+
+    assert products.backend == "browser"
+    assert mock_app.state.stats["morrison"]["throttled"] == 1
+    assert throttle.rate == rate
+
+
+def test_http_listing_reports_pages_it_could_not_load(mock_site, monkeypatch):
+    monkeypatch.setitem(Config.FETCH_BACKENDS, "aldi", "http")
+    read_listing = HttpListingScraper.read_listing
+
+    def failing_page_two(self, url, probe=False):
+        if self.pages_loaded == 1:
+            self.pages_loaded += 1
+            raise PageFetchError("HTTP 500", 500)
+        return read_listing(self, url, probe)
+
+    monkeypatch.setattr(HttpListingScraper, "read_listing", failing_page_two)
+    products = []
+
+    with pytest.raises(IncompleteScrape, match=r"\[2\] of 3"):
+        products.extend(browse.iter_groceries("aldi"))
+    assert len(products) == 12  # Pages 1 and 3
+
+
+def test_http_backend_does_not_fall_back(mock_site, monkeypatch):
+    mock_site.eager_tiles = 0
+    monkeypatch.setitem(Config.FETCH_BACKENDS, "morrison", "http")
+
+    with pytest.raises(BrowserRequired):
+        browse.browse_groceries("morrison")
+
+
+def test_unknown_backend_is_rejected(monkeypatch):
+    monkeypatch.setitem(Config.FETCH_BACKENDS, "tesco", "curl")
+
+    with pytest.raises(ValueError):
+        ScraperFactory.get_fetch_backend("tesco")
@@ -0,0 +1,20 @@
+import asyncio
+from app.scraper.fetcher import AsyncFetcher
+
+
+def test_clients_of_a_previous_loop_are_closed():
+    fetcher = AsyncFetcher()
+
+    async def first_loop():
+        return fetcher.client()
+
+    async def second_loop():
+        client = fetcher.client()
+        await fetcher.aclose()
+        return client
+
+    first = asyncio.run(first_loop())
+    second = asyncio.run(second_loop())
+
+    assert first is not second
+    assert first.is_closed and second.is_closed
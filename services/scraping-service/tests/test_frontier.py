@@ -0,0 +1,178 @@
+import asyncio
+import pytest
+import requests
+from fastapi.testclient import TestClient
+from app.scraper import browse, utils
+from app.scraper.base import PageFetchError
+from app.scraper.config import Config
+from app.scraper.frontier import (
+    CRAWL_RULES, URL_CATEGORY, URL_PAGE, BloomFilter, CatalogueCrawl, CrawlFrontier, FrontierStore
+)
+from app.scraper.jobs import JobRunner, JobStore
+from mock_retailer.pages import render_tiles
+from mock_retailer.server import MockSettings, app as mock_app
+
+BASE = Config.RETAILER_URLS["aldi"][0]
+
+
+def _page(links=(), tiles_of=None):
+    tiles = render_tiles("aldi", tiles_of, 0, 6, BASE) if tiles_of else ""
+    anchors = "".join(f'<a href="{href}">link</a>' for href in links)
+    return f"<html><body><nav>{anchors}</nav><div class='product-listing'>{tiles}</div></body></html>"
+
+
+# A home page leading to two categories; Bakery repeats the Fresh Food products
+SITE = {
+    f"{BASE}/": _page(["/en-GB/fresh-food", "/en-GB/bakery#top", "/en-GB/fresh-food?sort=price",
+                       "/en-GB/organic-bananas/4088600081016", "https://ads.example.com/en-GB/bakery"]),
+    f"{BASE}/en-GB/fresh-food": _page(["/en-GB/fresh-food?page=2&sort=relevance", "/en-GB/fresh-food/fruit"], 1),
+    f"{BASE}/en-GB/fresh-food?page=2": _page(["/en-GB/fresh-food?page=1"], 2),
+    f"{BASE}/en-GB/bakery": _page(["/en-GB/fresh-food"], 1),
+    f"{BASE}/en-GB/fresh-food/fruit": _page([], 3),
+}
+ORDER = [f"{BASE}/", f"{BASE}/en-GB/fresh-food", f"{BASE}/en-GB/fresh-food?page=2",
+         f"{BASE}/en-GB/bakery", f"{BASE}/en-GB/fresh-food/fruit"]
+
+
+class FakeSite:
+    def __init__(self):
+        self.fetched = []
+
+    def fetch(self, url):
+        self.fetched.append(url)
+        if url not in SITE:
+            raise PageFetchError("HTTP 404", 404)
+        return SITE[url]
+
+
+def _build(tree):
+    """Products by their tile links, enough to tell pages apart."""
+    return [{"url": href} for href in tree.xpath("//a[@class='product-tile__link']/@href")]
+
+
+@pytest.fixture
+def frontiers(tmp_path):
+    return FrontierStore(str(tmp_path / "frontiers.db"))
+
+
+def test_bloom_filter_never_forgets_and_survives_a_round_trip():
+    bloom = BloomFilter(capacity=2000, error_rate=0.01)
+    keys = [f"https://shop/c/{i}" for i in range(2000)]
+    assert all(bloom.add(key) for key in keys[:1000])
+    restored = BloomFilter.from_dict(bloom.to_dict())
+
+    assert all(key in restored for key in keys[:1000])
+    assert not restored.add(keys[0])
+    false_positives = sum(key in restored for key in keys[1000:])
+    assert false_positives < 50  # About 1% expected at capacity, fewer at half of it
+
+
+def test_links_are_normalised_and_only_catalogue_links_are_kept():
+    rules, host = CRAWL_RULES["aldi"], "groceries.aldi.co.uk"
+
+    assert rules.classify(f"{BASE}/en-GB/fresh-food/?sort=price#top", host) == (
+        f"{BASE}/en-GB/fresh-food", URL_CATEGORY)
+    assert rules.classify(f"{BASE}/en-GB/fresh-food?page=1", host) == (f"{BASE}/en-GB/fresh-food", URL_CATEGORY)
+    assert rules.classify(f"{BASE}/en-GB/fresh-food?sort=price&page=3", host) == (
+        f"{BASE}/en-GB/fresh-food?page=3", URL_PAGE)
+    assert rules.classify(f"{BASE}/en-GB/organic-bananas/4088600081016", host) is None
+    assert rules.classify("https://ads.example.com/en-GB/bakery", host) is None
+
+
+def test_frontier_prefers_shallow_urls_and_further_pages_of_a_listing():
+    frontier = CrawlFrontier(BloomFilter(capacity=100))
+    frontier.push("deep", 2)
+    frontier.push("category", 1)
+    frontier.push("page-2", 1, URL_PAGE)
+
+    assert not frontier.push("category", 1)
+    assert [frontier.pop().url for _ in range(3)] == ["page-2", "category", "deep"]
+    assert frontier.pop() is None
+
+
+def test_crawl_visits_each_catalogue_page_once_and_dedupes_products(frontiers):
+    site = FakeSite()
+    crawl = CatalogueCrawl("aldi", "crawl-1", store=frontiers, seeds=[f"{BASE}/"])
+
+    products = [p for page in crawl.iter_pages(site.fetch, _build) for p in page]
+
+    assert site.fetched == ORDER
+    assert len(products) == 18 and len({p["url"] for p in products}) == 18  # Bakery added nothing new
+    assert frontiers.load("crawl-1") is None  # A finished crawl leaves no checkpoint
+
+
+def test_an_interrupted_crawl_resumes_from_its_checkpoint(frontiers):
+    site = FakeSite()
+    crawl = CatalogueCrawl("aldi", "crawl-2", store=frontiers, seeds=[f"{BASE}/"], checkpoint_every=1)
+    stored = []
+    for page in crawl.iter_pages(site.fetch, _build):
+        stored.extend(page)
+        if len(site.fetched) == 3:
+            break  # The process dies while page 2 of Fresh Food is being stored
+
+    checkpoint = frontiers.load("crawl-2")
+    assert checkpoint["pages"] == 2 and checkpoint["produced"] == 6
+    stored = stored[:checkpoint["produced"]]  # What the job store keeps on resume
+
+    site.fetched = []
+    resumed = CatalogueCrawl("aldi", "crawl-2", store=frontiers)
+    assert resumed.resumed
+    stored.extend(p for page in resumed.iter_pages(site.fetch, _build) for p in page)
+
+    assert site.fetched == ORDER[2:]
+    assert len(stored) == 18 and len({p["url"] for p in stored}) == 18
+
+
+def test_resumed_catalogue_jobs_keep_the_results_their_checkpoint_covers(tmp_path, frontiers, monkeypatch):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    runner = JobRunner(store=store, frontiers=frontiers)
+    submitted = []
+    monkeypatch.setattr(runner, "submit", submitted.append)
+    crawl_job = store.create("aldi", "catalogue", {})
+    listing_job = store.create("aldi", "freshgroceries", {})
+    for job in (crawl_job, listing_job):
+        store.append_results(job["id"], [{"url": f"/p/{i}"} for i in range(9)])
+    frontiers.save(crawl_job["id"], "aldi", {"pages": 2, "produced": 6})
+
+    asyncio.run(runner.resume())
+
+    assert submitted == [crawl_job["id"], listing_job["id"]]
+    assert store.get(crawl_job["id"])["product_count"] == 6
+    assert [p["url"] for p in store.results(crawl_job["id"])] == [f"/p/{i}" for i in range(6)]
+    assert store.get(listing_job["id"])["product_count"] == 0
+
+
+def test_catalogue_crawl_over_http_reads_every_page_of_the_mock_listing(frontiers, monkeypatch):
+    mock_app.state.settings = MockSettings(latency_ms=0, latency_jitter_ms=0, pages=3, tiles_per_page=6, eager_tiles=6)
+    monkeypatch.setattr(requests, "Session", lambda: TestClient(mock_app))
+    monkeypatch.setattr(utils, "_rate_limiter", utils.RateLimiter(requests_per_minute=60000, burst=1000))
+    monkeypatch.setitem(Config.FETCH_BACKENDS, "aldi", "http")
+    crawl = CatalogueCrawl("aldi", "crawl-3", store=frontiers)
+
+    products = [p for page in browse.iter_catalogue("aldi", crawl) for p in page]
+
+    assert len(products) == 18 and all(p["store"] == "Aldi" and p["price"] for p in products)
+    assert crawl.pages == 3 and crawl.errors == 1  # The mock has no home page
+
+
+def test_resumed_catalogue_crawl_keeps_its_fetch_backend(frontiers, monkeypatch):
+    monkeypatch.setitem(Config.FETCH_BACKENDS, "aldi", "auto")
+    crawl = CatalogueCrawl("aldi", "crawl-4", store=frontiers, seeds=[f"{BASE}/"])
+    crawl.backend = "browser"  # Settled on before the restart
+    crawl.checkpoint()
+    site = FakeSite()
+
+    class FakeBrowserPages:
+        def __init__(self, store_key):
+            self.fetch = site.fetch
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(browse, "_BrowserPages", FakeBrowserPages)
+    monkeypatch.setattr(browse, "last_fetch_backend", lambda store_key: None)  # Forgotten by the restart
+    resumed = CatalogueCrawl("aldi", "crawl-4", store=frontiers)
+
+    assert resumed.backend == "browser"
+    assert [p for page in browse.iter_catalogue("aldi", resumed) for p in page]
+    assert site.fetched[0] == f"{BASE}/"
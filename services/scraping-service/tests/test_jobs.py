@@ -0,0 +1,141 @@
+import asyncio
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from selenium.common.exceptions import WebDriverException
+from app.scraper import browse
+from app.scraper.config import Config
+from app.scraper.frontier import FrontierStore
+from app.scraper.jobs import JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JobRunner, JobStore
+from app.scraper.routes import job_routes
+
+
+def _products(n, prefix="product"):
+    return [{"store": "Aldi", "name": f"{prefix} {i}"} for i in range(n)]
+
+
+@pytest.fixture
+def runner(tmp_path):
+    return JobRunner(JobStore(str(tmp_path / "jobs.db")), FrontierStore(str(tmp_path / "frontiers.db")))
+
+
+def _run(runner, *job_ids):
+    async def main():
+        for job_id in job_ids:
+            runner.submit(job_id)
+        await asyncio.gather(*runner._tasks)
+    asyncio.run(main())
+
+
+def test_jobs_and_results_survive_a_new_store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job = store.create("aldi", "freshgroceries", {"max_products": 10})
+    store.mark_running(job["id"])
+    store.append_results(job["id"], _products(3))
+    store.append_results(job["id"], _products(2, "more"))
+
+    reopened = JobStore(store.path)
+
+    assert reopened.get(job["id"])["status"] == JOB_RUNNING
+    assert reopened.get(job["id"])["options"] == {"max_products": 10}
+    assert reopened.get(job["id"])["product_count"] == 5
+    assert [p["name"] for p in reopened.results(job["id"], offset=2, limit=2)] == ["product 2", "more 0"]
+    assert reopened.unfinished() == [job["id"]]
+
+
+def test_runner_stores_results_in_batches_up_to_max_products(runner, monkeypatch):
+    monkeypatch.setattr(browse, "iter_groceries", lambda retailer: iter(_products(100)))
+    capped = runner.store.create("aldi", "freshgroceries", {"max_products": 30})
+    full = runner.store.create("aldi", "freshgroceries", {})
+
+    _run(runner, capped["id"], full["id"])
+
+    assert runner.store.get(capped["id"])["status"] == JOB_COMPLETED
+    assert runner.store.get(capped["id"])["product_count"] == 30
+    assert runner.store.get(full["id"])["product_count"] == 100
+    assert [p["name"] for p in runner.iter_results(full["id"], batch=40)] == [p["name"] for p in _products(100)]
+
+
+def test_failed_scrape_fails_the_job_with_its_error(runner, monkeypatch):
+    def failing(retailer):
+        yield from _products(30)
+        raise RuntimeError("listing changed")
+
+    monkeypatch.setattr(browse, "iter_groceries", failing)
+    job = runner.store.create("aldi", "freshgroceries", {})
+
+    _run(runner, job["id"])
+
+    assert runner.store.get(job["id"])["status"] == JOB_FAILED
+    assert runner.store.get(job["id"])["error"] == "listing changed"
+
+
+def test_failed_catalogue_crawl_carries_on_from_its_checkpoint(runner, monkeypatch):
+    monkeypatch.setattr(Config, "JOB_RETRY_DELAY", 0)
+    started_at = []
+
+    def iter_catalogue(retailer, crawl):
+        started_at.append(crawl.produced)
+        first = crawl.pages
+        for page in range(first, 4):
+            crawl.pages += 1
+            crawl.produced += 2
+            yield _products(2, f"page {page}")
+            if page == 1:
+                crawl.checkpoint()  # Covers pages 0 and 1
+            if page == 2 and len(started_at) == 1:
+                raise WebDriverException("Firefox crashed")
+
+    monkeypatch.setattr(browse, "iter_catalogue", iter_catalogue)
+    job = runner.store.create("aldi", "catalogue", {})
+
+    _run(runner, job["id"])
+
+    assert started_at == [0, 4]
+    assert runner.store.get(job["id"])["status"] == JOB_COMPLETED
+    assert [p["name"] for p in runner.store.results(job["id"])] == [
+        f"page {page} {i}" for page in range(4) for i in range(2)]  # Page 2 stored once
+    assert runner.frontiers.load(job["id"]) is None
+
+
+def test_resume_starts_interrupted_jobs_over(runner, monkeypatch):
+    interrupted = runner.store.create("aldi", "freshgroceries", {})
+    runner.store.mark_running(interrupted["id"])
+    runner.store.append_results(interrupted["id"], _products(5, "before the restart"))
+    done = runner.store.create("aldi", "freshgroceries", {})
+    runner.store.mark_finished(done["id"], JOB_COMPLETED)
+    monkeypatch.setattr(browse, "iter_groceries", lambda retailer: iter(_products(3)))
+
+    async def main():
+        await runner.resume()
+        assert runner.store.get(interrupted["id"])["status"] in (JOB_QUEUED, JOB_RUNNING)
+        await asyncio.gather(*runner._tasks)
+    asyncio.run(main())
+
+    assert runner.store.get(interrupted["id"])["status"] == JOB_COMPLETED
+    assert [p["name"] for p in runner.store.results(interrupted["id"])] == ["product 0", "product 1", "product 2"]
+    assert runner.store.get(done["id"])["product_count"] == 0
+
+
+def test_jobs_api(runner, monkeypatch):
+    monkeypatch.setattr(job_routes, "job_runner", runner)
+    monkeypatch.setattr(browse, "iter_groceries", lambda retailer: iter(_products(3)))
+    app = FastAPI()
+    app.include_router(job_routes.router)
+
+    with TestClient(app) as client:
+        assert client.post("/jobs", json={"retailer": "lidl"}).status_code == 400
+        created = client.post("/jobs", json={"retailer": "Aldi"})
+        job_id = created.json()["id"]
+        for _ in range(50):
+            job = client.get(f"/jobs/{job_id}", params={"limit": 2}).json()
+            if job["status"] == JOB_COMPLETED:
+                break
+            time.sleep(0.05)
+        lines = client.get(f"/jobs/{job_id}/results").text.splitlines()
+
+    assert created.status_code == 202 and created.json()["retailer"] == "aldi"
+    assert job["status"] == JOB_COMPLETED and job["product_count"] == 3 and len(job["results"]) == 2
+    assert len(lines) == 3
+    assert client.get("/jobs/unknown").status_code == 404
@@ -0,0 +1,78 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.scraper.config import _retailer_urls
+from app.scraper.specs import SPECS, products_from_tiles
+from mock_retailer.pages import LISTING_PATHS
+from mock_retailer.server import MockSettings, app
+from tests.corpus import offline_scraper
+
+
+@pytest.fixture
+def client():
+    app.state.settings = MockSettings(latency_ms=0, latency_jitter_ms=0, tiles_per_page=10, eager_tiles=4)
+    app.state.stats.clear()
+    return TestClient(app)
+
+
+def _products(retailer, html):
+    spec = SPECS[retailer]
+    scraper = offline_scraper(retailer)
+    return products_from_tiles(spec.extract_html(html)["tiles"], scraper._product_from_fields, spec.store)
+
+
+@pytest.mark.parametrize("retailer", sorted(LISTING_PATHS))
+def test_listing_and_lazy_tiles_extract(client, retailer):
+    """Eager tiles come with the page, the rest from the lazy-load endpoint."""
+    listing = client.get(LISTING_PATHS[retailer])
+    lazy = client.get(f"/_mock/tiles/{retailer}", params={"page": 1})
+
+    assert listing.status_code == 200
+    assert len(_products(retailer, listing.text)) == 4
+    assert len(_products(retailer, listing.text.replace("</main>", lazy.text + "</main>"))) == 10
+
+
+def test_listing_is_deterministic(client):
+    path = LISTING_PATHS["morrison"]
+    assert client.get(path).text == client.get(path).text
+
+
+def test_aldi_pagination(client):
+    html = client.get(LISTING_PATHS["aldi"], params={"page": 2}).text
+    page_info = SPECS["aldi"].extract_html(html)["page"]
+
+    assert page_info["current_page"] == "current-page2"
+    assert page_info["page_numbers"] == ["page-1", "page-3", "page-4"]
+    assert client.get(LISTING_PATHS["aldi"], params={"page": 5}).status_code == 404
+
+
+def test_injected_429(client):
+    client.post("/_mock/config", json={"throttle_rate": 1, "retry_after": 7})
+
+    response = client.get(LISTING_PATHS["tesco"])
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+    assert client.get("/_mock/stats").json() == {"tesco": {"throttled": 1}}
+
+
+def test_injected_errors_and_captchas(client):
+    client.post("/_mock/config", json={"error_rate": 1})
+    assert client.get(LISTING_PATHS["iceland"]).status_code == 500
+
+    client.post("/_mock/config", json={"error_rate": 0, "captcha_rate": 1})
+    response = client.get(LISTING_PATHS["iceland"])
+    assert response.status_code == 200
+    assert "captcha" in response.text.lower()
+
+
+def test_retailer_urls_can_be_overridden(monkeypatch):
+    assert _retailer_urls("aldi", "https://groceries.aldi.co.uk", "/en-GB/fresh-food") == (
+        "https://groceries.aldi.co.uk", "https://groceries.aldi.co.uk/en-GB/fresh-food")
+
+    monkeypatch.setenv("ALDI_BASE_URL", "http://localhost:8101/")
+    assert _retailer_urls("aldi", "https://groceries.aldi.co.uk", "/en-GB/fresh-food") == (
+        "http://localhost:8101", "http://localhost:8101/en-GB/fresh-food")
+
+    monkeypatch.setenv("ALDI_GROCERIES_URL", "http://localhost:8101/en-GB/frozen")
+    assert _retailer_urls("aldi", "https://groceries.aldi.co.uk", "/en-GB/fresh-food")[1] == (
+        "http://localhost:8101/en-GB/frozen")
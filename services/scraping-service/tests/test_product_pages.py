@@ -0,0 +1,167 @@
+import asyncio
+import json
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.scraper import utils
+from app.scraper.fetcher import fetcher
+from app.scraper.config import Config
+from app.scraper.product_pages import ProductPageScraper, extract_product_page, unique_urls
+from app.scraper.routes.iceland_routes import router as product_router
+from app.scraper.routes.scrape_routes import router as scrape_router
+from mock_retailer.server import MockSettings, app as mock_app
+
+MOCK = "http://mock.test"
+
+
+def _page(head):
+    return f"<html><head>{head}</head><body><p>product</p></body></html>"
+
+
+def test_json_ld_product_inside_graph():
+    data = {"@graph": [
+        {"@type": "BreadcrumbList"},
+        {"@type": ["Product"], "name": " Cherry Tomatoes 250g ", "sku": 12345,
+         "brand": "Tesco", "image": {"url": "https://img/1.jpg"},
+         "aggregateRating": {"ratingValue": "4.5"},
+         "offers": [{"price": "1.20", "priceCurrency": "GBP"}]},
+    ]}
+    html = _page(f'<script type="application/ld+json">{json.dumps(data)}</script>')
+
+    product = extract_product_page(html, "https://www.tesco.com/groceries/en-GB/products/12345", "tesco")
+
+    assert product["name"] == "Cherry Tomatoes 250g"
+    assert product["brand"] == "Tesco"
+    assert product["price"] == 1.2
+    assert product["currency"] == "GBP"
+    assert product["image_url"] == "https://img/1.jpg"
+    assert product["rating"] == 4.5
+    assert product["external_id"] == "12345"
+    assert product["size"] == "250g"
+
+
+def test_open_graph_fallback():
+    html = _page('<script type="application/ld+json">{not json</script>'
+                 '<meta property="og:title" content="Morrisons Carrots 1kg">'
+                 '<meta property="product:price:amount" content="0.55">')
+    url = "https://groceries.morrisons.com/products/morrisons-carrots/111222"
+
+    product = extract_product_page(html, url, "morrison")
+
+    assert product["name"] == "Morrisons Carrots 1kg"
+    assert product["price"] == 0.55
+    assert product["external_id"] == "111222"
+
+
+def test_page_without_product_data():
+    assert extract_product_page(_page("<title>Fresh food</title>"), "https://x/", "aldi") is None
+
+
+def test_unique_urls_keeps_first_order():
+    assert unique_urls([" https://a/1 ", "https://a/2#reviews", "", "https://a/1", "https://a/2"]) == [
+        "https://a/1", "https://a/2"]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    mock_app.state.settings = MockSettings(latency_ms=0, latency_jitter_ms=0)
+    transport = httpx.ASGITransport(app=mock_app)
+    monkeypatch.setattr(fetcher, "client", lambda proxy=None: httpx.AsyncClient(transport=transport))
+    monkeypatch.setattr(utils, "_rate_limiter", utils.RateLimiter(requests_per_minute=60000, burst=1000))
+    app = FastAPI()
+    app.include_router(scrape_router)
+    app.include_router(product_router)
+    return TestClient(app)
+
+
+def test_bulk_scrape_reports_each_url(client):
+    urls = [
+        f"{MOCK}/groceries/en-GB/products/300010001",
+        f"{MOCK}/groceries/en-GB/products/300010002",
+        f"{MOCK}/groceries/en-GB/products/300010001",
+        f"{MOCK}/groceries/en-GB/missing",
+        f"{MOCK}/groceries/en-GB/shop/fresh-food/all",
+    ]
+
+    response = client.post("/scrape/bulk", json={"store": "tesco", "urls": urls})
+    body = response.json()
+
+    assert response.status_code == 200
+    assert (body["requested"], body["unique"], body["succeeded"], body["failed"]) == (5, 4, 2, 2)
+    assert [r["status"] for r in body["results"]] == ["ok", "ok", "not_found", "no_product_data"]
+    assert body["results"][0]["product"]["external_id"] == "300010001"
+    assert body["results"][0]["product"]["store"] == "tesco"
+
+
+def test_bulk_scrape_rejects_unknown_store(client):
+    response = client.post("/scrape/bulk", json={"store": "lidl", "urls": [f"{MOCK}/p/1"]})
+
+    assert response.status_code == 400
+
+
+def test_scrape_single_product(client):
+    ok = client.post("/scrape/product", json={"store": "morrison", "url": f"{MOCK}/products/carrots/100010001"})
+    missing = client.post("/scrape/product", json={"store": "morrison", "url": f"{MOCK}/products/none"})
+
+    assert ok.status_code == 200
+    assert ok.json()["external_id"] == "100010001"
+    assert missing.status_code == 404
+
+
+def test_bulk_scrape_rejects_a_batch_the_rate_limit_cannot_let_through(client, monkeypatch):
+    monkeypatch.setattr(Config, "BULK_SCRAPE_TIMEOUT", 1)
+    urls = [f"{MOCK}/groceries/en-GB/products/30001000{i}" for i in range(2)]
+
+    response = client.post("/scrape/bulk", json={"store": "tesco", "urls": urls})
+
+    assert response.status_code == 400
+    assert "rate limit" in response.json()["detail"]
+
+
+class Disconnecting:
+    """A client that disconnects once ``pages`` pages have been scraped."""
+
+    def __init__(self, scraped, pages):
+        self.scraped, self.pages = scraped, pages
+        self.url = type("URL", (), {"path": "/scrape/bulk"})()
+
+    async def is_disconnected(self):
+        return len(self.scraped) >= self.pages
+
+
+def test_scrape_many_fetches_a_few_pages_at_a_time_and_stops_for_a_gone_client(monkeypatch):
+    monkeypatch.setattr(Config, "BULK_SCRAPE_WORKERS", 2)
+    scraped, running, peak = [], [0], [0]
+
+    async def scrape(self, url):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        scraped.append(url)
+        return {"url": url, "status": "ok", "product": {}}
+
+    monkeypatch.setattr(ProductPageScraper, "scrape_product_async", scrape)
+    urls = [f"{MOCK}/p/{i}" for i in range(10)]
+
+    results = asyncio.run(ProductPageScraper("tesco").scrape_many(urls, request=Disconnecting(scraped, 4)))
+
+    done = len(scraped)
+    assert peak[0] == 2 and done in (4, 5)  # The other worker's page may still be in flight
+    assert [r["url"] for r in results] == urls
+    assert [r["status"] for r in results] == ["ok"] * done + ["failed"] * (10 - done)
+    assert results[-1]["error"] == "Client closed request"
+
+
+@pytest.mark.parametrize("status, code", [("blocked", 503), ("failed", 502), ("no_product_data", 404)])
+def test_single_product_failures_map_to_their_status_codes(client, monkeypatch, status, code):
+    async def scrape(self, url):
+        return {"url": url, "status": status, "error": "HTTP 403"}
+
+    monkeypatch.setattr(ProductPageScraper, "scrape_product_async", scrape)
+
+    response = client.post("/scrape/product", json={"store": "morrison", "url": f"{MOCK}/products/carrots/1"})
+
+    assert response.status_code == code
+    assert ("Retry-After" in response.headers) == (code == 503)
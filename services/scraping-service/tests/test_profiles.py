@@ -0,0 +1,128 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+import pytest
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from app.scraper import profiles
+from app.scraper.config import Config
+from app.scraper.driver_pool import DriverPool
+from app.scraper.profiles import ProfileManager, apply_browser_profile
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    manager = ProfileManager(str(tmp_path / "profiles"), max_age=3600)
+    monkeypatch.setattr(profiles, "profile_manager", manager)
+    return manager
+
+
+def _browse(workdir, cookies=()):
+    """Leave behind what a browser writes into its profile."""
+    with open(os.path.join(workdir, "parent.lock"), "w"):
+        pass
+    os.makedirs(os.path.join(workdir, "cache2", "entries"), exist_ok=True)
+    with closing(sqlite3.connect(os.path.join(workdir, "cookies.sqlite"))) as conn:
+        conn.execute("CREATE TABLE moz_cookies (host TEXT, name TEXT, value TEXT, path TEXT, "
+                     "isSecure INTEGER, expiry INTEGER)")
+        conn.executemany("INSERT INTO moz_cookies VALUES (?, ?, ?, ?, ?, ?)", cookies)
+        conn.commit()
+
+
+class FakeDriver:
+    def __init__(self, workdir):
+        self.capabilities = {"moz:profile": workdir}
+        self.current_url = "about:blank"
+        self.window_handles = ["tab-0"]
+
+    def quit(self):
+        pass
+
+
+def test_a_retired_profile_warms_the_next_browser(manager):
+    first = manager.checkout("tesco")
+    assert os.listdir(first) == []
+    _browse(first, [(".tesco.com", "consent", "yes", "/", 1, int(time.time()) + 3600)])
+
+    manager.retire(first)
+    second = manager.checkout("tesco")
+
+    assert not os.path.exists(first)
+    assert sorted(os.listdir(second)) == ["cookies.sqlite"]  # The lock file and disk cache are left behind
+    assert manager.stats()["tesco"]["warm_starts"] == 1 and manager.stats()["tesco"]["cold_starts"] == 1
+
+
+def test_discarded_or_stale_profiles_are_not_reused(manager):
+    broken = manager.checkout("aldi")
+    _browse(broken)
+    manager.retire(broken, keep=False)
+    assert not os.path.exists(manager.snapshot_dir("aldi"))
+
+    healthy = manager.checkout("aldi")
+    _browse(healthy)
+    manager.retire(healthy)
+    old = time.time() - 7200
+    os.utime(manager.snapshot_dir("aldi"), (old, old))
+
+    assert os.listdir(manager.checkout("aldi")) == []
+
+
+def test_snapshot_cookies_skip_expired_ones_and_read_millisecond_expiry(manager):
+    workdir = manager.checkout("iceland")
+    now = time.time()
+    _browse(workdir, [
+        (".iceland.co.uk", "session", "abc", "/", 1, int(now) + 600),
+        (".iceland.co.uk", "consent", "all", "/", 0, int((now + 600) * 1000)),
+        (".iceland.co.uk", "old", "x", "/", 0, int(now) - 10),
+    ])
+    manager.retire(workdir)
+
+    cookies = {cookie["name"]: cookie for cookie in manager.cookies("iceland")}
+    assert set(cookies) == {"session", "consent"}
+    assert cookies["session"]["secure"] is True and cookies["consent"]["expires"] == int(now) + 600
+
+
+def test_profiles_outside_the_manager_are_left_alone(manager, tmp_path):
+    foreign = tmp_path / "rust_mozprofile_abc"
+    foreign.mkdir()
+    manager.retire(str(foreign))
+    assert foreign.exists()
+
+
+def test_remove_stale_deletes_profiles_of_dead_processes(manager):
+    live = manager.checkout("morrison")
+    dead = os.path.join(manager.root, "morrison", f"run-{profiles.BOOT_TOKEN}-999999999-deadbeef")
+    # Its PID may be running again after a restart, but not as the process that made it
+    earlier_boot = os.path.join(manager.root, "morrison", f"run-0ldb00t-{os.getpid()}-deadbeef")
+    os.makedirs(dead)
+    os.makedirs(earlier_boot)
+
+    manager.remove_stale()
+
+    assert os.path.exists(live)
+    assert not os.path.exists(dead) and not os.path.exists(earlier_boot)
+
+
+def test_pool_snapshots_recycled_drivers_but_not_broken_ones(manager):
+    pool = DriverPool("sainsbury", lambda: FakeDriver(manager.checkout("sainsbury")), size=1, max_pages=1)
+
+    driver = pool.checkout()
+    pool.checkin(driver, pages=1, discard=True)
+    assert not os.path.exists(manager.snapshot_dir("sainsbury"))
+
+    driver = pool.checkout()
+    _browse(driver.capabilities["moz:profile"])
+    pool.checkin(driver, pages=1)
+    assert os.path.exists(os.path.join(manager.snapshot_dir("sainsbury"), "cookies.sqlite"))
+    assert not os.path.exists(driver.capabilities["moz:profile"])
+
+
+def test_firefox_runs_on_the_working_profile(manager, monkeypatch):
+    monkeypatch.setattr(Config, "BROWSER_PROFILES", True)
+    options = FirefoxOptions()
+
+    workdir = apply_browser_profile(options, "tesco")
+
+    assert options.arguments[-2:] == ["-profile", workdir]
+    assert options.preferences["browser.cache.disk.parent_directory"] == workdir
+    assert manager.owns(workdir) == "tesco"
@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from app.scraper import utils
+from app.scraper.utils import MemoryBucketStore, RateLimiter, SQLiteBucketStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return MemoryBucketStore() if request.param == "memory" else SQLiteBucketStore(str(tmp_path / "rates.db"))
+
+
+def test_burst_is_free_then_callers_queue_for_tokens(store):
+    # 60 tokens a minute is one a second, and up to 2 can be taken at once
+    delays = [store.reserve("www.aldi.co.uk", rate=1.0, capacity=2, now=100.0) for _ in range(4)]
+
+    assert delays == [0.0, 0.0, 1.0, 2.0]
+
+
+def test_tokens_refill_over_time_up_to_the_burst(store):
+    for _ in range(2):
+        store.reserve("www.aldi.co.uk", rate=1.0, capacity=2, now=100.0)
+
+    assert store.reserve("www.aldi.co.uk", rate=1.0, capacity=2, now=101.5) == 0.0
+    # An hour idle still only refills the burst
+    assert [store.reserve("www.aldi.co.uk", rate=1.0, capacity=2, now=4000.0) for _ in range(3)] == [0.0, 0.0, 1.0]
+
+
+def test_hosts_have_their_own_buckets_and_rates(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(utils.time, "time", lambda: clock[0])
+    monkeypatch.setattr(utils.random, "uniform", lambda low, high: 0.0)
+    limiter = RateLimiter(requests_per_minute=60, burst=1, host_limits={"www.tesco.com": 30})
+
+    assert limiter._reserve("www.aldi.co.uk") == 0.0
+    assert limiter._reserve("www.tesco.com") == 0.0
+    assert limiter._reserve("www.aldi.co.uk") == 1.0
+    assert limiter._reserve("www.tesco.com") == 2.0
+
+
+def test_acquire_sleeps_for_its_reservation(monkeypatch):
+    slept = []
+
+    async def fake_sleep(delay):
+        slept.append(delay)
+
+    monkeypatch.setattr(utils.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(utils.random, "uniform", lambda low, high: 0.0)
+    limiter = RateLimiter(requests_per_minute=60, burst=1)
+
+    async def take(n):
+        for _ in range(n):
+            await limiter.acquire("www.aldi.co.uk")
+
+    asyncio.run(take(3))
+
+    assert len(slept) == 2 and slept[0] == pytest.approx(1.0, abs=0.05) and slept[1] == pytest.approx(2.0, abs=0.05)
@@ -0,0 +1,70 @@
+import time
+import pytest
+from selenium.common.exceptions import TimeoutException
+from app.scraper.readiness import wait_until_ready
+
+
+class FakePage:
+    """Answers READY_SCRIPT like a listing that lazy-loads a batch of tiles after each scroll."""
+
+    def __init__(self, tiles=10, batches=(), batch_delay=0.05, busy=False):
+        self.tiles = tiles
+        self.batches = list(batches)
+        self.batch_delay = batch_delay
+        self.busy = busy  # A ticker that never lets the page go quiet
+        self.scrolls = 0
+        self.pending_at = None
+        self.last_activity = time.monotonic()
+
+    def execute_script(self, script, selector, scroll):
+        now = time.monotonic()
+        if self.pending_at is not None and now >= self.pending_at:
+            self.tiles += self.batches.pop(0)
+            self.pending_at = None
+            self.last_activity = now
+        if scroll:
+            self.scrolls += 1
+            self.last_activity = now
+            if self.batches and self.pending_at is None:
+                self.pending_at = now + self.batch_delay
+        inflight = self.pending_at is not None or self.busy
+        return {"tiles": self.tiles, "quiet": 0 if inflight else (now - self.last_activity) * 1000}
+
+
+def _wait(page, timeout=5, **kwargs):
+    kwargs.setdefault("quiet_ms", 50)
+    kwargs.setdefault("settle_max", 1)
+    return wait_until_ready(page, "li", timeout, poll=0.01, **kwargs)
+
+
+def test_static_page_is_ready_once_quiet():
+    state = _wait(FakePage(tiles=12))
+
+    assert (state.tiles, state.stable) == (12, True)
+    assert state.elapsed < 0.5
+
+
+def test_scrolls_until_tiles_stop_growing():
+    page = FakePage(tiles=10, batches=[10, 10, 5])
+
+    state = _wait(page)
+
+    assert state.tiles == 35
+    assert state.scrolls == 4  # Once per growth, the last finding nothing more
+    assert state.stable
+
+
+def test_busy_page_is_taken_after_settling():
+    state = _wait(FakePage(tiles=8, busy=True), settle_max=0.2)
+
+    assert (state.tiles, state.stable) == (8, False)
+    assert state.elapsed < 1
+
+
+def test_page_without_tiles_hits_the_deadline():
+    start = time.monotonic()
+
+    with pytest.raises(TimeoutException):
+        _wait(FakePage(tiles=0), timeout=0.3)
+
+    assert time.monotonic() - start < 1
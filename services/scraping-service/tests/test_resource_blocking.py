@@ -0,0 +1,132 @@
+import re
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import unquote
+import pytest
+from app.scraper import resource_blocking
+from app.scraper.config import Config
+from app.scraper.resource_blocking import (
+    ResourcePolicy, ResourceSink, blocking_preferences, record_page_resources, resource_blocking_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(resource_blocking, "_sinks", {})
+    monkeypatch.setattr(resource_blocking, "_pages", {})
+    monkeypatch.setattr(resource_blocking, "_sink_seen", {})
+    yield
+    for sink in resource_blocking._sinks.values():
+        sink.close()
+
+
+def _proxy(port, request):
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(request)
+        response = b""
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return response
+            response += chunk
+
+
+def test_default_allowlist_is_the_retailers_own_domain():
+    assert Config.RESOURCE_ALLOW_DOMAINS["tesco"][0] == "tesco.com"
+    policy = ResourcePolicy.for_store("tesco")
+    assert set(policy.blocked_types) == {"image", "font", "stylesheet", "media"}
+
+    pattern = re.compile(policy.blocked_pattern, re.I)
+    assert pattern.search("https://www.tesco.com/fonts/a.woff2?v=3")
+    assert pattern.search("https://www.tesco.com/main.CSS")
+    assert not pattern.search("https://www.tesco.com/app.js")
+    assert not pattern.search("https://www.tesco.com/groceries/en-GB/shop/fresh-food/all")
+
+
+def test_allowed_types_are_not_blocked():
+    policy = ResourcePolicy(["aldi.co.uk"], ["stylesheet", "image"])
+    assert policy.blocked_types == ["font", "media"]
+    assert ResourcePolicy(["aldi.co.uk"], list(resource_blocking.RESOURCE_TYPES)).blocked_pattern is None
+    with pytest.raises(ValueError):
+        ResourcePolicy(["aldi.co.uk"], ["script"])
+
+
+def test_block_profile_routes_rejected_requests_to_the_sink():
+    prefs = blocking_preferences("aldi", "block")
+    pac = unquote(prefs["network.proxy.autoconfig_url"].split(",", 1)[1])
+
+    assert prefs["network.proxy.type"] == 2
+    assert prefs["network.proxy.failover_direct"] is False
+    assert prefs["permissions.default.image"] == 2
+    assert prefs["gfx.downloadable_fonts.enabled"] is False
+    assert '"aldi.co.uk"' in pac
+    assert f"PROXY 127.0.0.1:{resource_blocking._sinks['aldi'].port}" in pac
+
+
+def test_audit_profile_disables_nothing_and_off_keeps_images_disabled():
+    audit = blocking_preferences("iceland", "audit")
+    assert "permissions.default.image" not in audit
+    assert "gfx.downloadable_fonts.enabled" not in audit
+    assert audit["network.proxy.type"] == 2
+
+    assert blocking_preferences("iceland", "off") == {"permissions.default.image": 2}
+    with pytest.raises(ValueError):
+        blocking_preferences("iceland", "strict")
+
+
+def test_blocking_sink_answers_403_and_counts():
+    sink = resource_blocking._sinks["tesco"] = ResourceSink("tesco", "block")
+
+    response = _proxy(sink.port, b"CONNECT www.google-analytics.com:443 HTTP/1.1\r\nHost: x\r\n\r\n")
+    assert response.startswith(b"HTTP/1.1 403")
+    _proxy(sink.port, b"GET http://ads.example.com/tag.js HTTP/1.1\r\nHost: ads.example.com\r\n\r\n")
+
+    assert sink.totals() == {"requests": 2, "bytes": 0}
+
+
+def test_audit_sink_fetches_the_request_and_counts_its_bytes():
+    class Origin(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = b"x" * 2048
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    origin = HTTPServer(("127.0.0.1", 0), Origin)
+    threading.Thread(target=origin.serve_forever, daemon=True).start()
+    sink = resource_blocking._sinks["tesco"] = ResourceSink("tesco", "audit")
+    try:
+        port = origin.server_address[1]
+        response = _proxy(sink.port, f"GET http://127.0.0.1:{port}/font.woff2 HTTP/1.1\r\n"
+                                     f"Host: 127.0.0.1:{port}\r\nConnection: close\r\n\r\n".encode())
+    finally:
+        origin.shutdown()
+        origin.server_close()
+
+    assert response.startswith(b"HTTP/1.0 200") and response.endswith(b"x" * 2048)
+    totals = sink.totals()
+    assert totals["requests"] == 1 and totals["bytes"] == len(response)
+
+
+def test_page_stats_report_savings_per_page():
+    class Driver:
+        def execute_script(self, script):
+            return {"requests": 12, "bytes": 30000}
+
+    sink = resource_blocking._sinks["morrison"] = ResourceSink("morrison", "block")
+    sink.count(requests=9)
+    record_page_resources(Driver(), "morrison")
+    sink.count(requests=3)
+    record_page_resources(Driver(), "morrison")
+    sink.count(requests=20)  # A page that never got ready, so was not recorded
+
+    stats = resource_blocking_stats()["morrison"]
+    assert stats["pages"] == 2 and stats["bytes"] == 60000
+    assert stats["blocked_requests"] == 32 and stats["blocked_bytes"] is None
+    assert stats["per_page"] == {"requests": 12.0, "bytes": 30000, "requests_saved": 6.0, "bytes_saved": None}
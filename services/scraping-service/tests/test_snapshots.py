@@ -0,0 +1,191 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.scraper.browse import Listing
+from app.scraper.changes import ChangeLog
+from app.scraper.executor import ScrapeCancelled, scrape_cancelled, scrape_executor
+from app.scraper.snapshots import (
+    SNAPSHOT_FRESH, SNAPSHOT_LIVE, SNAPSHOT_STALE, SnapshotCache, SnapshotStore
+)
+
+
+class FakeScrape:
+    """Counts scrapes and returns a numbered product list."""
+
+    def __init__(self, delay=0.0, products=True):
+        self.calls = 0
+        self.delay = delay
+        self.products = products
+        self._lock = threading.Lock()
+
+    def __call__(self, retailer):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        time.sleep(self.delay)
+        return [{"store": retailer, "name": f"scrape {call}"}] if self.products else []
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path / "snapshots.db"))
+
+
+@pytest.fixture
+def changes(tmp_path):
+    return ChangeLog(str(tmp_path / "changes.db"))
+
+
+def test_snapshot_survives_a_new_store(store):
+    store.put("aldi", [{"name": "a"}], scraped_at=100.0)
+
+    snapshot = SnapshotStore(store.path).get("aldi")
+
+    assert snapshot.products == [{"name": "a"}]
+    assert snapshot.scraped_at == 100.0
+
+
+def test_snapshot_keeps_the_backend_that_scraped_it(store, changes):
+    listing = Listing([{"store": "aldi", "url": "https://aldi/p/1"}])
+    listing.backend = "http"
+    cache = SnapshotCache(store, ttl=60, max_stale=600, changes=changes)
+
+    snapshot, _ = asyncio.run(cache.get("aldi", lambda retailer: listing))
+
+    assert snapshot.backend == store.get("aldi").backend == "http"
+
+
+def test_fresh_snapshot_is_served_without_scraping(store, changes):
+    scrape = FakeScrape()
+    store.put("aldi", [{"name": "cached"}])
+    cache = SnapshotCache(store, ttl=60, max_stale=600, changes=changes)
+
+    snapshot, source = asyncio.run(cache.get("aldi", scrape))
+
+    assert (snapshot.products, source, scrape.calls) == ([{"name": "cached"}], SNAPSHOT_FRESH, 0)
+
+
+def test_stale_snapshot_is_served_while_refreshing(store, changes):
+    scrape = FakeScrape()
+    store.put("aldi", [{"name": "old"}], scraped_at=time.time() - 120)
+    cache = SnapshotCache(store, ttl=60, max_stale=600, changes=changes)
+
+    async def scenario():
+        first = await cache.get("aldi", scrape)
+        await asyncio.sleep(0.2)  # Let the background refresh finish
+        return first, await cache.get("aldi", scrape)
+
+    (stale, stale_source), (fresh, fresh_source) = asyncio.run(scenario())
+
+    assert (stale.products, stale_source) == ([{"name": "old"}], SNAPSHOT_STALE)
+    assert (fresh.products, fresh_source) == ([{"store": "aldi", "name": "scrape 1"}], SNAPSHOT_FRESH)
+    assert scrape.calls == 1
+
+
+def test_concurrent_misses_share_one_scrape(store, changes):
+    scrape = FakeScrape(delay=0.2)
+    cache = SnapshotCache(store, ttl=60, max_stale=600, changes=changes)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get("tesco", scrape) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+
+    assert scrape.calls == 1
+    assert {source for _, source in results} == {SNAPSHOT_LIVE}
+    assert all(snapshot.products == results[0][0].products for snapshot, _ in results)
+
+
+def test_max_age_forces_a_live_scrape(store, changes):
+    scrape = FakeScrape()
+    store.put("iceland", [{"name": "cached"}], scraped_at=time.time() - 30)
+    cache = SnapshotCache(store, ttl=60, max_stale=600, changes=changes)
+
+    assert asyncio.run(cache.get("iceland", scrape, max_age=60))[1] == SNAPSHOT_FRESH
+    snapshot, source = asyncio.run(cache.get("iceland", scrape, max_age=0))
+
+    assert (source, scrape.calls) == (SNAPSHOT_LIVE, 1)
+    assert snapshot.products == [{"store": "iceland", "name": "scrape 1"}]
+
+
+def test_empty_scrape_keeps_last_good_snapshot(store, changes):
+    store.put("morrison", [{"name": "good"}], scraped_at=time.time() - 30)
+    cache = SnapshotCache(store, ttl=60, max_stale=600, changes=changes)
+
+    snapshot, source = asyncio.run(cache.get("morrison", FakeScrape(products=False), max_age=0))
+
+    assert (snapshot.products, source) == ([{"name": "good"}], SNAPSHOT_STALE)
+    assert store.get("morrison").products == [{"name": "good"}]
+
+
+def test_stats_come_from_memory_without_reading_the_store(store, changes):
+    store.put("aldi", [{"name": "a"}, {"name": "b"}], scraped_at=time.time() - 30)
+    cache = SnapshotCache(store, ttl=60, max_stale=600, changes=changes)
+    asyncio.run(cache.get("aldi", FakeScrape()))
+    store.get = None  # /metrics runs on the event loop, so stats() must not touch SQLite
+
+    stats = cache.stats()["aldi"]
+
+    assert (stats["products"], stats["fresh"]) == (2, 1) and 29 <= stats["age"] <= 31
+
+
+class GoneClient:
+    url = type("URL", (), {"path": "/browse/aldi/freshgroceries"})()
+
+    async def is_disconnected(self):
+        return True
+
+
+class CancellableScrape:
+    """Runs until cancelled or ``seconds`` have passed, like a scrape checking between pages."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.cancelled = threading.Event()
+
+    def __call__(self, retailer):
+        deadline = time.monotonic() + self.seconds
+        while time.monotonic() < deadline:
+            if scrape_cancelled():
+                self.cancelled.set()
+                raise ScrapeCancelled("Scrape cancelled")
+            time.sleep(0.01)
+        return [{"store": retailer, "name": "scraped"}]
+
+
+def test_live_scrape_is_cancelled_when_its_only_client_disconnects(store, changes, monkeypatch):
+    monkeypatch.setattr(scrape_executor, "disconnect_poll", 0.01)
+    cache = SnapshotCache(store, ttl=60, max_stale=600, changes=changes)
+    scrape = CancellableScrape(seconds=5)
+
+    with pytest.raises(ScrapeCancelled):
+        asyncio.run(cache.get("aldi", scrape, request=GoneClient()))
+
+    assert scrape.cancelled.wait(2)
+
+
+def test_live_scrape_keeps_running_for_clients_still_waiting(store, changes, monkeypatch):
+    monkeypatch.setattr(scrape_executor, "disconnect_poll", 0.01)
+    cache = SnapshotCache(store, ttl=60, max_stale=600, changes=changes)
+    scrape = CancellableScrape(seconds=0.2)
+
+    async def both():
+        waiting = asyncio.ensure_future(cache.get("aldi", scrape))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ScrapeCancelled):
+            await cache.get("aldi", scrape, request=GoneClient())
+        return await waiting
+
+    snapshot, source = asyncio.run(both())
+
+    assert (snapshot.products[0]["name"], source) == ("scraped", SNAPSHOT_LIVE)
+    assert not scrape.cancelled.is_set()
+
+
+def test_refresh_feeds_the_change_log(store, changes):
+    cache = SnapshotCache(store, ttl=60, max_stale=600, changes=changes)
+
+    asyncio.run(cache.get("aldi", lambda retailer: [{"store": retailer, "url": "https://aldi/p/1", "price": 1.0}]))
+
+    assert [c["change"] for c in changes.changes("aldi", since=0)[0]] == ["added"]
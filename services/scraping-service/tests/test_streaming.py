@@ -0,0 +1,59 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.scraper import breaker
+from app.scraper.executor import ScrapeExecutor
+from app.scraper.routes import common
+from app.scraper.routes.aldi_routes import router
+
+
+def _pages(*pages):
+    """A scrape yielding pages of products, failing when a page is an exception."""
+    def iter_groceries(store_key):
+        for page in pages:
+            if isinstance(page, Exception):
+                raise page
+            for i in range(page):
+                yield {"store": "Aldi", "name": f"product {i}"}
+    return iter_groceries
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(common, "scrape_executor", ScrapeExecutor(max_workers=2, concurrency={}, max_queue=1))
+    monkeypatch.setattr(breaker, "_breakers", {})
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_products_stream_as_ndjson_lines(client, monkeypatch):
+    monkeypatch.setattr(common, "iter_groceries", _pages(3, 2))
+
+    response = client.get("/browse/aldi/freshgroceries/stream")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [line["name"] for line in _lines(response)] == ["product 0", "product 1", "product 2",
+                                                           "product 0", "product 1"]
+
+
+def test_failure_part_way_ends_the_stream_with_an_error_line(client, monkeypatch):
+    monkeypatch.setattr(common, "iter_groceries", _pages(2, RuntimeError("page 2 did not load")))
+
+    lines = _lines(client.get("/browse/aldi/freshgroceries/stream"))
+
+    assert len(lines) == 3 and lines[-1] == {"error": "page 2 did not load"}
+
+
+def test_stream_is_refused_while_the_retailer_queue_is_full(client):
+    common.scrape_executor._pending["aldi"] = 1
+
+    response = client.get("/browse/aldi/freshgroceries/stream")
+
+    assert response.status_code == 429 and int(response.headers["Retry-After"]) > 0
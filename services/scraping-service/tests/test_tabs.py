@@ -0,0 +1,174 @@
+import time
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from app.scraper import tabs
+from app.scraper.base import PageFetchError
+from app.scraper.config import Config
+from app.scraper.controller.aldi import AldiScraper
+from app.scraper.driver_pool import DriverPool
+from app.scraper.readiness import READY_SCRIPT
+from app.scraper.tabs import NAVIGATE_SCRIPT, TabScheduler
+
+
+class FakeBrowser:
+    """A browser whose tabs each finish loading ``load_time`` seconds after navigating."""
+
+    def __init__(self, load_time=0.2, never_loads=()):
+        self.load_time = load_time
+        self.never_loads = set(never_loads)
+        self.tabs = {"tab-0": {"url": "about:blank", "ready_at": 0}}
+        self.current = "tab-0"
+        self.max_tabs = 1
+        self.switch_to = self
+
+    @property
+    def current_window_handle(self):
+        return self.current
+
+    @property
+    def window_handles(self):
+        return list(self.tabs)
+
+    def window(self, handle):
+        self.current = handle
+
+    def new_window(self, kind):
+        self.current = f"tab-{len(self.tabs)}"
+        self.tabs[self.current] = {"url": "about:blank", "ready_at": 0}
+        self.max_tabs = max(self.max_tabs, len(self.tabs))
+
+    def close(self):
+        del self.tabs[self.current]
+
+    def execute_script(self, script, *args):
+        tab = self.tabs[self.current]
+        if script == NAVIGATE_SCRIPT:
+            tab["url"] = args[0]
+            tab["ready_at"] = float("inf") if args[0] in self.never_loads else time.monotonic() + self.load_time
+            return None
+        if script == READY_SCRIPT:
+            ready = time.monotonic() >= tab["ready_at"]
+            return {"tiles": 10 if ready else 0, "quiet": 10000 if ready else 0}
+        raise AssertionError("unexpected script")
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    monkeypatch.setattr(tabs, "wait_for_slot", lambda url: None)
+    monkeypatch.setattr(tabs, "record_page_resources", lambda driver, store: None)
+
+
+def _url(page):
+    return f"https://shop/list?page={page}"
+
+
+def _current_url(browser):
+    return browser.tabs[browser.current]["url"]
+
+
+def test_pages_load_concurrently_in_up_to_k_tabs():
+    browser = FakeBrowser(load_time=0.2)
+    scheduler = TabScheduler(browser, "li", timeout=5, tabs=4, poll=0.01)
+
+    started = time.monotonic()
+    results = list(scheduler.run(range(1, 9), _url, _current_url))
+    elapsed = time.monotonic() - started
+
+    assert sorted(job for job, _, _ in results) == list(range(1, 9))
+    assert all(url == _url(job) and error is None for job, url, error in results)
+    assert browser.max_tabs == 4
+    assert elapsed < 0.8  # Two rounds of four overlapping loads, not eight in a row
+    assert browser.window_handles == ["tab-0"] and browser.current == "tab-0"
+
+
+def test_a_page_without_tiles_times_out_and_its_tab_moves_on():
+    browser = FakeBrowser(load_time=0.05, never_loads={_url(2)})
+    scheduler = TabScheduler(browser, "li", timeout=0.3, tabs=2, poll=0.01)
+
+    results = {job: (result, error) for job, result, error in scheduler.run([1, 2, 3, 4], _url, _current_url)}
+
+    assert isinstance(results[2][1], TimeoutException)
+    assert [results[job] for job in (1, 3, 4)] == [(_url(1), None), (_url(3), None), (_url(4), None)]
+
+
+def test_extraction_errors_are_yielded_but_a_dead_browser_raises_with_pending_jobs():
+    def extract(browser):
+        if _current_url(browser) == _url(1):
+            raise ValueError("bad tile")
+        if _current_url(browser) == _url(3):
+            raise WebDriverException("browser crashed")
+        return "ok"
+
+    browser = FakeBrowser(load_time=0.05)
+    scheduler = TabScheduler(browser, "li", timeout=5, tabs=3, poll=0.01)
+    seen = []
+    with pytest.raises(WebDriverException):
+        for job, result, error in scheduler.run([1, 2, 3], _url, extract):
+            seen.append((job, result, type(error).__name__ if error else None))
+
+    assert (1, None, "ValueError") in seen
+    assert 3 in scheduler.pending and 1 not in scheduler.pending
+    assert browser.window_handles == ["tab-0"]
+
+
+class DyingBrowser(FakeBrowser):
+    """A browser that crashes when it starts its ``dies_at``-th navigation."""
+
+    def __init__(self, dies_at, **kwargs):
+        super().__init__(**kwargs)
+        self.dies_at = dies_at
+        self.navigations = 0
+        self.dead = False
+
+    def window(self, handle):
+        if self.dead:
+            raise WebDriverException("browser crashed")
+        super().window(handle)
+
+    def execute_script(self, script, *args):
+        if script == NAVIGATE_SCRIPT:
+            self.navigations += 1
+            self.dead = self.dead or self.navigations >= self.dies_at
+        if self.dead:
+            raise WebDriverException("browser crashed")
+        return super().execute_script(script, *args)
+
+
+def _aldi(monkeypatch, primary, spares):
+    """An AldiScraper on ``primary`` whose pool lends out ``spares``; each page yields one product naming it."""
+    def read_page(self, driver):
+        return [{"page": int(_current_url(driver).rsplit("=", 1)[1])}], {}
+
+    monkeypatch.setattr(AldiScraper, "_read_page", read_page)
+    monkeypatch.setattr(Config, "ALDI_PAGE_WORKERS", len(spares) + 1)
+    pool = DriverPool("aldi", iter(spares).__next__, size=len(spares), max_rss_mb=0)
+    return AldiScraper(driver=primary, driver_pool=pool), pool
+
+
+def test_parallel_pagination_yields_every_page_in_order(monkeypatch):
+    scraper, pool = _aldi(monkeypatch, FakeBrowser(load_time=0.02), [FakeBrowser(load_time=0.02)])
+
+    products = list(scraper._iter_pages_parallel(range(2, 12), _url))
+
+    assert [p["page"] for p in products] == list(range(2, 12))
+    assert pool.stats()["idle"] == 1 and not scraper.driver_broken
+
+
+def test_pages_of_a_crashed_browser_are_loaded_by_the_others(monkeypatch):
+    primary = DyingBrowser(dies_at=3, load_time=0.05)
+    scraper, pool = _aldi(monkeypatch, primary, [FakeBrowser(load_time=0.05)])
+
+    products = list(scraper._iter_pages_parallel(range(2, 14), _url))
+
+    assert [p["page"] for p in products] == list(range(2, 14))
+    assert scraper.driver_broken  # The pool discards the primary browser when the scrape ends
+
+
+def test_pages_no_browser_could_load_raise(monkeypatch):
+    spare = DyingBrowser(dies_at=1, load_time=0.02)
+    scraper, pool = _aldi(monkeypatch, DyingBrowser(dies_at=2, load_time=0.02), [spare])
+
+    with pytest.raises(PageFetchError, match="not loaded"):
+        list(scraper._iter_pages_parallel(range(2, 8), _url))
+
+    assert scraper.driver_broken and pool.stats() == {"size": 1, "live": 0, "idle": 0, "leased": 0, "recycled": 1}
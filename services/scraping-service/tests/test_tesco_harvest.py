@@ -0,0 +1,126 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from selenium.common.exceptions import WebDriverException
+from app.scraper import breaker
+from app.scraper.base import IncompleteScrape
+from app.scraper.config import Config
+from app.scraper.controller import tesco
+from app.scraper.controller.tesco import TescoScraper
+from app.scraper.executor import ScrapeExecutor
+from app.scraper.readiness import READY_SCRIPT
+from app.scraper.routes import common
+from app.scraper.routes.tesco_routes import router
+from app.scraper.specs import TESCO_SPEC
+
+
+def _fields(product_id):
+    return {
+        "link": f"/groceries/en-GB/products/{product_id}", "title_label": f"Product {product_id}",
+        "title_text": None, "price": "£1.00", "clubcard_price": None, "image_src": None,
+    }
+
+
+class FakeListing:
+    """A browser on a paginated listing whose pages reveal one more batch of tiles per scroll."""
+
+    def __init__(self, pages, broken=()):
+        self.pages = pages  # {page number: [batch of product ids, ...]}
+        self.broken = broken  # Pages that fail to load
+        self.visited = []
+        self.harvests = 0
+
+    def get(self, url):
+        self.number = int(url.rsplit("page=", 1)[1]) if "page=" in url else 1
+        self.visited.append(self.number)
+        if self.number in self.broken:
+            raise WebDriverException("Reached error page")
+        self.shown = list(self.pages[self.number][0])
+        self.read = 0
+        self.batches = list(self.pages[self.number][1:])
+
+    def execute_script(self, script, *args):
+        if script == READY_SCRIPT:
+            return {"tiles": len(self.shown), "quiet": 10000}
+        if script == TESCO_SPEC.script:
+            self.harvests += 1
+            tiles = [_fields(product_id) for product_id in self.shown[self.read:]]
+            self.read = len(self.shown)
+            if args and args[0]["scroll"] and self.batches:
+                self.shown += self.batches.pop(0)
+            last = max(self.pages)
+            next_page = f"/groceries/en-GB/shop/fresh-food/all?page={self.number + 1}" if self.number < last else None
+            return json.dumps({"tiles": tiles, "page": {"next_page": next_page}, "total": len(self.shown)})
+        return {}
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    monkeypatch.setattr(tesco, "wait_for_slot", lambda url: None)
+    monkeypatch.setattr(tesco, "record_browser_failure", lambda driver, url, error: None)
+    monkeypatch.setattr(TescoScraper.load_page.retry, "sleep", lambda seconds: None)
+    monkeypatch.setattr(Config, "EXTRACTION_MODE", "browser")
+
+
+def test_harvest_follows_scroll_batches_and_pages():
+    browser = FakeListing({
+        1: [[1, 2, 3], [4, 5], [6]],
+        2: [[7, 8], [9]],
+        3: [[10]],
+    })
+    scraper = TescoScraper(driver=browser)
+
+    products = scraper.tesco_groceries()
+
+    assert [p["url"].rsplit("/", 1)[1] for p in products] == [str(i) for i in range(1, 11)]
+    assert browser.visited == [1, 2, 3]
+    assert scraper.pages_loaded == 3
+
+
+def test_products_stream_before_the_page_is_exhausted():
+    browser = FakeListing({1: [[1, 2], [3], [4]]})
+    harvest = TescoScraper(driver=browser).iter_tesco_groceries()
+
+    assert [next(harvest)["name"], next(harvest)["name"]] == ["Product 1", "Product 2"]
+    assert browser.harvests == 1  # The later batches are still waiting to be scrolled into view
+
+
+def test_repeated_tiles_are_dropped_and_a_page_of_repeats_ends_the_harvest():
+    browser = FakeListing({
+        1: [[1, 2], [2, 3]],
+        2: [[1, 2, 3]],  # A site ignoring the page parameter serves page 1 again
+        3: [[4]],
+    })
+
+    products = TescoScraper(driver=browser).tesco_groceries()
+
+    assert [p["name"] for p in products] == ["Product 1", "Product 2", "Product 3"]
+    assert browser.visited == [1, 2]
+
+
+def test_a_page_that_fails_to_load_reports_the_harvest_incomplete():
+    browser = FakeListing({1: [[1, 2]], 2: [[3]], 3: [[4]]}, broken={2})
+    products = []
+
+    with pytest.raises(IncompleteScrape, match="page 2"):
+        products.extend(TescoScraper(driver=browser).iter_tesco_groceries())
+
+    assert [p["name"] for p in products] == ["Product 1", "Product 2"]
+    assert browser.visited == [1, 2, 2, 2]  # load_page's retries
+
+
+def test_stream_route_sends_each_batch_and_ends_an_incomplete_harvest_with_an_error(monkeypatch):
+    browser = FakeListing({1: [[1, 2], [3]], 2: [[4]], 3: [[5]]}, broken={2})
+    monkeypatch.setattr(common, "iter_groceries", lambda store_key: TescoScraper(driver=browser).iter_tesco_groceries())
+    monkeypatch.setattr(common, "scrape_executor", ScrapeExecutor(max_workers=1, concurrency={}, max_queue=1))
+    monkeypatch.setattr(breaker, "_breakers", {})
+    app = FastAPI()
+    app.include_router(router)
+
+    response = TestClient(app).get("/browse/tesco/freshgroceries/stream")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == 200 and response.headers["content-type"] == "application/x-ndjson"
+    assert [line["name"] for line in lines[:-1]] == ["Product 1", "Product 2", "Product 3"]
+    assert "page 2" in lines[-1]["error"]
@@ -0,0 +1,60 @@
+import pytest
+from app.scraper import throttle
+from app.scraper.throttle import AdaptiveThrottle
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(throttle.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _throttle(**kwargs):
+    settings = dict(min_rpm=2, max_rpm=30, increase=0.5, decrease=0.5, cooldown=10)
+    settings.update(kwargs)
+    return AdaptiveThrottle("www.aldi.co.uk", 20, **settings)
+
+
+def test_successes_raise_the_rate_additively_up_to_the_maximum():
+    aimd = _throttle()
+
+    for _ in range(4):
+        aimd.record_success()
+    assert aimd.rate == 22
+    for _ in range(100):
+        aimd.record_success()
+    assert aimd.rate == 30
+
+
+def test_bans_cut_the_rate_once_per_cooldown(clock):
+    aimd = _throttle()
+
+    assert aimd.record_ban("HTTP 429") == 60 / 10  # The backoff is one interval at the new rate
+    aimd.record_ban("HTTP 429")  # Same congestion event
+    assert aimd.rate == 10
+    clock[0] += 10
+    aimd.record_ban("captcha page")
+    assert aimd.rate == 5 and aimd.stats()["bans"] == 3 and aimd.stats()["last_ban_reason"] == "captcha page"
+    for _ in range(5):
+        clock[0] += 10
+        aimd.record_ban("HTTP 403")
+    assert aimd.rate == 2
+
+
+def test_initial_rate_is_clamped_to_the_bounds():
+    assert AdaptiveThrottle("www.aldi.co.uk", 100, min_rpm=2, max_rpm=30).rate == 30
+    assert AdaptiveThrottle("www.aldi.co.uk", 0.5, min_rpm=2, max_rpm=30).rate == 2
+
+
+@pytest.mark.parametrize("html, blocked", [
+    ("<html><head><title>Access Denied</title></head><body>Reference #18.2</body></html>", True),
+    ("<html><body><h1>Are you a   robot?</h1><p>Please complete the CAPTCHA.</p></body></html>", True),
+    ('<html><body><div id="px-captcha"></div><script src="/px.js"></script></body></html>', True),
+    ('<html><head><script src="https://www.google.com/recaptcha/api.js"></script></head>'
+     '<body><div class="product">Bananas</div><script>grecaptcha.ready(function () {});</script></body></html>', False),
+    ('<html><body><!-- captcha disabled --><div class="product">Bananas</div></body></html>', False),
+    ("", False),
+])
+def test_only_visible_block_messages_count(html, blocked):
+    assert throttle.looks_blocked(html) is blocked